@@ -2,7 +2,6 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import pickle
 import numpy as np
-import pandas as pd
 from datetime import datetime
 import shap
 import os
@@ -10,6 +9,9 @@ import sys
 import traceback
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Shared papaya_features package at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from papaya_features import FEATURES, parse_month
 from weather_pipeline import get_weather_features
 
 app = Flask(__name__)
@@ -37,116 +39,21 @@ with open("models/shap_harvest.pkl", "rb") as f:
     shap_harvest = pickle.load(f)
 
 # ======================================================
-# NORMALIZATION MAPS (CRITICAL)
+# FEATURES
 # ======================================================
-WATERING_FREQ_MAP = {
-    "1/day": 7, "2/day": 14, "3/day": 21,
-    "every 2 days": 3.5,
-    "2/week": 2, "3/week": 3,
-    "4/week": 4, "5/week": 5,
-    "daily": 7
-}
-
-MONTH_MAP = {
-    "january": 1, "february": 2, "march": 3, "april": 4,
-    "may": 5, "june": 6, "july": 7, "august": 8,
-    "september": 9, "october": 10, "november": 11, "december": 12
-}
-
-SOIL_MAP = {
-    "loam": "loam",
-    "sandy loam": "sandy_loam",
-    "laterite": "laterite_soils",
-    "laterite soil": "laterite_soils",
-    "laterite soils": "laterite_soils"
-}
-
-DISTRICT_MAP = {
-    "matara": "Matara",
-    "hambantota": "Hambantota",
-    "galle": "Galle"
-}
-
-WATERING_METHOD_MAP = {
-    "drip": "Drip",
-    "manual": "Manual",
-    "sprinkler": "Sprinkler"
-}
+# Maps, encoders and one-hot columns come from the spec shared with
+# train.py and the harvest service; compiling checks it covers every
+# feature the model expects.
+features = FEATURES.compile(feature_names)
 
 # ======================================================
 # HELPERS
 # ======================================================
-def parse_month(value):
-    if isinstance(value, str):
-        key = value.strip().lower()
-        if key in MONTH_MAP:
-            return MONTH_MAP[key]
-        raise ValueError("Invalid plant_month string")
-    value = int(value)
-    if not 1 <= value <= 12:
-        raise ValueError("plant_month must be 1–12")
-    return value
-
 def remaining_days(total_days, plant_month):
     planted = datetime(datetime.utcnow().year, plant_month, 1)
     passed = max(0, (datetime.utcnow() - planted).days)
     return max(0, int(total_days - passed)), passed
 
-def build_features(data, weather):
-    f = {}
-
-    # Handle watering_frequency - can be a number (times per week) or a string pattern
-    watering_freq_value = data["watering_frequency"]
-    if isinstance(watering_freq_value, (int, float)):
-        # Direct numeric value (times per week)
-        f["watering_freq_num"] = float(watering_freq_value)
-    else:
-        # String pattern like "2/week", "daily", etc.
-        f["watering_freq_num"] = WATERING_FREQ_MAP.get(
-            str(watering_freq_value).lower(), 7
-        )
-
-    f["plant_month_num"] = parse_month(data["plant_month"])
-    f["trees_count"] = int(data["trees_count"])
-    f["avg_temp"] = float(weather["avg_temp"])
-    f["total_rain"] = float(weather["total_rain"])
-    f["rainy_days"] = int(weather["rainy_days"])
-
-    f["rain_intensity"] = f["total_rain"] / (f["rainy_days"] + 1)
-    f["temp_stress"] = abs(f["avg_temp"] - 28)
-    f["rain_per_tree"] = f["total_rain"] / (f["trees_count"] + 1)
-    f["is_monsoon"] = int(f["plant_month_num"] in [5,6,7,8,9])
-    f["is_dry"] = int(f["plant_month_num"] in [1,2,3,12])
-    f["temp_rain_synergy"] = np.log1p(f["avg_temp"]) * np.log1p(f["total_rain"])
-
-    df = pd.DataFrame([f])
-
-    # ---- SAFE ONE-HOT ENCODING ----
-    soil = SOIL_MAP.get(str(data["soil_type"]).lower().strip())
-    district = DISTRICT_MAP.get(str(data["district"]).lower().strip())
-    method = WATERING_METHOD_MAP.get(str(data["watering_method"]).lower().strip())
-
-    if soil:
-        col = f"soil_type_{soil}"
-        if col in feature_names:
-            df[col] = 1
-
-    if district:
-        col = f"district_{district}"
-        if col in feature_names:
-            df[col] = 1
-
-    if method:
-        col = f"watering_method_{method}"
-        if col in feature_names:
-            df[col] = 1
-
-    for col in feature_names:
-        if col not in df:
-            df[col] = 0
-
-    return df[feature_names]
-
 def shap_top_features(explainer, X_scaled):
     sv = explainer(X_scaled)
     vals = sv.values[0]
@@ -310,7 +217,7 @@ def predict():
             "rainy_days": int(weather["rainy_days"])
         }
 
-        X = build_features(data, weather)
+        X = features.row(data, weather)[None, :]
         X_scaled = scaler.transform(X)
 
         yield_pred = float(yield_model.predict(X_scaled)[0])
@@ -1,69 +1,44 @@
-import requests
+import os
+import sys
 import pandas as pd
 from datetime import datetime, timedelta
 
-def geocode_district(district: str):
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {"q": district, "format": "json", "limit": 1}
-    headers = {"User-Agent": "PapayaProject/1.0"}
-
-    res = requests.get(url, params=params, headers=headers).json()
-    if len(res) == 0:
-        raise Exception("District not found: " + district)
+# Shared papaya_weather package at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from papaya_weather import MemoryCache, SingleFlight, WeatherClient, daily_frame
 
-    return float(res[0]["lat"]), float(res[0]["lon"])
+# Pooling, timeouts, retries and circuit breaking come from the shared client
+client = WeatherClient(user_agent="PapayaProject/1.0")
+flight = SingleFlight()
 
-def fetch_past_weather(lat, lon, start_date, end_date):
-    url = "https://archive-api.open-meteo.com/v1/archive"
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "start_date": start_date.strftime("%Y-%m-%d"),
-        "end_date": end_date.strftime("%Y-%m-%d"),
-        "daily": "temperature_2m_mean,precipitation_sum",
-        "timezone": "UTC",
-    }
+# Features only change with Open-Meteo's daily refresh
+weather_cache = MemoryCache()
 
-    resp = requests.get(url, params=params).json()
-
-    if "daily" not in resp:
-        return pd.DataFrame()
+def geocode_district(district: str):
+    coords = flight.do("geocode", district, client.geocode, district)
+    if coords is None:
+        raise Exception("District not found: " + district)
 
-    df = pd.DataFrame({
-        "date": resp["daily"]["time"],
-        "temp": resp["daily"]["temperature_2m_mean"],
-        "precip": resp["daily"]["precipitation_sum"]
-    })
+    return coords
 
-    df["date"] = pd.to_datetime(df["date"])
-    return df
+def fetch_past_weather(lat, lon, start_date, end_date):
+    return daily_frame(client.archive_daily(lat, lon, start_date, end_date))
 
 
 def fetch_forecast_weather(lat, lon):
-    url = "https://api.open-meteo.com/v1/forecast"
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "daily": "temperature_2m_mean,precipitation_sum",
-        "forecast_days": 250,
-        "timezone": "UTC",
-    }
-
-    resp = requests.get(url, params=params).json()
+    return daily_frame(client.forecast_daily(lat, lon, forecast_days=250))
 
-    if "daily" not in resp:
-        return pd.DataFrame()
-
-    df = pd.DataFrame({
-        "date": resp["daily"]["time"],
-        "temp": resp["daily"]["temperature_2m_mean"],
-        "precip": resp["daily"]["precipitation_sum"],
-    })
+def get_weather_features(district, planted_month):
+    key = f"{district}|{datetime.utcnow().year}|{int(planted_month)}"
+    cached = weather_cache.get(key)
+    if cached is not None:
+        return cached
 
-    df["date"] = pd.to_datetime(df["date"])
-    return df
+    features = flight.do("features", key, fetch_weather_features, district, planted_month)
+    weather_cache.set(key, features)
+    return features
 
-def get_weather_features(district, planted_month):
+def fetch_weather_features(district, planted_month):
     lat, lon = geocode_district(district)
 
     planted_date = datetime(datetime.now().year, planted_month, 1)
@@ -83,23 +58,23 @@ def get_weather_features(district, planted_month):
         if len(past_df) > 0:
             df_total.append(past_df)
 
-    
+
     # Real 250-day forecast
-    
+
     if end_date.date() > today:
         forecast_df = fetch_forecast_weather(lat, lon)
         if len(forecast_df) > 0:
             df_total.append(forecast_df)
 
-    
+
     if len(df_total) == 0:
         raise Exception("No real weather data available for this district")
 
     df = pd.concat(df_total, ignore_index=True)
 
     return {
-        "avg_temp": round(df["temp"].mean(), 2),
-        "total_rain": round(df["precip"].sum(), 2),
+        "avg_temp": round(float(df["temp"].mean()), 2),
+        "total_rain": round(float(df["precip"].sum()), 2),
         "rainy_days": int((df["precip"] > 1).sum())
     }
 
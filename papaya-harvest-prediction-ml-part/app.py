@@ -1,16 +1,33 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import pickle
 import numpy as np
-import pandas as pd
 from datetime import datetime
-import shap
+import itertools
+from concurrent.futures import ThreadPoolExecutor, wait
 import os
 import sys
+import time
 import traceback
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from weather_pipeline import get_weather_features
+# Shared packages (papaya_features, papaya_weather) at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from papaya_features import (
+    DISTRICT_MAP, FEATURES, SOIL_MAP, WATERING_FREQ_MAP, WATERING_METHOD_MAP,
+    known_watering_frequency, parse_month
+)
+from papaya_weather import gazetteer
+from climatology import climatology
+from explain import ExplanationCache, load_explainer
+from forest_engine import ForestEngine, has_vector_leaves
+from model_bundle import DEFAULT_BUNDLE, ModelBundle, rss_bytes
+from service_metrics import (
+    REQUEST_SECONDS, REQUESTS_TOTAL, WEATHER_FALLBACKS, StageTimer,
+    log_event, registry as metrics_registry
+)
+from weather_pipeline import client as weather_client, get_weather_features, weather_cache, weather_store
+from weather_prefetch import WeatherPrefetcher
 
 app = Flask(__name__)
 CORS(app)
@@ -18,75 +35,104 @@ CORS(app)
 # ======================================================
 # LOAD MODELS & ARTIFACTS
 # ======================================================
-with open("models/yield_model.pkl", "rb") as f:
-    yield_model = pickle.load(f)
-
-with open("models/harvest_model.pkl", "rb") as f:
-    harvest_model = pickle.load(f)
-
-with open("models/scaler.pkl", "rb") as f:
-    scaler = pickle.load(f)
-
-with open("models/feature_names.pkl", "rb") as f:
-    feature_names = pickle.load(f)
-
-with open("models/shap_yield.pkl", "rb") as f:
-    shap_yield = pickle.load(f)
-
-with open("models/shap_harvest.pkl", "rb") as f:
-    shap_harvest = pickle.load(f)
+# Prefer the single-file bundle written by train.py (or
+# `python model_bundle.py build`); fall back to the separate pickles.
+# MODEL_VARIANT=compact serves the output of train.py --compact.
+MODEL_VARIANT = os.environ.get("MODEL_VARIANT", "full").lower().strip()
+if MODEL_VARIANT not in ("full", "compact"):
+    raise ValueError(f"Unknown MODEL_VARIANT: {MODEL_VARIANT} (use full or compact)")
+MODELS_DIR = os.path.join("models", "compact") if MODEL_VARIANT == "compact" else "models"
+MODEL_BUNDLE = os.environ.get("MODEL_BUNDLE", os.path.join(MODELS_DIR, os.path.basename(DEFAULT_BUNDLE)))
+
+def load_pickle(path, stats):
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        obj = pickle.load(f)
+    stats[os.path.splitext(os.path.basename(path))[0]] = {
+        "load_ms": round((time.perf_counter() - start) * 1000, 3),
+        "bytes": os.path.getsize(path),
+        "rss_delta_bytes": max(0, rss_bytes() - rss_before)
+    }
+    return obj
+
+model_bundle = ModelBundle(MODEL_BUNDLE) if os.path.exists(MODEL_BUNDLE) else None
+if model_bundle is not None and \
+        os.path.abspath(os.path.dirname(MODEL_BUNDLE)) == os.path.abspath(MODELS_DIR):
+    # Pickles replaced after the bundle was written are the newer models
+    stale = model_bundle.stale_pickles()
+    if stale:
+        print(f"WARNING: {MODEL_BUNDLE} does not match {', '.join(n + '.pkl' for n in stale)} "
+              f"in {MODELS_DIR}/; serving the pickles (rebuild with `python model_bundle.py build`)")
+        model_bundle = None
+
+if model_bundle is not None:
+    if "joint_model" in model_bundle.sections:
+        models = [model_bundle.model("joint_model")]
+    else:
+        models = [model_bundle.model("yield_model"), model_bundle.model("harvest_model")]
+    scaler = model_bundle.scaler()
+    feature_names = model_bundle.feature_names
+    model_info = dict(model_bundle.stats(), source="bundle")
+else:
+    pickle_stats = {}
+    # train.py --joint writes one two-output model instead of the pair
+    if os.path.exists(os.path.join(MODELS_DIR, "joint_model.pkl")):
+        models = [load_pickle(os.path.join(MODELS_DIR, "joint_model.pkl"), pickle_stats)]
+    else:
+        models = [
+            load_pickle(os.path.join(MODELS_DIR, "yield_model.pkl"), pickle_stats),
+            load_pickle(os.path.join(MODELS_DIR, "harvest_model.pkl"), pickle_stats)
+        ]
+    scaler = load_pickle(os.path.join(MODELS_DIR, "scaler.pkl"), pickle_stats)
+    feature_names = load_pickle(os.path.join(MODELS_DIR, "feature_names.pkl"), pickle_stats)
+    model_info = {"source": "pickle", "artifacts": pickle_stats}
+model_info["variant"] = MODEL_VARIANT
+
+# "pair" = separate yield and harvest models, "joint:<strategy>" = one
+# booster predicting both (see train.py --joint)
+if len(models) == 1:
+    joint_model = models[0]
+    model_info["layout"] = "joint:" + (
+        "multi_output_tree" if has_vector_leaves(joint_model) else "one_output_per_tree"
+    )
+else:
+    joint_model = None
+    model_info["layout"] = "pair"
+
+print(f"Loaded models from {model_info['source']}: " + ", ".join(
+    f"{name} {info['load_ms']:.1f} ms" for name, info in model_info["artifacts"].items()
+))
+
+# Array-based evaluator for small requests; it beats XGBoost's
+# per-call overhead on a few rows but not on large batches.
+USE_FOREST_ENGINE = os.environ.get("USE_FOREST_ENGINE", "1") == "1"
+FOREST_ENGINE_MAX_ROWS = 8
+forest_engine = ForestEngine.from_models(*models) if USE_FOREST_ENGINE else None
+
+# "native" = XGBoost pred_contribs, "shap" = pickled TreeExplainers,
+# "path" = engine path attribution (picked automatically for
+# multi_output_tree joint models)
+EXPLAIN_BACKEND = os.environ.get("EXPLAIN_BACKEND", "native")
+explainer = load_explainer(EXPLAIN_BACKEND, *models, models_dir=MODELS_DIR)
+
+# Top features per scaled row, rounded to EXPLAIN_CACHE_QUANTUM (in
+# scaler units, i.e. fractions of the training IQR); 0 bytes disables it
+EXPLAIN_CACHE_MAX_BYTES = int(os.environ.get("EXPLAIN_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+EXPLAIN_CACHE_QUANTUM = float(os.environ.get("EXPLAIN_CACHE_QUANTUM", "0.01"))
+explain_cache = ExplanationCache(EXPLAIN_CACHE_MAX_BYTES, EXPLAIN_CACHE_QUANTUM) \
+    if EXPLAIN_CACHE_MAX_BYTES > 0 else None
 
 # ======================================================
 # NORMALIZATION MAPS (CRITICAL)
 # ======================================================
-WATERING_FREQ_MAP = {
-    "1/day": 7, "2/day": 14, "3/day": 21,
-    "every 2 days": 3.5,
-    "2/week": 2, "3/week": 3,
-    "4/week": 4, "5/week": 5,
-    "daily": 7
-}
-
-MONTH_MAP = {
-    "january": 1, "february": 2, "march": 3, "april": 4,
-    "may": 5, "june": 6, "july": 7, "august": 8,
-    "september": 9, "october": 10, "november": 11, "december": 12
-}
-
-SOIL_MAP = {
-    "loam": "loam",
-    "sandy loam": "sandy_loam",
-    "laterite": "laterite_soils",
-    "laterite soil": "laterite_soils",
-    "laterite soils": "laterite_soils"
-}
-
-DISTRICT_MAP = {
-    "matara": "Matara",
-    "hambantota": "Hambantota",
-    "galle": "Galle"
-}
-
-WATERING_METHOD_MAP = {
-    "drip": "Drip",
-    "manual": "Manual",
-    "sprinkler": "Sprinkler"
-}
+# Defined once in papaya_features and shared with train.py and
+# backend/ml_service, so training and serving cannot drift apart.
+gazetteer.add_aliases(DISTRICT_MAP)
 
 # ======================================================
 # HELPERS
 # ======================================================
-def parse_month(value):
-    if isinstance(value, str):
-        key = value.strip().lower()
-        if key in MONTH_MAP:
-            return MONTH_MAP[key]
-        raise ValueError("Invalid plant_month string")
-    value = int(value)
-    if not 1 <= value <= 12:
-        raise ValueError("plant_month must be 1–12")
-    return value
-
 def remaining_days(total_days, plant_month):
     """
     Calculate remaining days until harvest based on planting month.
@@ -110,63 +156,45 @@ def remaining_days(total_days, plant_month):
     
     return remaining, passed
 
-def build_features(data, weather):
-    f = {}
+# One spec compiled against this model's columns; fails at startup if
+# the model expects a feature the spec cannot produce.
+feature_layout = FEATURES.compile(feature_names)
 
-    f["watering_freq_num"] = WATERING_FREQ_MAP.get(
-        str(data["watering_frequency"]).lower(), 7
-    )
+def predict_targets(X_scaled):
+    """
+    (n_rows, 2) array of [yield_per_tree, harvest_days] predictions.
+    """
+    if forest_engine is not None and len(X_scaled) <= FOREST_ENGINE_MAX_ROWS:
+        return forest_engine.predict(X_scaled)
+    if joint_model is not None:
+        return joint_model.predict(X_scaled)
+    return np.column_stack([model.predict(X_scaled) for model in models])
 
-    f["plant_month_num"] = parse_month(data["plant_month"])
-    f["trees_count"] = int(data["trees_count"])
-    f["avg_temp"] = float(weather["avg_temp"])
-    f["total_rain"] = float(weather["total_rain"])
-    f["rainy_days"] = int(weather["rainy_days"])
-
-    f["rain_intensity"] = f["total_rain"] / (f["rainy_days"] + 1)
-    f["temp_stress"] = abs(f["avg_temp"] - 28)
-    f["rain_per_tree"] = f["total_rain"] / (f["trees_count"] + 1)
-    f["is_monsoon"] = int(f["plant_month_num"] in [5,6,7,8,9])
-    f["is_dry"] = int(f["plant_month_num"] in [1,2,3,12])
-    f["temp_rain_synergy"] = np.log1p(f["avg_temp"]) * np.log1p(f["total_rain"])
-
-    df = pd.DataFrame([f])
-
-    # ---- SAFE ONE-HOT ENCODING ----
-    soil = SOIL_MAP.get(str(data["soil_type"]).lower().strip())
-    district = DISTRICT_MAP.get(str(data["district"]).lower().strip())
-    method = WATERING_METHOD_MAP.get(str(data["watering_method"]).lower().strip())
-
-    if soil:
-        col = f"soil_type_{soil}"
-        if col in feature_names:
-            df[col] = 1
-
-    if district:
-        col = f"district_{district}"
-        if col in feature_names:
-            df[col] = 1
-
-    if method:
-        col = f"watering_method_{method}"
-        if col in feature_names:
-            df[col] = 1
-
-    for col in feature_names:
-        if col not in df:
-            df[col] = 0
-
-    return df[feature_names]
-
-def shap_top_features(explainer, X_scaled):
-    sv = explainer(X_scaled)
-    vals = sv.values[0]
+def rank_top_features(vals, k=3):
     ranked = sorted(
         zip(feature_names, vals),
         key=lambda x: abs(x[1]),
         reverse=True
     )
-    return [(r[0].replace("_", " "), r[1]) for r in ranked[:3]]
+    return [(r[0].replace("_", " "), r[1]) for r in ranked[:k]]
+
+def top_features_per_row(X_scaled):
+    yield_vals, harvest_vals = explainer.explain(X_scaled)
+    return [
+        (rank_top_features(y), rank_top_features(h))
+        for y, h in zip(yield_vals, harvest_vals)
+    ]
+
+def explain_top_features(X_scaled):
+    """
+    Top-3 (feature, impact) pairs per row for both models. Rows already
+    in the explanation cache skip the explainer.
+    """
+    if explain_cache is None:
+        rows = top_features_per_row(X_scaled)
+    else:
+        rows = explain_cache.get_or_compute(X_scaled, top_features_per_row)
+    return [r[0] for r in rows], [r[1] for r in rows]
 
 def get_month_name(month_num):
     months = ["January", "February", "March", "April", "May", "June",
@@ -296,61 +324,124 @@ def build_farmer_explanation(
 
     return explanation
 
+# Seconds to wait for live weather before answering from the
+# climatology table. The live fetch keeps running and fills the cache.
+WEATHER_HEDGE_DEADLINE = float(os.environ.get("WEATHER_HEDGE_DEADLINE", "2.5"))
+
+weather_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="weather-hedge")
+
+DEFAULT_WEATHER = {
+    "avg_temp": 27.0,
+    "total_rain": 150.0,
+    "rainy_days": 12
+}
+
+def live_weather(district, plant_month):
+    # With the prefetcher on, requests only read the cache
+    weather = get_weather_features(district, plant_month, allow_fetch=not WEATHER_PREFETCH)
+    return {
+        "avg_temp": float(weather["avg_temp"]),
+        "total_rain": float(weather["total_rain"]),
+        "rainy_days": int(weather["rainy_days"])
+    }
+
+# Refresh every district x month once a day in the background so the
+# request path never waits on Open-Meteo (see weather_prefetch.py).
+WEATHER_PREFETCH = os.environ.get("WEATHER_PREFETCH", "0") == "1"
+weather_prefetcher = WeatherPrefetcher(sorted(set(DISTRICT_MAP.values())))
+if WEATHER_PREFETCH:
+    weather_prefetcher.start()
+
+def fallback_weather(district, plant_month, reason):
+    WEATHER_FALLBACKS.inc(reason=reason)
+    weather = climatology.features(district, plant_month)
+    if weather is not None:
+        return weather, "climatology"
+    # Use default weather values for Sri Lankan papaya growing regions
+    print(f"Using default weather values: {DEFAULT_WEATHER}")
+    return dict(DEFAULT_WEATHER), "default"
+
+def load_weather_many(keys):
+    """
+    Hedged weather lookup for several (district, plant_month) pairs.
+    Returns {key: (weather, source)} where source is "live",
+    "climatology" or "default". Anything not back from the live path
+    within WEATHER_HEDGE_DEADLINE is answered from climatology.
+    """
+    jobs = {key: weather_hedge_pool.submit(live_weather, *key) for key in keys}
+    _, pending = wait(jobs.values(), timeout=WEATHER_HEDGE_DEADLINE)
+    # Drop lookups that have not started, so a big or slow batch does
+    # not leave a backlog in the shared pool for later requests
+    for job in pending:
+        job.cancel()
+
+    results = {}
+    for key, job in jobs.items():
+        if not job.done() or job.cancelled():
+            print(f"Live weather for {key[0]} not ready after {WEATHER_HEDGE_DEADLINE}s, using climatology")
+            results[key] = fallback_weather(*key, reason="deadline")
+            continue
+        try:
+            results[key] = (job.result(), "live")
+        except Exception as weather_error:
+            print(f"Weather data error: {str(weather_error)}")
+            results[key] = fallback_weather(*key, reason=type(weather_error).__name__)
+    return results
+
+def load_weather(district, plant_month):
+    return load_weather_many([(district, plant_month)])[(district, plant_month)]
+
 # ======================================================
 # API ENDPOINT
 # ======================================================
+REQUIRED_FIELDS = [
+    "district", "soil_type", "watering_method",
+    "watering_frequency", "trees_count", "plant_month"
+]
+
+MAX_BATCH_SIZE = 1000
+
+WHATIF_AXES = ["trees_count", "watering_method", "watering_frequency"]
+
 @app.route("/growth_predict", methods=["POST"])
 def predict():
+    timer = StageTimer("growth_predict")
     try:
-        data = request.get_json()
-        
-        print(f"Received request data: {data}")  # Debug logging
+        with timer.stage("validate"):
+            data = request.get_json()
 
-        required = [
-            "district", "soil_type", "watering_method",
-            "watering_frequency", "trees_count", "plant_month"
-        ]
-        for r in required:
-            if r not in data:
-                return jsonify({"error": f"Missing field: {r}"}), 400
+            for r in REQUIRED_FIELDS:
+                if r not in data:
+                    return jsonify({"error": f"Missing field: {r}"}), 400
 
-        plant_month = parse_month(data["plant_month"])
+            plant_month = parse_month(data["plant_month"])
 
-        try:
-            weather = get_weather_features(data["district"], plant_month)
-            weather = {
-                "avg_temp": float(weather["avg_temp"]),
-                "total_rain": float(weather["total_rain"]),
-                "rainy_days": int(weather["rainy_days"])
-            }
-        except Exception as weather_error:
-            print(f"Weather data error: {str(weather_error)}")
-            # Use default weather values for Sri Lankan papaya growing regions
-            weather = {
-                "avg_temp": 27.0,
-                "total_rain": 150.0,
-                "rainy_days": 12
-            }
-            print(f"Using default weather values: {weather}")
+        with timer.stage("weather"):
+            weather, weather_source = load_weather(data["district"], plant_month)
 
-        X = build_features(data, weather)
-        X_scaled = scaler.transform(X)
+        with timer.stage("build_features"):
+            X = feature_layout.row(data, weather)[None, :]
 
-        yield_pred = float(yield_model.predict(X_scaled)[0])
-        harvest_total = float(harvest_model.predict(X_scaled)[0])
+        with timer.stage("scale"):
+            X_scaled = scaler.transform(X)
+
+        with timer.stage("predict"):
+            yield_pred, harvest_total = (float(v) for v in predict_targets(X_scaled)[0])
 
         remaining, passed = remaining_days(harvest_total, plant_month)
         total_yield = yield_pred * int(data["trees_count"])
 
-        # Get SHAP explanations
-        yield_factors = shap_top_features(shap_yield, X_scaled)
-        harvest_factors = shap_top_features(shap_harvest, X_scaled)
+        # Get feature contributions (SHAP values)
+        with timer.stage("explain"):
+            yield_factors, harvest_factors = explain_top_features(X_scaled)
+            yield_factors, harvest_factors = yield_factors[0], harvest_factors[0]
 
         # Build dynamic farmer explanation
-        farmer_explanation = build_farmer_explanation(
-            yield_pred, harvest_total, weather, plant_month,
-            yield_factors, harvest_factors
-        )
+        with timer.stage("explanation_text"):
+            farmer_explanation = build_farmer_explanation(
+                yield_pred, harvest_total, weather, plant_month,
+                yield_factors, harvest_factors
+            )
         
         result = {
             "farmer_explanation": farmer_explanation,
@@ -359,17 +450,28 @@ def predict():
                 "harvest_days_total": int(harvest_total),
                 "harvest_days_remaining": remaining,
                 "days_since_planting": passed
-            }
+            },
+            "weather_source": weather_source,
+            "approximate": weather_source != "live"
         }
-        
-        print(f"Sending response: {result}")
-        print(f"Debug - Total: {int(harvest_total)}, Passed: {passed}, Remaining: {remaining}")
+
+        log_event(
+            "growth_predict",
+            request=data,
+            weather=weather,
+            predictions=result["predictions"],
+            stages_ms=timer.as_ms()
+        )
 
         return jsonify(result)
 
     except Exception as e:
         error_trace = traceback.format_exc()
-        print(f"Prediction error: {str(e)}")
+        log_event(
+            "growth_predict_error", force=True,
+            error=str(e), request=request.get_json(silent=True),
+            stages_ms=timer.as_ms()
+        )
         print(f"Full traceback:\n{error_trace}")
         return jsonify({
             "error": str(e),
@@ -377,6 +479,315 @@ def predict():
             "details": error_trace if app.debug else None
         }), 500
 
+@app.route("/growth_predict_batch", methods=["POST"])
+def predict_batch():
+    """
+    Score many farms in one request.
+    Body: {"farms": [<growth_predict payload>, ...], "explain": false}
+    Rows that fail validation get an "error" entry; the rest are
+    scaled and predicted together as one matrix.
+    """
+    try:
+        data = request.get_json() or {}
+        farms = data.get("farms")
+
+        if not isinstance(farms, list) or len(farms) == 0:
+            return jsonify({"error": "farms must be a non-empty list"}), 400
+        if len(farms) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large (max {MAX_BATCH_SIZE} farms)"}), 400
+
+        explain = bool(data.get("explain", False))
+        results = [None] * len(farms)
+
+        # ---- PER-ROW VALIDATION ----
+        valid_idx, valid_rows, months = [], [], []
+        for i, farm in enumerate(farms):
+            try:
+                if not isinstance(farm, dict):
+                    raise ValueError("Farm entry must be an object")
+                for r in REQUIRED_FIELDS:
+                    if r not in farm:
+                        raise ValueError(f"Missing field: {r}")
+                plant_month = parse_month(farm["plant_month"])
+                if int(farm["trees_count"]) < 0:
+                    raise ValueError("trees_count must be non-negative")
+            except Exception as e:
+                results[i] = {"index": i, "error": str(e)}
+                continue
+            valid_idx.append(i)
+            valid_rows.append(farm)
+            months.append(plant_month)
+
+        if valid_rows:
+            # ---- ONE WEATHER LOOKUP PER (district, month) ----
+            keys = [
+                (str(farm["district"]).lower().strip(), plant_month)
+                for farm, plant_month in zip(valid_rows, months)
+            ]
+            weather_by_key = load_weather_many(dict.fromkeys(keys))
+            weathers = [weather_by_key[key][0] for key in keys]
+            weather_sources = [weather_by_key[key][1] for key in keys]
+
+            X = feature_layout.batch(valid_rows, weathers)
+            X_scaled = scaler.transform(X)
+
+            preds = predict_targets(X_scaled)
+            yield_preds, harvest_preds = preds[:, 0], preds[:, 1]
+
+            if explain:
+                yield_factors, harvest_factors = explain_top_features(X_scaled)
+
+            for j, i in enumerate(valid_idx):
+                yield_pred = float(yield_preds[j])
+                harvest_total = float(harvest_preds[j])
+                remaining, passed = remaining_days(harvest_total, months[j])
+
+                row = {
+                    "index": i,
+                    "predictions": {
+                        "yield_per_tree": round(yield_pred, 2),
+                        "total_yield": round(yield_pred * int(valid_rows[j]["trees_count"]), 2),
+                        "harvest_days_total": int(harvest_total),
+                        "harvest_days_remaining": remaining,
+                        "days_since_planting": passed
+                    },
+                    "weather_source": weather_sources[j],
+                    "approximate": weather_sources[j] != "live"
+                }
+                if explain:
+                    row["farmer_explanation"] = build_farmer_explanation(
+                        yield_pred, harvest_total, weathers[j], months[j],
+                        yield_factors[j], harvest_factors[j]
+                    )
+                results[i] = row
+
+        failed = sum(1 for r in results if "error" in r)
+        log_event("growth_predict_batch", farms=len(farms), failed=failed)
+
+        return jsonify({
+            "results": results,
+            "count": len(farms),
+            "failed": failed
+        })
+
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Batch prediction error: {str(e)}")
+        print(f"Full traceback:\n{error_trace}")
+        return jsonify({
+            "error": str(e),
+            "message": "Unable to generate batch prediction.",
+            "details": error_trace if app.debug else None
+        }), 500
+
+@app.route("/growth_whatif", methods=["POST"])
+def predict_whatif():
+    """
+    Sweep scenarios for one farm.
+    Body: {"base": <growth_predict payload>,
+           "grid": {"trees_count": [...], "watering_method": [...],
+                    "watering_frequency": [...]}}
+    Grid keys that are left out keep the base value. Weather is
+    fetched once and every scenario is predicted in one batch.
+    """
+    try:
+        data = request.get_json() or {}
+        base = data.get("base")
+        grid = data.get("grid") or {}
+
+        if not isinstance(base, dict):
+            return jsonify({"error": "base must be an object"}), 400
+        for r in REQUIRED_FIELDS:
+            if r not in base:
+                return jsonify({"error": f"Missing field: {r}"}), 400
+
+        axes = {}
+        for key in WHATIF_AXES:
+            values = grid.get(key, [base[key]])
+            if not isinstance(values, list) or len(values) == 0:
+                return jsonify({"error": f"grid.{key} must be a non-empty list"}), 400
+            axes[key] = values
+
+        try:
+            axes["trees_count"] = [int(v) for v in axes["trees_count"]]
+        except (TypeError, ValueError):
+            return jsonify({"error": "grid.trees_count must contain integers"}), 400
+        if any(v < 0 for v in axes["trees_count"]):
+            return jsonify({"error": "trees_count must be non-negative"}), 400
+
+        unknown = [v for v in axes["watering_method"]
+                   if str(v).lower().strip() not in WATERING_METHOD_MAP]
+        if unknown:
+            return jsonify({"error": f"Unknown watering_method: {unknown[0]}"}), 400
+
+        unknown = [v for v in axes["watering_frequency"]
+                   if not known_watering_frequency(v)]
+        if unknown:
+            return jsonify({"error": f"Unknown watering_frequency: {unknown[0]}"}), 400
+
+        n_scenarios = 1
+        for values in axes.values():
+            n_scenarios *= len(values)
+        if n_scenarios > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Grid too large ({n_scenarios} scenarios, max {MAX_BATCH_SIZE})"}), 400
+
+        plant_month = parse_month(base["plant_month"])
+        weather, weather_source = load_weather(base["district"], plant_month)
+
+        rows = [
+            dict(base, trees_count=trees, watering_method=method, watering_frequency=freq)
+            for method, freq, trees in itertools.product(
+                axes["watering_method"], axes["watering_frequency"], axes["trees_count"]
+            )
+        ]
+
+        X_scaled = scaler.transform(feature_layout.batch(rows, [weather] * len(rows)))
+        preds = predict_targets(X_scaled)
+
+        scenarios = []
+        curves = []
+        for k, (method, freq) in enumerate(
+            itertools.product(axes["watering_method"], axes["watering_frequency"])
+        ):
+            block = preds[k * len(axes["trees_count"]):(k + 1) * len(axes["trees_count"])]
+            curve = {
+                "watering_method": method,
+                "watering_frequency": freq,
+                "trees_count": axes["trees_count"],
+                "yield_per_tree": [],
+                "total_yield": [],
+                "harvest_days_total": []
+            }
+            for trees, (yield_pred, harvest_total) in zip(axes["trees_count"], block):
+                yield_pred, harvest_total = float(yield_pred), float(harvest_total)
+                total_yield = round(yield_pred * trees, 2)
+                curve["yield_per_tree"].append(round(yield_pred, 2))
+                curve["total_yield"].append(total_yield)
+                curve["harvest_days_total"].append(int(harvest_total))
+                scenarios.append({
+                    "trees_count": trees,
+                    "watering_method": method,
+                    "watering_frequency": freq,
+                    "yield_per_tree": round(yield_pred, 2),
+                    "total_yield": total_yield,
+                    "harvest_days_total": int(harvest_total)
+                })
+            curves.append(curve)
+
+        return jsonify({
+            "weather": weather,
+            "weather_source": weather_source,
+            "approximate": weather_source != "live",
+            "scenario_count": len(scenarios),
+            "curves": curves,
+            "scenarios": scenarios,
+            "best_total_yield": max(scenarios, key=lambda sc: sc["total_yield"]),
+            "best_yield_per_tree": max(scenarios, key=lambda sc: sc["yield_per_tree"])
+        })
+
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"What-if error: {str(e)}")
+        print(f"Full traceback:\n{error_trace}")
+        return jsonify({
+            "error": str(e),
+            "message": "Unable to run what-if sweep. Please check your input data.",
+            "details": error_trace if app.debug else None
+        }), 500
+
+# ======================================================
+# METRICS
+# ======================================================
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = getattr(g, "request_started", None)
+    if started is not None and request.endpoint != "metrics":
+        route = request.url_rule.rule.strip("/") if request.url_rule else "unmatched"
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route=route)
+        REQUESTS_TOTAL.inc(route=route, status=response.status_code)
+    return response
+
+def collect_weather_cache_stats():
+    stats = weather_cache.stats()
+    WEATHER_CACHE_EVENTS.set(stats["hits"], result="hit")
+    WEATHER_CACHE_EVENTS.set(stats["misses"], result="miss")
+    WEATHER_CACHE_ENTRIES.set(stats["entries"])
+
+    for call, counts in weather_client.stats().items():
+        WEATHER_CLIENT_RETRIES.set(counts.get("retries", 0), call=call)
+        WEATHER_CLIENT_REJECTED.set(counts.get("rejected", 0), call=call)
+        WEATHER_BREAKER_OPEN.set(int(counts["breaker"]["state"] != "closed"), call=call)
+
+WEATHER_CACHE_EVENTS = metrics_registry.gauge(
+    "weather_cache_lookups", "Weather cache lookups since creation (all workers)", ["result"])
+WEATHER_CACHE_ENTRIES = metrics_registry.gauge(
+    "weather_cache_entries", "Unexpired weather cache entries")
+WEATHER_CLIENT_RETRIES = metrics_registry.gauge(
+    "weather_client_retries", "Upstream retries since start", ["call"])
+WEATHER_CLIENT_REJECTED = metrics_registry.gauge(
+    "weather_client_rejected", "Calls refused by an open circuit breaker since start", ["call"])
+WEATHER_BREAKER_OPEN = metrics_registry.gauge(
+    "weather_breaker_open", "1 while the upstream circuit breaker is open or half-open", ["call"])
+metrics_registry.add_collector(collect_weather_cache_stats)
+
+def collect_explain_cache_stats():
+    stats = explain_cache.stats()
+    EXPLAIN_CACHE_EVENTS.set(stats["hits"], result="hit")
+    EXPLAIN_CACHE_EVENTS.set(stats["misses"], result="miss")
+    EXPLAIN_CACHE_EVICTIONS.set(stats["evictions"])
+    EXPLAIN_CACHE_ENTRIES.set(stats["entries"])
+    EXPLAIN_CACHE_BYTES.set(stats["bytes"])
+
+if explain_cache is not None:
+    EXPLAIN_CACHE_EVENTS = metrics_registry.gauge(
+        "explain_cache_lookups", "Explanation cache row lookups since start", ["result"])
+    EXPLAIN_CACHE_EVICTIONS = metrics_registry.gauge(
+        "explain_cache_evictions", "Explanations evicted to stay under the memory cap since start")
+    EXPLAIN_CACHE_ENTRIES = metrics_registry.gauge(
+        "explain_cache_entries", "Cached explanations")
+    EXPLAIN_CACHE_BYTES = metrics_registry.gauge(
+        "explain_cache_bytes", "Estimated size of the cached explanations")
+    metrics_registry.add_collector(collect_explain_cache_stats)
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/model_info", methods=["GET"])
+def get_model_info():
+    info = dict(model_info)
+    if model_bundle is not None:
+        # Bundle artifacts are materialized lazily; report current state
+        info.update(model_bundle.stats())
+    info["explain_backend"] = explainer.name
+    info["explain_cache"] = explain_cache.stats() if explain_cache is not None else None
+    info["forest_engine"] = forest_engine is not None
+    info["rss_bytes"] = rss_bytes()
+    return jsonify(info)
+
+@app.route("/weather_prefetch_status", methods=["GET"])
+def weather_prefetch_status():
+    try:
+        status = weather_prefetcher.status()
+        status["enabled"] = WEATHER_PREFETCH
+        return jsonify(status)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/weather_cache_stats", methods=["GET"])
+def weather_cache_stats():
+    try:
+        stats = weather_cache.stats()
+        stats["daily_store"] = weather_store.stats()
+        stats["client"] = weather_client.stats()
+        return jsonify(stats)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # ======================================================
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5000)
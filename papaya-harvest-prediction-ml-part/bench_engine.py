@@ -0,0 +1,78 @@
+"""
+Check ForestEngine against XGBoost and compare inference latency.
+
+    python bench_engine.py [--rows 2000] [--repeat 200]
+
+Fails loudly if any engine prediction differs from XGBRegressor.predict
+in a single bit.
+"""
+import argparse
+import pickle
+import time
+import warnings
+
+import numpy as np
+
+warnings.filterwarnings("ignore")
+
+from forest_engine import ForestEngine  # noqa: E402
+
+def load(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def per_call_ms(fn, repeat):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    yield_model = load("models/yield_model.pkl")
+    harvest_model = load("models/harvest_model.pkl")
+    n_features = yield_model.get_booster().num_features()
+
+    start = time.perf_counter()
+    engine = ForestEngine.from_models(yield_model, harvest_model)
+    print(f"Engine build: {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"({len(engine.roots)} trees, {len(engine.value)} nodes, depth {engine.max_depth})")
+
+    # Scaled features are roughly centred; widen the spread to reach
+    # every branch and sprinkle NaNs to cover default directions.
+    rng = np.random.default_rng(42)
+    X = rng.normal(scale=2.0, size=(args.rows, n_features))
+    X[rng.random(X.shape) < 0.02] = np.nan
+
+    expected = np.column_stack([yield_model.predict(X), harvest_model.predict(X)])
+    got = engine.predict(X)
+    mismatches = int((expected.view(np.uint32) != got.view(np.uint32)).sum())
+    print(f"Bit-exact check on {args.rows} rows: {mismatches} mismatches")
+    if mismatches:
+        raise SystemExit("ForestEngine output differs from XGBoost")
+
+    boosters = [yield_model.get_booster(), harvest_model.get_booster()]
+    for b in boosters:
+        b.set_param({"nthread": 1})
+
+    for n in (1, 32, 512):
+        Xn = X[:n]
+        print(f"\nRows per call: {n}")
+        results = {
+            "XGBRegressor.predict x2": per_call_ms(
+                lambda: (yield_model.predict(Xn), harvest_model.predict(Xn)), args.repeat),
+            "inplace_predict x2 (1 thread)": per_call_ms(
+                lambda: [b.inplace_predict(Xn) for b in boosters], args.repeat),
+            "ForestEngine (both targets)": per_call_ms(
+                lambda: engine.predict(Xn), args.repeat),
+        }
+        for name, ms in results.items():
+            print(f"  {name:<31}: {ms:8.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare the native (pred_contribs) and SHAP explanation backends.
+
+    python bench_explain.py [--rows 200] [--repeat 3]
+
+Reports per-row latency for each backend and how often the top-3
+features used in the farmer explanation agree.
+"""
+import argparse
+import random
+import time
+import warnings
+
+import numpy as np
+
+warnings.filterwarnings("ignore")
+
+import app  # noqa: E402  (loads models and feature_names)
+from explain import ShapTreeExplainer, load_explainer  # noqa: E402
+
+def sample_farms(n, seed=42):
+    rng = random.Random(seed)
+    rows, weathers = [], []
+    for _ in range(n):
+        rows.append({
+            "district": rng.choice(list(app.DISTRICT_MAP.values())),
+            "soil_type": rng.choice(list(app.SOIL_MAP.keys())),
+            "watering_method": rng.choice(list(app.WATERING_METHOD_MAP.keys())),
+            "watering_frequency": rng.choice(list(app.WATERING_FREQ_MAP.keys())),
+            "trees_count": rng.randint(20, 400),
+            "plant_month": rng.randint(1, 12)
+        })
+        weathers.append({
+            "avg_temp": rng.uniform(24, 35),
+            "total_rain": rng.uniform(600, 1600),
+            "rainy_days": rng.randint(50, 140)
+        })
+    return rows, weathers
+
+def time_single_rows(backend, X_scaled, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(len(X_scaled)):
+            backend.explain(X_scaled[i:i + 1])
+        best = min(best, time.perf_counter() - start)
+    return best / len(X_scaled) * 1000
+
+def top_names(values):
+    return [name for name, _ in app.rank_top_features(values)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows, weathers = sample_farms(args.rows)
+    X_scaled = app.scaler.transform(app.feature_layout.batch(rows, weathers))
+
+    native = load_explainer("native", *app.models)
+    shap_backend = ShapTreeExplainer()
+
+    print(f"Rows: {args.rows}")
+    print("\nLatency per row (both models)")
+    for backend in (native, shap_backend):
+        ms = time_single_rows(backend, X_scaled, args.repeat)
+        print(f"  {backend.name:<7}: {ms:8.3f} ms")
+
+    native_vals = native.explain(X_scaled)
+    shap_vals = shap_backend.explain(X_scaled)
+
+    print("\nTop-3 agreement (native vs shap)")
+    for target, a, b in zip(("yield", "harvest"), native_vals, shap_vals):
+        same_set = same_order = 0
+        for va, vb in zip(a, b):
+            ta, tb = top_names(va), top_names(vb)
+            same_set += set(ta) == set(tb)
+            same_order += ta == tb
+        corr = np.mean([
+            np.corrcoef(va, vb)[0, 1] for va, vb in zip(a, b)
+            if np.std(va) > 0 and np.std(vb) > 0
+        ])
+        print(f"  {target:<8}: same set {same_set / len(a):6.1%} | "
+              f"same order {same_order / len(a):6.1%} | "
+              f"mean corr {corr:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Separate yield/harvest models vs one joint booster, side by side.
+
+    python bench_joint.py [--repeat 100] [--trees 900]
+
+Trains the current pair and both joint layouts (train.py --joint
+one_output_per_tree / multi_output_tree) on the same split as train.py,
+then reports per-target test accuracy, training time, model size and
+serving latency: XGBoost predict, ForestEngine predict and the
+explanation backend the service would use, at 1, 32 and 512 rows.
+Nothing is written to models/.
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+warnings.filterwarnings("ignore")
+
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score  # noqa: E402
+from sklearn.model_selection import train_test_split  # noqa: E402
+from sklearn.preprocessing import RobustScaler  # noqa: E402
+
+from explain import load_explainer  # noqa: E402
+from forest_engine import ForestEngine  # noqa: E402
+from train import JOINT_STRATEGIES, RANDOM_STATE, build_xgb, load_dataset  # noqa: E402
+
+def per_call_ms(fn, repeat):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def fit_layout(layout, X_train, Y_train, trees):
+    start = time.perf_counter()
+    if layout == "pair":
+        models = [build_xgb().set_params(n_estimators=trees).fit(X_train, Y_train[:, t]) for t in (0, 1)]
+    else:
+        models = [build_xgb().set_params(n_estimators=trees, multi_strategy=layout).fit(X_train, Y_train)]
+    return models, time.perf_counter() - start
+
+def predict(models, X):
+    if len(models) == 1:
+        return models[0].predict(X)
+    return np.column_stack([m.predict(X) for m in models])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--trees", type=int, default=900, help="n_estimators for every layout")
+    args = parser.parse_args()
+
+    X, y_yield, y_harvest = load_dataset()
+    X_train, X_test, Y_train, Y_test = train_test_split(
+        X, np.column_stack([y_yield, y_harvest]),
+        test_size=0.2,
+        random_state=RANDOM_STATE
+    )
+    scaler = RobustScaler()
+    X_train = scaler.fit_transform(X_train)
+    X_test = scaler.transform(X_test)
+
+    results = {}
+    for layout in ("pair",) + JOINT_STRATEGIES:
+        print(f"\nTraining {layout}...")
+        models, fit_s = fit_layout(layout, X_train, Y_train, args.trees)
+        engine = ForestEngine.from_models(*models)
+        explainer = load_explainer("native", *models)
+
+        pred = predict(models, X_test)
+        exact = np.array_equal(engine.predict(X_test), pred)
+        accuracy = {
+            target: (
+                np.sqrt(mean_squared_error(Y_test[:, t], pred[:, t])),
+                mean_absolute_error(Y_test[:, t], pred[:, t]),
+                r2_score(Y_test[:, t], pred[:, t])
+            )
+            for t, target in enumerate(("yield", "harvest"))
+        }
+
+        latency = {}
+        for n in (1, 32, 512):
+            Xn = X_test[:n]
+            latency[n] = (
+                per_call_ms(lambda: predict(models, Xn), args.repeat),
+                per_call_ms(lambda: engine.predict(Xn), args.repeat),
+                per_call_ms(lambda: explainer.explain(Xn), max(1, args.repeat // 10))
+            )
+
+        results[layout] = {
+            "fit_s": fit_s,
+            "trees": len(engine.roots),
+            "nodes": len(engine.value),
+            "bytes": sum(len(m.get_booster().save_raw("ubj")) for m in models),
+            "explain": explainer.name,
+            "exact": exact,
+            "accuracy": accuracy,
+            "latency": latency
+        }
+
+    print(f"\nTest rows: {len(X_test)}")
+    print(f"\n{'layout':<21}{'fit s':>8}{'trees':>7}{'nodes':>8}{'KiB':>8}  explain  engine exact")
+    for layout, r in results.items():
+        print(f"{layout:<21}{r['fit_s']:>8.1f}{r['trees']:>7}{r['nodes']:>8}"
+              f"{r['bytes'] / 1024:>8.0f}  {r['explain']:<7}  {r['exact']}")
+
+    print("\nTest accuracy (RMSE / MAE / R²)")
+    for layout, r in results.items():
+        cells = "   ".join(
+            f"{target} {rmse:.3f} / {mae:.3f} / {r2:+.3f}"
+            for target, (rmse, mae, r2) in r["accuracy"].items()
+        )
+        print(f"  {layout:<21}{cells}")
+
+    print("\nLatency per call, ms (XGBoost predict | ForestEngine | explain)")
+    for n in (1, 32, 512):
+        print(f"  rows {n}")
+        for layout, r in results.items():
+            xgb_ms, engine_ms, explain_ms = r["latency"][n]
+            print(f"    {layout:<21}{xgb_ms:>9.3f}{engine_ms:>11.3f}{explain_ms:>11.3f}")
+
+    if not all(r["exact"] for r in results.values()):
+        raise SystemExit("ForestEngine output differs from XGBoost")
+
+if __name__ == "__main__":
+    main()
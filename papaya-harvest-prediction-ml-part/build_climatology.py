@@ -0,0 +1,118 @@
+"""
+Build district_climatology.json: per-district, per-planting-month
+normals of the three weather features the models use (avg_temp,
+total_rain and rainy_days over the 250-day crop window).
+
+    python build_climatology.py                      # Open-Meteo archive, last 5 full years
+    python build_climatology.py --years 10
+    python build_climatology.py --source dataset     # offline, from papaya_dataset.csv
+
+The archive source fetches each district's daily history once and
+averages the crop window starting on the 1st of every month across the
+years. The dataset source averages the weather columns of the training
+data, which is what the models were fitted on.
+"""
+import argparse
+import json
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from climatology import CLIMATOLOGY_PATH, SUPPORTED_DISTRICTS, WINDOW_DAYS
+
+MONTHS = ["January", "February", "March", "April", "May", "June",
+          "July", "August", "September", "October", "November", "December"]
+
+def window_features(df):
+    return {
+        "avg_temp": round(float(df["temp"].mean()), 2),
+        "total_rain": round(float(df["precip"].sum()), 2),
+        "rainy_days": round(float((df["precip"] > 1).sum()), 1)
+    }
+
+def from_archive(districts, years):
+    from weather_pipeline import fetch_past_weather, geocode_district
+
+    last_year = date.today().year - 1
+    first_year = last_year - years + 1
+    # Windows starting late in the last year run into this year
+    end = min(date(last_year, 12, 1) + timedelta(days=WINDOW_DAYS), date.today() - timedelta(days=7))
+
+    table = {}
+    for district in districts:
+        lat, lon = geocode_district(district)
+        print(f"Fetching {district} ({lat:.3f}, {lon:.3f}) {first_year}..{end}")
+        daily = fetch_past_weather(lat, lon, datetime(first_year, 1, 1), datetime.combine(end, datetime.min.time()))
+        if len(daily) == 0:
+            raise SystemExit(f"No archive data for {district}")
+        daily = daily.set_index("date").sort_index()
+
+        table[district] = {}
+        for month in range(1, 13):
+            per_year = []
+            for year in range(first_year, last_year + 1):
+                start = pd.Timestamp(year, month, 1)
+                window = daily.loc[start:start + pd.Timedelta(days=WINDOW_DAYS - 1)]
+                # Skip windows the archive does not fully cover yet
+                if len(window) >= WINDOW_DAYS * 0.95:
+                    per_year.append(window_features(window))
+            if not per_year:
+                continue
+            table[district][str(month)] = {
+                key: round(sum(f[key] for f in per_year) / len(per_year), 2)
+                for key in ("avg_temp", "total_rain", "rainy_days")
+            }
+            table[district][str(month)]["samples"] = len(per_year)
+
+    return table, {"source": "open-meteo archive", "years": [first_year, last_year]}
+
+def from_dataset(path):
+    df = pd.read_csv(path).dropna()
+    df["month"] = df["plant_month"].map({m: i + 1 for i, m in enumerate(MONTHS)})
+
+    grouped = df.groupby(["district", "month"]).agg(
+        avg_temp=("avg_temp", "mean"),
+        total_rain=("total_rain", "mean"),
+        rainy_days=("rainy_days", "mean"),
+        samples=("avg_temp", "size")
+    )
+
+    table = {}
+    for (district, month), row in grouped.iterrows():
+        table.setdefault(district, {})[str(int(month))] = {
+            "avg_temp": round(float(row["avg_temp"]), 2),
+            "total_rain": round(float(row["total_rain"]), 2),
+            "rainy_days": round(float(row["rainy_days"]), 2),
+            "samples": int(row["samples"])
+        }
+    return table, {"source": f"dataset:{path}"}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", choices=["archive", "dataset"], default="archive")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--dataset", default="papaya_dataset.csv")
+    parser.add_argument("--districts", nargs="*", default=SUPPORTED_DISTRICTS)
+    parser.add_argument("--out", default=CLIMATOLOGY_PATH)
+    args = parser.parse_args()
+
+    if args.source == "archive":
+        table, info = from_archive(args.districts, args.years)
+    else:
+        table, info = from_dataset(args.dataset)
+
+    out = {
+        "version": 1,
+        "generated": datetime.utcnow().strftime("%Y-%m-%d"),
+        "window_days": WINDOW_DAYS,
+        **info,
+        "districts": table
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+        f.write("\n")
+
+    print(f"Wrote {args.out}: {len(table)} districts")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Parity checks for the shared feature spec (papaya_features).
+
+    python check_features.py [--rows 5000]
+
+1. Training: FEATURES.fit + frame on papaya_dataset.csv reproduces the
+   hand-written pandas pipeline train.py used before the spec (map,
+   get_dummies(drop_first=True)) exactly, column names included.
+2. Serving: for random farm payloads in every accepted spelling
+   (missing and mixed-type watering frequencies included), row() and
+   batch() are bit-identical to frame() over the same raw records,
+   before and after scaling, and no encoded value is NaN.
+3. Models: the spec compiles against the feature_names of the harvest
+   service and of backend/ml_service.
+
+Exits non-zero on the first mismatch.
+"""
+import argparse
+import itertools
+import os
+import pickle
+import random
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+warnings.filterwarnings("ignore")
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from papaya_features import (  # noqa: E402
+    DISTRICT_MAP, FEATURES, SOIL_MAP, WATERING_FREQ_MAP, WATERING_METHOD_MAP
+)
+
+BACKEND_MODELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend", "ml_service", "models")
+
+# ======================================================
+# REFERENCE: train.py FEATURE ENGINEERING BEFORE THE SPEC
+# ======================================================
+def legacy_training_frame(df):
+    df = df.copy()
+    watering_map = {
+        "1/day": 7, "2/day": 14, "3/day": 21, "every 2 days": 3.5,
+        "2/week": 2, "3/week": 3, "4/week": 4, "5/week": 5, "daily": 7
+    }
+    month_map = {
+        "January": 1, "February": 2, "March": 3, "April": 4,
+        "May": 5, "June": 6, "July": 7, "August": 8,
+        "September": 9, "October": 10, "November": 11, "December": 12
+    }
+    df["watering_freq_num"] = df["watering_frequency"].map(watering_map)
+    df["plant_month_num"] = df["plant_month"].map(month_map)
+    df["watering_freq_num"] = df["watering_freq_num"].fillna(df["watering_freq_num"].median())
+    df["plant_month_num"] = df["plant_month_num"].fillna(df["plant_month_num"].median())
+
+    df["rain_intensity"] = df["total_rain"] / (df["rainy_days"] + 1)
+    df["temp_stress"] = np.abs(df["avg_temp"] - 28)
+    df["rain_per_tree"] = df["total_rain"] / (df["trees_count"] + 1)
+    df["is_monsoon"] = df["plant_month_num"].isin([5, 6, 7, 8, 9]).astype(int)
+    df["is_dry"] = df["plant_month_num"].isin([1, 2, 3, 12]).astype(int)
+    df["temp_rain_synergy"] = np.log1p(df["avg_temp"]) * np.log1p(df["total_rain"])
+
+    df = pd.get_dummies(df, columns=["district", "soil_type", "watering_method"], drop_first=True)
+    return df.drop(columns=[
+        "watering_frequency", "plant_month", "plant_date", "yield_per_tree", "harvest_days"
+    ])
+
+def check_training(path="papaya_dataset.csv"):
+    df = pd.read_csv(path).dropna().reset_index(drop=True)
+    reference = legacy_training_frame(df)
+
+    start = time.perf_counter()
+    feature_names = FEATURES.fit(df)
+    X = FEATURES.compile(feature_names).frame(df)
+    frame_ms = (time.perf_counter() - start) * 1000
+
+    if feature_names != reference.columns.tolist():
+        raise SystemExit(f"Training columns differ:\n  spec:   {feature_names}\n"
+                         f"  pandas: {reference.columns.tolist()}")
+    expected = reference.to_numpy(dtype=np.float64)
+    bad = np.flatnonzero((X != expected).any(axis=1))
+    if len(bad):
+        i = bad[0]
+        raise SystemExit(f"Training row {i} differs:\n  spec:   {X[i]}\n  pandas: {expected[i]}")
+
+    print(f"OK training: {len(df)} rows, {len(feature_names)} columns identical to the pandas pipeline "
+          f"({frame_ms:.1f} ms)")
+    return feature_names
+
+# ======================================================
+# SERVING
+# ======================================================
+def sample_inputs(n, seed=7):
+    rng = random.Random(seed)
+
+    # Every spelling the maps know plus a few they don't
+    districts = list(DISTRICT_MAP.keys()) + list(DISTRICT_MAP.values()) + [" MATARA ", "Kandy"]
+    soils = list(SOIL_MAP.keys()) + ["Sandy Loam", "clay"]
+    methods = list(WATERING_METHOD_MAP.keys()) + ["Drip", "flood"]
+    # Missing and mixed-type frequencies too: the frame column then holds
+    # None/NaN next to strings and numbers, and must encode like row()
+    freqs = list(WATERING_FREQ_MAP.keys()) + ["DAILY", "weekly", 2, 3.5, 7, "3", np.int64(3), None, float("nan")]
+    months = list(range(1, 13)) + ["march", "December"]
+
+    combos = list(itertools.product(districts, soils, methods, freqs, months))
+    combos = rng.sample(combos, min(n, len(combos)))
+
+    cases = []
+    for district, soil, method, freq, month in combos:
+        cases.append((
+            {
+                "district": district, "soil_type": soil,
+                "watering_method": method, "watering_frequency": freq,
+                "trees_count": rng.randint(0, 500), "plant_month": month
+            },
+            {
+                "avg_temp": rng.uniform(20, 36),
+                "total_rain": rng.uniform(0, 2000),
+                "rainy_days": rng.randint(0, 160)
+            }
+        ))
+    return cases
+
+def check_serving(feature_names, scaler, n):
+    features = FEATURES.compile(feature_names)
+    cases = sample_inputs(n)
+    rows = [c[0] for c in cases]
+    weathers = [c[1] for c in cases]
+
+    # Training path over the same raw records
+    records = pd.DataFrame.from_records([dict(d, **w) for d, w in cases], columns=features.fields)
+    reference = features.frame(records)
+
+    start = time.perf_counter()
+    single = np.vstack([features.row(d, w).copy() for d, w in cases])
+    row_ms = (time.perf_counter() - start) / len(cases) * 1000
+
+    start = time.perf_counter()
+    batch = features.batch(rows, weathers)
+    batch_ms = (time.perf_counter() - start) / len(cases) * 1000
+
+    if np.isnan(reference).any():
+        i = int(np.flatnonzero(np.isnan(reference).any(axis=1))[0])
+        raise SystemExit(f"frame produced NaN for {cases[i][0]}:\n  {reference[i]}")
+
+    for name, got in (("row", single), ("batch", batch)):
+        for stage, a, b in (("raw", got, reference),
+                            ("scaled", scaler.transform(got), scaler.transform(reference))):
+            bad = np.flatnonzero((a != b).any(axis=1))
+            if len(bad):
+                i = bad[0]
+                raise SystemExit(
+                    f"{name} ({stage}) mismatch on {cases[i][0]}:\n"
+                    f"  frame: {b[i]}\n  {name}:  {a[i]}"
+                )
+
+    print(f"OK serving: {len(cases)} payloads identical via row, batch and frame (raw and scaled)")
+    print(f"  row   : {row_ms:.4f} ms/row")
+    print(f"  batch : {batch_ms:.4f} ms/row")
+
+def load(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    trained = check_training()
+
+    served = load("models/feature_names.pkl")
+    if served != trained:
+        raise SystemExit(f"models/feature_names.pkl does not match the spec on the dataset:\n"
+                         f"  model: {served}\n  spec:  {trained}")
+    check_serving(served, load("models/scaler.pkl"), args.rows)
+
+    backend = os.path.join(BACKEND_MODELS, "feature_names.pkl")
+    if os.path.exists(backend):
+        FEATURES.compile(load(backend))
+        print("OK backend/ml_service model: spec produces every feature")
+
+if __name__ == "__main__":
+    main()
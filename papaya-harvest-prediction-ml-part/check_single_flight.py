@@ -0,0 +1,97 @@
+"""
+Coalescing check for the weather pipeline (no network).
+
+    python check_single_flight.py [--requests 32] [--latency 0.5]
+
+N threads ask get_weather_features for the same district and planting
+month at once, with the cache empty and the archive/forecast downloads
+replaced by slow counting fakes. They must make exactly one archive
+call and one forecast call, all get the same features, and finish in
+about one download's time even with N larger than the fetch pool.
+
+Exits non-zero on a mismatch.
+"""
+import argparse
+import sys
+import threading
+import time
+from datetime import datetime
+
+import weather_pipeline
+from papaya_weather import MemoryCache
+from weather_store import empty_totals
+
+def counting(name, calls, latency, result):
+    def fake(*args):
+        with calls["lock"]:
+            calls[name] += 1
+        time.sleep(latency)
+        return result
+    return fake
+
+def totals(days, temp, rain, rainy_days):
+    return dict(empty_totals(), days=days, temp_days=days, temp_sum=temp * days,
+                rain=rain, rainy_days=rainy_days)
+
+def planting_month():
+    # Started before today and still growing: needs archive and forecast
+    today = datetime.utcnow()
+    return today.month if today.day > 1 else (today.month - 2) % 12 + 1
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--district", default="Matara")
+    args = parser.parse_args()
+
+    calls = {"archive": 0, "forecast": 0, "lock": threading.Lock()}
+    weather_pipeline.weather_cache = MemoryCache()
+    archive = counting("archive", calls, args.latency, totals(30, 27.0, 120.0, 12))
+    weather_pipeline.fetch_past_totals = weather_pipeline.fetch_past_weather = archive
+    weather_pipeline.fetch_forecast_weather = counting("forecast", calls, args.latency, totals(220, 27.5, 900.0, 80))
+
+    month = planting_month()
+    start = threading.Barrier(args.requests)
+    results, errors = [], []
+
+    def request():
+        start.wait()
+        try:
+            results.append(weather_pipeline.get_weather_features(args.district, month))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request) for _ in range(args.requests)]
+    began = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - began
+
+    print(f"{args.requests} concurrent requests ({args.district}, month {month}): "
+          f"{calls['archive']} archive, {calls['forecast']} forecast calls in {elapsed:.2f}s")
+    print(f"flight stats: {weather_pipeline.flight.stats()}")
+
+    failed = []
+    if errors:
+        failed.append(f"{len(errors)} requests failed, e.g. {errors[0]!r}")
+    if calls["archive"] != 1 or calls["forecast"] != 1:
+        failed.append("expected exactly one archive and one forecast call")
+    if len({repr(r) for r in results}) > 1:
+        failed.append("requests got different features")
+    if weather_pipeline.flight.in_flight():
+        failed.append("calls left in flight")
+    # Archive and forecast run in parallel; waiters must not queue behind the pool
+    if elapsed > 3 * args.latency:
+        failed.append(f"took {elapsed:.2f}s for one {args.latency}s download")
+
+    for message in failed:
+        print("FAIL:", message)
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import difflib
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from papaya_weather import normalize_name
+
+# ======================================================
+# DISTRICT CLIMATOLOGY NORMALS
+# ======================================================
+# Per-district, per-planting-month averages of the model's weather
+# features, built offline by build_climatology.py. Used when live
+# weather is slow or unavailable.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CLIMATOLOGY_PATH = os.path.join(BASE_DIR, "district_climatology.json")
+
+WINDOW_DAYS = 250  # same crop window as weather_pipeline
+
+# Districts present in the training data
+SUPPORTED_DISTRICTS = ["Matara", "Hambantota", "Galle"]
+
+class Climatology:
+    def __init__(self, path=CLIMATOLOGY_PATH):
+        self.path = path
+        self.meta = {}
+        self._table = {}
+
+        if not os.path.exists(path):
+            print(f"No climatology table at {path}; fallback will use defaults")
+            return
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.meta = {k: v for k, v in data.items() if k != "districts"}
+        self._table = {
+            normalize_name(district): {int(m): v for m, v in months.items()}
+            for district, months in data["districts"].items()
+        }
+
+    def __bool__(self):
+        return bool(self._table)
+
+    def _district_months(self, district):
+        key = normalize_name(district)
+        if key in self._table:
+            return self._table[key]
+        match = difflib.get_close_matches(key, self._table.keys(), n=1, cutoff=0.85)
+        return self._table[match[0]] if match else None
+
+    def features(self, district, planted_month):
+        """
+        {"avg_temp", "total_rain", "rainy_days"} for the district and
+        month. Unknown districts get the mean over all districts for
+        that month; returns None when the table has no such month.
+        """
+        planted_month = int(planted_month)
+        months = self._district_months(district)
+
+        if months and planted_month in months:
+            rows = [months[planted_month]]
+        else:
+            rows = [m[planted_month] for m in self._table.values() if planted_month in m]
+        if not rows:
+            return None
+
+        return {
+            "avg_temp": round(sum(r["avg_temp"] for r in rows) / len(rows), 2),
+            "total_rain": round(sum(r["total_rain"] for r in rows) / len(rows), 2),
+            "rainy_days": int(round(sum(r["rainy_days"] for r in rows) / len(rows)))
+        }
+
+climatology = Climatology()
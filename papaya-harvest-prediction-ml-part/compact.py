@@ -0,0 +1,346 @@
+"""
+Model compaction for the harvest models (used by train.py --compact).
+
+    python train.py --compact [--tolerance 0.01] [--promote]
+
+Each model in --models-dir (the pair, or a joint model) is replaced by
+the smallest candidate whose validation MAE is within `tolerance`
+(relative) of the original for every target it predicts:
+
+- truncated: the first k boosting rounds of the original (exact same
+  trees, k scanned in steps of TRUNCATE_STEP);
+- distilled: a shallower student (depth 2-4) fitted on the original's
+  predictions for the training rows outside the validation slice, tree
+  count by early stopping against the teacher on a slice of those rows.
+
+Validation rows are a --val-size slice of train.py's training split.
+The original models have seen them, which favours the original, so the
+comparison errs towards keeping it. The test split is only reported,
+with a warning when the result does worse there than the mean baseline.
+
+"Smallest" is the native (UBJ) size, which tracks node count and so
+prediction and explanation cost. The original is always a candidate,
+so the step never makes a model worse than the tolerance allows. A
+mean-of-training-targets baseline is scored as well: a candidate whose
+validation MAE is not at least BASELINE_MARGIN below it has collapsed
+towards a constant and is never chosen, and if the chosen model (the
+original included) does not beat it --promote is refused.
+
+The result is written to models/compact/ (bundle, pickles, shap
+explainers and compact_report.json). Serve it with
+MODEL_VARIANT=compact, or --promote to replace models/.
+"""
+import json
+import os
+import pickle
+import time
+from datetime import datetime
+
+import numpy as np
+import shap
+import xgboost
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
+from xgboost import XGBRegressor
+
+from forest_engine import ForestEngine
+from incremental import TARGET_COLUMN, TARGETS, as_regressor, load_current, predict, training_params
+from model_bundle import write_bundle
+
+TRUNCATE_STEP = 10
+STUDENT_DEPTHS = (2, 3, 4)
+STUDENT_LEARNING_RATE = 0.1
+STUDENT_MAX_TREES = 600
+STUDENT_EARLY_STOP = 30
+BASELINE_MARGIN = 0.02
+
+# ======================================================
+# MEASURES
+# ======================================================
+def model_bytes(model):
+    return len(model.get_booster().save_raw("ubj"))
+
+def model_nodes(model):
+    trees = json.loads(model.get_booster().save_raw("json"))["learner"]["gradient_booster"]["model"]["trees"]
+    return sum(int(t["tree_param"]["num_nodes"]) for t in trees)
+
+def targets_of(name):
+    return [TARGET_COLUMN[name]] if name in TARGET_COLUMN else list(range(len(TARGETS)))
+
+def as_matrix(pred):
+    return pred.reshape(len(pred), -1)
+
+def scores(pred, Y, columns):
+    """
+    {target: {"r2", "mae"}} for the target columns a model predicts.
+    """
+    pred = as_matrix(pred)
+    return {
+        TARGETS[t]: {
+            "r2": round(float(r2_score(Y[:, t], pred[:, i])), 4),
+            "mae": round(float(mean_absolute_error(Y[:, t], pred[:, i])), 4)
+        }
+        for i, t in enumerate(columns)
+    }
+
+def within(candidate, reference, tolerance):
+    return all(candidate[t]["mae"] <= reference[t]["mae"] * (1 + tolerance) for t in reference)
+
+def beats(candidate, baseline):
+    return all(candidate[t]["mae"] < baseline[t]["mae"] * (1 - BASELINE_MARGIN) for t in candidate)
+
+def per_call_ms(fn, repeat):
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+# ======================================================
+# CANDIDATES
+# ======================================================
+def truncated(model, params, X_val, Y_val, columns, reference, baseline, tolerance):
+    """
+    Smallest prefix of the boosting rounds within tolerance on the
+    validation rows (and better than the baseline), or None.
+    """
+    booster = model.get_booster()
+    rounds = booster.num_boosted_rounds()
+    for k in range(TRUNCATE_STEP, rounds, TRUNCATE_STEP):
+        pred = scores(booster.inplace_predict(X_val, iteration_range=(0, k)), Y_val, columns)
+        if within(pred, reference, tolerance) and beats(pred, baseline):
+            return as_regressor(booster[:k], params), k
+    return None, rounds
+
+def distilled(model, params, X_train, depth, seed):
+    """
+    A depth-`depth` student fitted to the teacher's training-row predictions.
+    """
+    soft = model.predict(X_train)
+    X_fit, X_val, y_fit, y_val = train_test_split(X_train, soft, test_size=0.2, random_state=seed)
+    student_params = dict(
+        params,
+        max_depth=depth,
+        learning_rate=STUDENT_LEARNING_RATE,
+        # Teacher labels are noise-free; no row or column sampling needed
+        subsample=1.0,
+        colsample_bytree=1.0,
+        gamma=0.0
+    )
+    student = XGBRegressor(
+        **student_params,
+        n_estimators=STUDENT_MAX_TREES,
+        early_stopping_rounds=STUDENT_EARLY_STOP
+    )
+    student.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+
+    # Keep the best round only, and drop early stopping from the saved model
+    best = student.best_iteration + 1
+    return as_regressor(student.get_booster()[:best], student_params), student_params
+
+def describe(kind, model, val, test, X_test):
+    """
+    val/test: (X, Y, columns) to score on.
+    """
+    return {
+        "kind": kind,
+        "trees": int(model.get_booster().num_boosted_rounds()),
+        "nodes": model_nodes(model),
+        "bytes": model_bytes(model),
+        "pickle_bytes": len(pickle.dumps(model)),
+        "batch_ms": round(per_call_ms(lambda: model.predict(X_test), 5), 3),
+        "val": scores(model.predict(val[0]), val[1], val[2]),
+        "test": scores(model.predict(test[0]), test[1], test[2])
+    }
+
+def compact_model(name, model, params, X_fit, X_val, Y_val, X_test, Y_test, baseline, tolerance, seed):
+    """
+    (chosen model, its params, report) for one model. Candidates are
+    accepted on the validation rows; test scores are only reported.
+    baseline: {"val", "test"} scores of the mean prediction.
+    """
+    columns = targets_of(name)
+    val, test = (X_val, Y_val, columns), (X_test, Y_test, columns)
+    baseline = {part: {TARGETS[t]: baseline[part][TARGETS[t]] for t in columns} for part in ("val", "test")}
+    reference = scores(model.predict(X_val), Y_val, columns)
+    candidates = [(describe("original", model, val, test, X_test), model, params)]
+
+    short, k = truncated(model, params, X_val, Y_val, columns, reference, baseline["val"], tolerance)
+    if short is not None:
+        candidates.append((describe(f"truncated:{k}", short, val, test, X_test), short, params))
+
+    for depth in STUDENT_DEPTHS:
+        student, student_params = distilled(model, params, X_fit, depth, seed)
+        candidates.append((describe(f"distilled:depth{depth}", student, val, test, X_test),
+                           student, student_params))
+
+    for i, (info, _, _) in enumerate(candidates):
+        info["beats_baseline"] = beats(info["val"], baseline["val"])
+        # The original stays eligible so there is always a choice
+        info["accepted"] = i == 0 or (within(info["val"], reference, tolerance) and info["beats_baseline"])
+        note = "" if info["accepted"] else (
+            "  (near the mean baseline)" if not info["beats_baseline"] else "  (over tolerance)")
+        print(f"  {name:<13} {info['kind']:<20} {info['trees']:>4} trees {info['nodes']:>7} nodes "
+              f"{info['bytes'] / 1024:>8.0f} KB  val " + "  ".join(
+                  f"{t} R² {s['r2']:.3f} MAE {s['mae']:.3f}" for t, s in info["val"].items()
+              ) + note)
+    print(f"  {name:<13} {'mean baseline':<20} {'':>31}  val " + "  ".join(
+        f"{t} R² {s['r2']:.3f} MAE {s['mae']:.3f}" for t, s in baseline["val"].items()))
+
+    info, chosen, chosen_params = min(
+        (c for c in candidates if c[0]["accepted"]), key=lambda c: c[0]["bytes"]
+    )
+    original = candidates[0][0]
+    report = {
+        "chosen": info["kind"],
+        "beats_baseline": info["beats_baseline"],
+        "baseline": baseline,
+        "candidates": [c[0] for c in candidates],
+        "bytes_before": original["bytes"],
+        "bytes_after": info["bytes"],
+        "nodes_before": original["nodes"],
+        "nodes_after": info["nodes"],
+        "delta": {
+            part: {
+                t: {k: round(info[part][t][k] - original[part][t][k], 4) for k in ("r2", "mae")}
+                for t in reference
+            }
+            for part in ("val", "test")
+        }
+    }
+    return chosen, chosen_params, report
+
+# ======================================================
+# RUN
+# ======================================================
+def run(train, holdout, models_dir="models", tolerance=0.01, promote=False, seed=42, val_size=0.15):
+    """
+    train: (unscaled feature frame, (n, 2) targets) of train.py's
+    training split; val_size of it selects the candidates and students
+    learn from the teacher on the rest.
+    holdout: (unscaled feature frame, (n, 2) targets) of its test split,
+    only reported.
+    Returns the report dict.
+    """
+    current = load_current(models_dir)
+    models, scaler, feature_names = current["models"], current["scaler"], current["feature_names"]
+    params = current["metadata"].get("params") or {}
+
+    X_train = scaler.transform(train[0][feature_names].to_numpy(dtype=np.float64))
+    X_fit, X_val, Y_fit, Y_val = train_test_split(
+        X_train, np.asarray(train[1], dtype=np.float64), test_size=val_size, random_state=seed
+    )
+    X_test = scaler.transform(holdout[0][feature_names].to_numpy(dtype=np.float64))
+    Y_test = np.asarray(holdout[1], dtype=np.float64)
+
+    # Trivial model: the training mean of each target
+    mean = Y_fit.mean(axis=0)
+    baseline = {
+        "val": scores(np.tile(mean, (len(X_val), 1)), Y_val, range(len(TARGETS))),
+        "test": scores(np.tile(mean, (len(X_test), 1)), Y_test, range(len(TARGETS)))
+    }
+
+    print(f"Compacting {', '.join(models)} from {current['source']} "
+          f"(validation MAE tolerance {tolerance:.1%}, {len(X_val)} validation rows)...")
+    compacted, compacted_params, per_model = {}, {}, {}
+    for name, model in models.items():
+        model_params = params.get(name) or training_params(model)
+        compacted[name], compacted_params[name], per_model[name] = compact_model(
+            name, model, model_params, X_fit, X_val, Y_val, X_test, Y_test, baseline, tolerance, seed
+        )
+    weak = [name for name, r in per_model.items() if not r["beats_baseline"]]
+
+    # Serving latency of the whole variant: ForestEngine single rows
+    # (small requests) and XGBoost batches
+    row = X_test[:1]
+    latency = {}
+    for variant, variant_models in (("original", models), ("compact", compacted)):
+        engine = ForestEngine.from_models(*variant_models.values())
+        latency[variant] = {
+            "engine_row_ms": round(per_call_ms(lambda: engine.predict(row), 200), 4),
+            "batch_ms": round(per_call_ms(lambda: predict(variant_models, X_test), 5), 3)
+        }
+
+    before = scores(predict(models, X_test), Y_test, range(len(TARGETS)))
+    after = scores(predict(compacted, X_test), Y_test, range(len(TARGETS)))
+    report = {
+        "created": datetime.utcnow().isoformat() + "Z",
+        "source": current["source"],
+        "tolerance": tolerance,
+        "selected_on": "validation",
+        "val_rows": len(X_val),
+        "test_rows": len(X_test),
+        "models": per_model,
+        "baseline": baseline,
+        "below_baseline": weak,
+        "below_baseline_on_test": [
+            name for name in compacted
+            if not beats(scores(compacted[name].predict(X_test), Y_test, targets_of(name)), baseline["test"])
+        ],
+        "test_before": before,
+        "test_after": after,
+        "latency": latency,
+    }
+
+    print("\nCompaction summary")
+    for name, r in per_model.items():
+        print(f"  {name:<13} {r['chosen']:<20} {r['bytes_before'] / 1024:.0f} KB -> "
+              f"{r['bytes_after'] / 1024:.0f} KB, {r['nodes_before']} -> {r['nodes_after']} nodes")
+    for t in TARGETS:
+        print(f"  {t:<15} test R² {before[t]['r2']:.4f} -> {after[t]['r2']:.4f}  "
+              f"MAE {before[t]['mae']:.4f} -> {after[t]['mae']:.4f}  "
+              f"(mean baseline MAE {baseline['test'][t]['mae']:.4f})")
+    for key, label in (("engine_row_ms", "1-row engine"), ("batch_ms", f"{len(X_test)}-row batch")):
+        print(f"  {label:<15} {latency['original'][key]:.3f} ms -> {latency['compact'][key]:.3f} ms")
+
+    # ======================================================
+    # SAVE
+    # ======================================================
+    metadata = dict(
+        {k: v for k, v in current["metadata"].items() if k not in ("params", "n_estimators")},
+        xgboost_version=xgboost.__version__,
+        params=compacted_params,
+        n_estimators={name: int(m.get_booster().num_boosted_rounds()) for name, m in compacted.items()},
+        compaction={name: {k: r[k] for k in ("chosen", "bytes_before", "bytes_after", "delta")}
+                    for name, r in per_model.items()}
+    )
+    if report["below_baseline_on_test"]:
+        print(f"\nWARNING: {', '.join(report['below_baseline_on_test'])} not clearly better than "
+              f"predicting the training mean on the test split (reported only)")
+    if weak:
+        print(f"\nWARNING: {', '.join(weak)} not clearly better than predicting the training mean "
+              f"on the validation rows")
+        if promote:
+            print("Not promoting; the compact models are only written to the compact directory")
+            promote = False
+    out_dir = os.path.join(models_dir, "compact")
+    for directory in [out_dir] + ([models_dir] if promote else []):
+        save(directory, compacted, scaler, feature_names, metadata, X_train, seed)
+    with open(os.path.join(out_dir, "compact_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nWrote {out_dir}/")
+    if promote:
+        print(f"Promoted the compact models to {models_dir}/ (restart the service to load them)")
+    else:
+        print("Serve it with MODEL_VARIANT=compact")
+    return report
+
+def save(directory, models, scaler, feature_names, metadata, X_train, seed):
+    os.makedirs(directory, exist_ok=True)
+    for name, model in models.items():
+        with open(os.path.join(directory, f"{name}.pkl"), "wb") as f:
+            pickle.dump(model, f)
+    with open(os.path.join(directory, "scaler.pkl"), "wb") as f:
+        pickle.dump(scaler, f)
+    with open(os.path.join(directory, "feature_names.pkl"), "wb") as f:
+        pickle.dump(feature_names, f)
+    # After the pickles, so the bundle records their digests
+    write_bundle(os.path.join(directory, "harvest_bundle.bin"), models, scaler, feature_names, metadata)
+
+    # EXPLAIN_BACKEND=shap reads these next to the models
+    if "joint_model" not in models:
+        background = shap.sample(X_train, 200, random_state=seed)
+        for name, target in (("yield_model", "yield"), ("harvest_model", "harvest")):
+            with open(os.path.join(directory, f"shap_{target}.pkl"), "wb") as f:
+                pickle.dump(shap.TreeExplainer(models[name], background), f)
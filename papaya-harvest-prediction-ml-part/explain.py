@@ -0,0 +1,218 @@
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import xgboost as xgb
+
+from forest_engine import ForestEngine, has_vector_leaves
+
+# ======================================================
+# EXPLANATION BACKENDS
+# ======================================================
+# Every backend exposes explain(X_scaled) -> (yield_values, harvest_values),
+# each an (n_rows, n_features) array of per-feature contributions.
+
+EXPLAIN_BACKENDS = ("native", "shap", "path")
+
+class NativeContribExplainer:
+    """
+    Contributions straight from the boosters (XGBoost pred_contribs,
+    path-dependent TreeSHAP). All models share one DMatrix; a joint
+    one_output_per_tree model yields one block per target.
+    """
+
+    name = "native"
+
+    def __init__(self, *models, nthread=1):
+        self.boosters = [model.get_booster() for model in models]
+        self.nthread = nthread
+
+    def explain(self, X_scaled):
+        dmat = xgb.DMatrix(np.asarray(X_scaled), nthread=self.nthread)
+        values = []
+        for booster in self.boosters:
+            contribs = booster.predict(dmat, pred_contribs=True)
+            # (n, F+1) for one target, (n, T, F+1) for several;
+            # the last column is the bias term
+            if contribs.ndim == 2:
+                values.append(contribs[:, :-1])
+            else:
+                values.extend(contribs[:, t, :-1] for t in range(contribs.shape[1]))
+        return tuple(values)
+
+class PathContribExplainer:
+    """
+    Path attribution from the array engine, for joint models with
+    vector leaves (multi_output_tree), where XGBoost has no
+    pred_contribs. Per-feature values are Saabas contributions, not
+    TreeSHAP: they add up to the prediction but credit features by
+    their order on the path.
+    """
+
+    name = "path"
+
+    def __init__(self, *models):
+        self.engine = ForestEngine.from_models(*models)
+
+    def explain(self, X_scaled):
+        contribs = self.engine.path_contributions(X_scaled)
+        return tuple(contribs[:, t, :-1] for t in range(contribs.shape[1]))
+
+class ShapTreeExplainer:
+    """
+    The pickled interventional shap.TreeExplainer objects from train.py.
+    """
+
+    name = "shap"
+
+    def __init__(self, models_dir="models"):
+        import shap  # noqa: F401  (needed to unpickle the explainers)
+
+        with open(os.path.join(models_dir, "shap_yield.pkl"), "rb") as f:
+            self.shap_yield = pickle.load(f)
+
+        with open(os.path.join(models_dir, "shap_harvest.pkl"), "rb") as f:
+            self.shap_harvest = pickle.load(f)
+
+    def explain(self, X_scaled):
+        return (
+            self.shap_yield(X_scaled).values,
+            self.shap_harvest(X_scaled).values
+        )
+
+def load_explainer(backend, *models, models_dir="models"):
+    """
+    models: (yield_model, harvest_model) or a single joint model.
+    """
+    backend = str(backend).lower().strip()
+    if backend not in EXPLAIN_BACKENDS:
+        raise ValueError(f"Unknown explanation backend: {backend} (use one of {EXPLAIN_BACKENDS})")
+
+    joint = len(models) == 1
+    if backend == "shap" and joint:
+        print("shap explainers are only trained for separate models; using native contributions")
+        backend = "native"
+    if backend == "native" and any(has_vector_leaves(m) for m in models):
+        print("multi_output_tree model has no native contributions; using path attribution")
+        backend = "path"
+
+    if backend == "native":
+        return NativeContribExplainer(*models)
+    if backend == "path":
+        return PathContribExplainer(*models)
+    return ShapTreeExplainer(models_dir)
+
+# ======================================================
+# EXPLANATION CACHE
+# ======================================================
+# Per-entry bookkeeping on top of key and value (OrderedDict node, tuple)
+ENTRY_OVERHEAD_BYTES = 200
+
+def _sizeof(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(_sizeof(v) for v in value)
+    return size
+
+class ExplanationCache:
+    """
+    Bounded LRU of per-row explanations, keyed by the scaled feature
+    row rounded to multiples of `quantum`. Rows that round to the same
+    key share one explanation, so repeated and near-identical requests
+    skip the explainer. Entries are evicted least recently used first
+    once their estimated size passes max_bytes.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, quantum=0.01):
+        self.max_bytes = max_bytes
+        self.quantum = quantum
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def key(self, row):
+        """
+        Cache key of a scaled row, or None for a row with NaN/inf (no
+        meaningful rounding; such rows are never cached or shared).
+        """
+        row = np.asarray(row, dtype=np.float64)
+        if not np.isfinite(row).all():
+            return None
+        return np.round(row / self.quantum).astype(np.int64).tobytes()
+
+    def get_or_compute(self, X_scaled, compute):
+        """
+        Per-row values for X_scaled in order. compute(rows) gets only
+        the rows whose key is not cached (each key once, non-finite rows
+        each on their own) and must return one value per row.
+        """
+        keys = [self.key(row) for row in X_scaled]
+        values = [None] * len(keys)
+        missing = OrderedDict()
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key is None:
+                    missing[("uncached", i)] = [i]
+                    continue
+                entry = self._data.get(key)
+                if entry is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._data.move_to_end(key)
+                    values[i] = entry[0]
+            self._hits += len(keys) - len(missing)
+            self._misses += len(missing)
+
+        if missing:
+            first = [rows[0] for rows in missing.values()]
+            computed = compute(np.asarray(X_scaled)[first])
+            for (key, rows), value in zip(missing.items(), computed):
+                for i in rows:
+                    values[i] = value
+                if isinstance(key, bytes):
+                    self.put(key, value)
+        return values
+
+    def put(self, key, value):
+        size = len(key) + _sizeof(value) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self._hits, self._misses
+            stats = {
+                "hits": hits,
+                "misses": misses,
+                "evictions": self._evictions,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+            }
+        total = hits + misses
+        stats.update(
+            hit_rate=round(hits / total, 4) if total else 0.0,
+            max_bytes=self.max_bytes,
+            quantum=self.quantum
+        )
+        return stats
@@ -0,0 +1,257 @@
+import json
+
+import numpy as np
+
+# ======================================================
+# ARRAY-BASED FOREST EVALUATOR
+# ======================================================
+# Flattens one or more XGBoost gbtree boosters into contiguous node
+# arrays and walks every tree of every target together, one level per
+# step. Matches Booster.predict bit for bit: features and thresholds are
+# float32, NaN follows default_left, and leaf values are accumulated in
+# float32 in tree order starting from base_score, as XGBoost does.
+#
+# Multi-target boosters are supported in both layouts: one tree per
+# target per round (multi_strategy="one_output_per_tree", scalar leaves
+# assigned to targets by tree_info) and shared trees with vector leaves
+# (multi_strategy="multi_output_tree").
+
+def _parse_base_scores(value, num_target):
+    # "3.5E1" on older models, "[3.5E1]" or "[3.5E1,1.2E0]" on XGBoost >= 3
+    scores = [float(v) for v in str(value).strip("[]").split(",")]
+    if len(scores) == 1:
+        scores *= num_target
+    return scores
+
+def _booster_json(model):
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    return json.loads(booster.save_raw("json"))
+
+def has_vector_leaves(model):
+    """
+    True for shared-tree multi-output models (no native pred_contribs).
+    """
+    trees = _booster_json(model)["learner"]["gradient_booster"]["model"]["trees"]
+    return any(int(t["tree_param"].get("size_leaf_vector", "1")) > 1 for t in trees)
+
+class ForestEngine:
+    """
+    Evaluate several regressors (single- or multi-target) in one
+    traversal loop. Targets are numbered across models in order.
+
+        engine = ForestEngine.from_models(yield_model, harvest_model)
+        engine = ForestEngine.from_models(joint_model)
+        preds = engine.predict(X_scaled)   # (n_rows, 2) float32
+    """
+
+    def __init__(self, boosters_json):
+        feature, threshold, left, right, default_left = [], [], [], [], []
+        leaf_value, node_value = [], []
+        roots, tree_outputs, base_scores = [], [], []
+        offset = 0
+        max_depth = 0
+        num_feature = None
+
+        for model_json in boosters_json:
+            learner = model_json["learner"]
+            if learner["gradient_booster"]["name"] != "gbtree":
+                raise ValueError("Only gbtree boosters are supported")
+
+            params = learner["learner_model_param"]
+            num_target = int(params.get("num_target", "1"))
+            if num_feature is None:
+                num_feature = int(params["num_feature"])
+            elif int(params["num_feature"]) != num_feature:
+                raise ValueError("All boosters must use the same features")
+
+            target_offset = len(base_scores)
+            base_scores.extend(_parse_base_scores(params["base_score"], num_target))
+
+            model = learner["gradient_booster"]["model"]
+            trees = model["trees"]
+            tree_info = model.get("tree_info") or [0] * len(trees)
+
+            for tree, group in zip(trees, tree_info):
+                if any(tree["split_type"]):
+                    raise ValueError("Categorical splits are not supported")
+
+                lc = np.asarray(tree["left_children"], dtype=np.int64)
+                rc = np.asarray(tree["right_children"], dtype=np.int64)
+                nodes = np.arange(len(lc), dtype=np.int64)
+                is_leaf = lc == -1
+                size = max(1, int(tree["tree_param"].get("size_leaf_vector", "1")))
+
+                if size > 1:
+                    # Vector leaves: base_weights holds one row per node
+                    weights = np.asarray(tree["base_weights"], dtype=np.float32).reshape(len(lc), size)
+                    values = np.where(is_leaf[:, None], weights, 0.0)
+                    tree_outputs.append([target_offset + c for c in range(size)])
+                else:
+                    values = np.where(is_leaf, tree["split_conditions"], 0.0)[:, None]
+                    tree_outputs.append([target_offset + int(group)])
+
+                # Leaves point at themselves so every row can take the
+                # same number of steps regardless of where it stops.
+                feature.append(np.where(is_leaf, 0, tree["split_indices"]))
+                threshold.append(tree["split_conditions"])
+                left.append(np.where(is_leaf, nodes, lc) + offset)
+                right.append(np.where(is_leaf, nodes, rc) + offset)
+                default_left.append(tree["default_left"])
+                leaf_value.append(values.astype(np.float32))
+                node_value.append(self._expected_values(lc, rc, values, tree["sum_hessian"]))
+
+                roots.append(offset)
+                max_depth = max(max_depth, self._depth(lc, rc))
+                offset += len(lc)
+
+        self.num_feature = num_feature
+        self.num_targets = len(base_scores)
+        self.max_depth = max_depth
+        self.width = max(len(outputs) for outputs in tree_outputs)
+        self.feature = np.concatenate(feature).astype(np.int64)
+        self.threshold = np.concatenate(threshold).astype(np.float32)
+        self.left = np.concatenate(left).astype(np.int64)
+        self.right = np.concatenate(right).astype(np.int64)
+        self.default_left = np.concatenate(default_left).astype(bool)
+        self.value = self._pad(leaf_value, np.float32)
+        self.node_value = self._pad(node_value, np.float64)
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.base_scores = np.asarray(base_scores, dtype=np.float32)
+
+        # (tree, leaf column) pairs feeding each target, in tree order
+        self.tree_target = np.full((len(roots), self.width), -1, dtype=np.int64)
+        for i, outputs in enumerate(tree_outputs):
+            self.tree_target[i, :len(outputs)] = outputs
+        self._target_terms = [
+            np.nonzero(self.tree_target == t) for t in range(self.num_targets)
+        ]
+
+    def _pad(self, blocks, dtype):
+        out = np.zeros((sum(len(b) for b in blocks), self.width), dtype=dtype)
+        row = 0
+        for block in blocks:
+            out[row:row + len(block), :block.shape[1]] = block
+            row += len(block)
+        return out
+
+    @staticmethod
+    def _depth(lc, rc):
+        # Vector-leaf trees reuse right_children of leaves as a leaf
+        # index, so only expand nodes that have a left child
+        depth, level = 0, [0]
+        while True:
+            level = [c for n in level if lc[n] != -1 for c in (lc[n], rc[n])]
+            if not level:
+                return depth
+            depth += 1
+
+    @staticmethod
+    def _expected_values(lc, rc, values, sum_hessian):
+        """
+        Per-node expected output: leaves keep their value, internal
+        nodes get the cover-weighted mean of their children.
+        """
+        out = np.asarray(values, dtype=np.float64).copy()
+        cover = np.asarray(sum_hessian, dtype=np.float64)
+        # Children always have larger ids than their parent
+        for node in range(len(lc) - 1, -1, -1):
+            if lc[node] != -1:
+                l, r = lc[node], rc[node]
+                total = cover[l] + cover[r]
+                if total > 0:
+                    out[node] = (cover[l] * out[l] + cover[r] * out[r]) / total
+                else:
+                    out[node] = (out[l] + out[r]) / 2
+        return out
+
+    @classmethod
+    def from_models(cls, *models):
+        return cls([_booster_json(m) for m in models])
+
+    def _step(self, X, rows, node):
+        fvalue = X[rows, self.feature[node]]
+        go_left = np.where(
+            np.isnan(fvalue),
+            self.default_left[node],
+            fvalue < self.threshold[node]
+        )
+        return np.where(go_left, self.left[node], self.right[node])
+
+    def _check(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.num_feature:
+            raise ValueError(f"Expected {self.num_feature} features, got {X.shape[1]}")
+        return X
+
+    def leaf_nodes(self, X):
+        """
+        (n_rows, n_trees) index of the leaf reached in every tree.
+        """
+        X = self._check(X)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            node = self._step(X, rows, node)
+        return node
+
+    def leaf_values(self, X):
+        """
+        (n_rows, n_trees) float32 leaf value reached in every tree, or
+        (n_rows, n_trees, width) when some trees have vector leaves.
+        """
+        values = self.value[self.leaf_nodes(X)]
+        return values[..., 0] if self.width == 1 else values
+
+    def predict(self, X):
+        """
+        (n_rows, n_targets) float32 predictions.
+        """
+        leaves = self.value[self.leaf_nodes(X)]
+        out = np.empty((leaves.shape[0], self.num_targets), dtype=np.float32)
+
+        for t, (trees, cols) in enumerate(self._target_terms):
+            terms = np.empty((leaves.shape[0], len(trees) + 1), dtype=np.float32)
+            terms[:, 0] = self.base_scores[t]
+            terms[:, 1:] = leaves[:, trees, cols]
+            # add.accumulate sums left to right in float32, the same order
+            # XGBoost uses (np.sum would switch to pairwise summation)
+            out[:, t] = np.add.accumulate(terms, axis=1)[:, -1]
+
+        return out
+
+    def path_contributions(self, X):
+        """
+        (n_rows, n_targets, n_features + 1) per-feature contributions
+        by path attribution (Saabas): each split on a row's path credits
+        its feature with the change in the node's expected output. The
+        last column is the bias (base_score plus the root expectations).
+        Rows sum to the prediction up to float rounding. Used where
+        XGBoost has no pred_contribs (vector-leaf trees).
+        """
+        X = self._check(X)
+        n = X.shape[0]
+        rows = np.arange(n)[:, None]
+        node = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+
+        contrib = np.zeros((n, self.num_targets, self.num_feature + 1), dtype=np.float64)
+        contrib[:, :, -1] = self.base_scores
+        for col in range(self.width):
+            targets = self.tree_target[:, col]
+            valid = targets >= 0
+            np.add.at(contrib[:, :, -1].T, targets[valid], self.node_value[self.roots[valid], col][:, None])
+
+        row_idx = np.broadcast_to(rows, node.shape)
+        for _ in range(self.max_depth):
+            child = self._step(X, rows, node)
+            moved = child != node
+            split_feature = self.feature[node]
+            delta = self.node_value[child] - self.node_value[node]
+            for col in range(self.width):
+                targets = np.broadcast_to(self.tree_target[:, col], node.shape)
+                mask = moved & (targets >= 0)
+                np.add.at(contrib, (row_idx[mask], targets[mask], split_feature[mask]), delta[..., col][mask])
+            node = child
+
+        return contrib
@@ -0,0 +1,138 @@
+"""
+Parallel hyperparameter search for the harvest models (used by
+train.py --search).
+
+Each trial fits one candidate configuration for one target on the fit
+split with early stopping on the validation split, so the tree count is
+chosen by the data instead of being fixed. Trials run in a process
+pool; the training arrays are handed to each worker once (pool
+initializer), not with every task.
+"""
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from xgboost import XGBRegressor
+
+RANDOM_STATE = 42
+
+# Fixed for every trial; the search varies SEARCH_SPACE on top
+BASE_PARAMS = {
+    "subsample": 0.85,
+    "colsample_bytree": 0.85,
+    "gamma": 0.1,
+    "reg_alpha": 0.3,
+    "reg_lambda": 1.5,
+    "tree_method": "hist",
+    "random_state": RANDOM_STATE,
+}
+
+SEARCH_SPACE = {
+    "max_depth": [4, 5, 6, 8],
+    "learning_rate": [0.03, 0.05, 0.1],
+    "min_child_weight": [1, 5, 10],
+    "subsample": [0.7, 0.85, 1.0],
+}
+
+def sample_configs(trials, seed=RANDOM_STATE):
+    """
+    `trials` distinct configurations drawn from SEARCH_SPACE, always
+    including the current production settings as the first one.
+    """
+    keys = sorted(SEARCH_SPACE)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(SEARCH_SPACE[k] for k in keys))]
+    production = {"max_depth": 6, "learning_rate": 0.03, "min_child_weight": 5, "subsample": 0.85}
+    rest = [c for c in grid if c != production]
+    random.Random(seed).shuffle(rest)
+    return [production] + rest[:max(0, trials - 1)]
+
+# ======================================================
+# WORKER
+# ======================================================
+_data = {}
+
+def _init_worker(X_fit, X_val, targets_fit, targets_val):
+    _data.update(X_fit=X_fit, X_val=X_val, y_fit=targets_fit, y_val=targets_val)
+
+def run_trial(trial_id, target, config, max_trees, early_stop, n_jobs):
+    start = time.perf_counter()
+    model = XGBRegressor(
+        **{**BASE_PARAMS, **config},
+        n_estimators=max_trees,
+        early_stopping_rounds=early_stop,
+        eval_metric="rmse",
+        n_jobs=n_jobs
+    )
+    model.fit(
+        _data["X_fit"], _data["y_fit"][target],
+        eval_set=[(_data["X_val"], _data["y_val"][target])],
+        verbose=False
+    )
+    return {
+        "trial": trial_id,
+        "target": target,
+        "params": config,
+        "n_estimators": int(model.best_iteration) + 1,
+        "val_rmse": round(float(model.best_score), 4),
+        "wall_s": round(time.perf_counter() - start, 3),
+        "pid": os.getpid()
+    }
+
+# ======================================================
+# SEARCH
+# ======================================================
+def search(X_fit, X_val, targets_fit, targets_val, trials=12, workers=None,
+           max_trees=2000, early_stop=50, seed=RANDOM_STATE):
+    """
+    targets_*: {"yield": array, "harvest": array}. Returns
+    (best per target, every trial result, total wall seconds).
+    """
+    workers = workers or os.cpu_count() or 1
+    # Split the cores between concurrent trials instead of oversubscribing
+    n_jobs = max(1, (os.cpu_count() or 1) // workers)
+    configs = sample_configs(trials, seed)
+    tasks = [(i, target, config) for i, config in enumerate(configs) for target in targets_fit]
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(X_fit, X_val, targets_fit, targets_val)) as pool:
+        futures = [pool.submit(run_trial, i, target, config, max_trees, early_stop, n_jobs)
+                   for i, target, config in tasks]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"  trial {result['trial']:>2} {result['target']:<8} "
+                  f"trees {result['n_estimators']:>4}  val RMSE {result['val_rmse']:<9} "
+                  f"{result['wall_s']:>6.2f}s  {result['params']}")
+    wall = time.perf_counter() - start
+
+    results.sort(key=lambda r: (r["target"], r["trial"]))
+    best = {
+        target: min((r for r in results if r["target"] == target), key=lambda r: r["val_rmse"])
+        for target in targets_fit
+    }
+    return best, results, wall
+
+def build_model(result, n_jobs=-1):
+    """
+    Unfitted XGBRegressor with a trial's parameters and tree count.
+    """
+    return XGBRegressor(
+        **{**BASE_PARAMS, **result["params"]},
+        n_estimators=result["n_estimators"],
+        n_jobs=n_jobs
+    )
+
+def trial_summary(results, wall):
+    serial = sum(r["wall_s"] for r in results)
+    return {
+        "trials": len(results),
+        "wall_s": round(wall, 2),
+        "sum_trial_s": round(serial, 2),
+        "speedup": round(serial / wall, 2) if wall else None,
+        "mean_trial_s": round(float(np.mean([r["wall_s"] for r in results])), 3) if results else None
+    }
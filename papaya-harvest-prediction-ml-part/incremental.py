@@ -0,0 +1,258 @@
+"""
+Incremental (warm-start) retraining for the harvest models (used by
+train.py --incremental).
+
+    python train.py --incremental new_harvests.csv [--rounds 50] [--promote]
+
+New labelled rows use the papaya_dataset.csv columns (for example an
+export of actual harvests). The current models keep their trees and get
+`rounds` more trees fitted on the new rows only, so the cost grows with
+the new data, not the whole history. The scaler and feature columns stay
+as they are: refitting either would change what the existing trees see.
+
+The updated models are written as a new version under
+models/versions/vNNNN/ (bundle + manifest.json) only if RMSE on the
+reference holdout (train.py's test split) has not regressed by more
+than `tolerance` for either target. With promote=True the version also
+replaces models/harvest_bundle.bin and the model pickles (the pickled
+shap explainers are not refreshed; the default native backend explains
+the updated trees directly).
+"""
+import json
+import os
+import pickle
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import xgboost
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split
+from xgboost import XGBRegressor
+
+from model_bundle import ModelBundle, write_bundle
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from papaya_features import FEATURES  # noqa: E402
+
+TARGETS = ["yield_per_tree", "harvest_days"]
+
+# Target column of each single-output model; a joint model takes both
+TARGET_COLUMN = {"yield_model": 0, "harvest_model": 1}
+
+# Training settings carried over to the appended trees. Native bundles
+# keep only the trees, so train.py records these in the bundle metadata.
+TRAINING_PARAMS = (
+    "max_depth", "learning_rate", "subsample", "colsample_bytree",
+    "min_child_weight", "gamma", "reg_alpha", "reg_lambda",
+    "tree_method", "random_state", "multi_strategy"
+)
+
+def training_params(model):
+    params = model.get_params()
+    return {k: params[k] for k in TRAINING_PARAMS if params.get(k) is not None}
+
+def as_regressor(booster, params):
+    """
+    XGBRegressor around a plain Booster (xgboost.train, a slice), so
+    pickles and updates see the usual sklearn model.
+    """
+    model = XGBRegressor(**params)
+    model.load_model(bytearray(booster.save_raw("ubj")))
+    return model
+
+# ======================================================
+# CURRENT MODELS
+# ======================================================
+def load_current(models_dir):
+    """
+    {"models": {name: XGBRegressor}, "scaler", "feature_names",
+    "metadata", "source"} from the bundle, else the pickles.
+    """
+    bundle_path = os.path.join(models_dir, "harvest_bundle.bin")
+    if os.path.exists(bundle_path):
+        bundle = ModelBundle(bundle_path)
+        names = [n for n, sec in bundle.sections.items() if sec["kind"] == "xgboost-ubj"]
+        return {
+            "models": {name: bundle.model(name) for name in names},
+            "scaler": bundle.scaler(),
+            "feature_names": bundle.feature_names,
+            "metadata": bundle.metadata,
+            "source": bundle_path
+        }
+
+    def load(name):
+        with open(os.path.join(models_dir, f"{name}.pkl"), "rb") as f:
+            return pickle.load(f)
+
+    names = ["joint_model"] if os.path.exists(os.path.join(models_dir, "joint_model.pkl")) \
+        else ["yield_model", "harvest_model"]
+    models = {name: load(name) for name in names}
+    return {
+        "models": models,
+        "scaler": load("scaler"),
+        "feature_names": load("feature_names"),
+        # Pickled regressors still carry their parameters
+        "metadata": {"params": {name: training_params(m) for name, m in models.items()}},
+        "source": models_dir
+    }
+
+def predict(models, X):
+    """
+    (n_rows, 2) [yield, harvest] for a pair or a joint model.
+    """
+    if "joint_model" in models:
+        return models["joint_model"].predict(X)
+    return np.column_stack([models["yield_model"].predict(X), models["harvest_model"].predict(X)])
+
+def rmse_by_target(models, X, Y):
+    pred = predict(models, X)
+    return {
+        target: round(float(np.sqrt(mean_squared_error(Y[:, t], pred[:, t]))), 4)
+        for t, target in enumerate(TARGETS)
+    }
+
+def total_trees(model):
+    return int(model.get_booster().num_boosted_rounds())
+
+# ======================================================
+# VERSIONS
+# ======================================================
+def next_version(versions_dir):
+    existing = [
+        int(name[1:]) for name in os.listdir(versions_dir)
+        if name.startswith("v") and name[1:].isdigit()
+    ] if os.path.isdir(versions_dir) else []
+    return f"v{max(existing, default=0) + 1:04d}"
+
+# ======================================================
+# UPDATE
+# ======================================================
+def load_new_rows(path, features):
+    df = pd.read_csv(path)
+    missing = [c for c in features.fields + TARGETS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns {missing}")
+    before = len(df)
+    df = df.dropna(subset=features.fields + TARGETS).reset_index(drop=True)
+    if len(df) < before:
+        print(f"Dropped {before - len(df)} incomplete rows")
+    return df
+
+def update(models, params, X, Y, rounds, n_jobs=-1):
+    """
+    Copies of `models` with `rounds` trees appended, fitted on X/Y only.
+    """
+    updated = {}
+    for name, model in models.items():
+        y = Y[:, TARGET_COLUMN[name]] if name in TARGET_COLUMN else Y
+        new_model = XGBRegressor(**params.get(name, {}), n_estimators=rounds, n_jobs=n_jobs)
+        new_model.fit(X, y, xgb_model=model.get_booster())
+        updated[name] = new_model
+    return updated
+
+def run(new_rows, holdout, models_dir="models", rounds=50, tolerance=0.01,
+        new_holdout=0.2, default_params=None, promote=False, force=False, seed=42):
+    """
+    holdout: (unscaled feature frame, (n, 2) targets) that must not regress.
+    Returns the report dict; report["accepted"] says whether it was written.
+    """
+    current = load_current(models_dir)
+    models, scaler, feature_names = current["models"], current["scaler"], current["feature_names"]
+    features = FEATURES.compile(feature_names)
+    params = current["metadata"].get("params") or {}
+    for name in models:
+        if name not in params:
+            print(f"No recorded training parameters for {name}; using train.py defaults")
+            params[name] = dict(default_params or {})
+
+    df = load_new_rows(new_rows, features)
+    X_all = scaler.transform(features.frame(df))
+    Y_all = df[TARGETS].to_numpy(dtype=np.float64)
+
+    # Part of the new rows measures how much the update learned
+    if new_holdout and len(df) >= 10:
+        X_fit, X_new_val, Y_fit, Y_new_val = train_test_split(
+            X_all, Y_all, test_size=new_holdout, random_state=seed
+        )
+    else:
+        X_fit, Y_fit, X_new_val, Y_new_val = X_all, Y_all, None, None
+
+    X_hold = scaler.transform(holdout[0][feature_names].to_numpy(dtype=np.float64))
+    Y_hold = np.asarray(holdout[1], dtype=np.float64)
+
+    print(f"Updating {', '.join(models)} from {current['source']} with {len(X_fit)} new rows "
+          f"(+{rounds} trees each)...")
+    start = time.perf_counter()
+    updated = update(models, params, X_fit, Y_fit, rounds)
+    fit_s = time.perf_counter() - start
+
+    before = rmse_by_target(models, X_hold, Y_hold)
+    after = rmse_by_target(updated, X_hold, Y_hold)
+    regressed = [t for t in TARGETS if after[t] > before[t] * (1 + tolerance)]
+
+    report = {
+        "parent": current["metadata"].get("version", "base"),
+        "created": datetime.utcnow().isoformat() + "Z",
+        "new_rows_file": os.path.abspath(new_rows),
+        "new_rows": len(df),
+        "fit_rows": len(X_fit),
+        "rounds": rounds,
+        "fit_s": round(fit_s, 3),
+        "trees": {name: total_trees(m) for name, m in updated.items()},
+        "holdout_rows": len(X_hold),
+        "holdout_rmse_before": before,
+        "holdout_rmse_after": after,
+        "tolerance": tolerance,
+        "regressed": regressed,
+    }
+    if X_new_val is not None:
+        report["new_holdout_rmse_before"] = rmse_by_target(models, X_new_val, Y_new_val)
+        report["new_holdout_rmse_after"] = rmse_by_target(updated, X_new_val, Y_new_val)
+
+    print(f"Fitted in {fit_s:.2f}s; trees now {report['trees']}")
+    for t in TARGETS:
+        line = f"  {t:<15} holdout RMSE {before[t]:.4f} -> {after[t]:.4f}"
+        if X_new_val is not None:
+            line += (f" | new rows RMSE {report['new_holdout_rmse_before'][t]:.4f}"
+                     f" -> {report['new_holdout_rmse_after'][t]:.4f}")
+        print(line)
+
+    report["accepted"] = not regressed or force
+    if not report["accepted"]:
+        print(f"Holdout RMSE regressed more than {tolerance:.1%} for {regressed}; nothing written "
+              f"(use --force to write anyway)")
+        return report
+
+    versions_dir = os.path.join(models_dir, "versions")
+    version = next_version(versions_dir)
+    out_dir = os.path.join(versions_dir, version)
+    os.makedirs(out_dir)
+    report["version"] = version
+
+    metadata = {
+        "xgboost_version": xgboost.__version__,
+        "version": version,
+        "parent": report["parent"],
+        "params": params,
+        "n_estimators": report["trees"],
+        "incremental": {k: report[k] for k in (
+            "new_rows", "rounds", "holdout_rmse_before", "holdout_rmse_after")}
+    }
+    write_bundle(os.path.join(out_dir, "harvest_bundle.bin"), updated, scaler, feature_names, metadata)
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {out_dir}")
+
+    if promote:
+        for name, model in updated.items():
+            with open(os.path.join(models_dir, f"{name}.pkl"), "wb") as f:
+                pickle.dump(model, f)
+        write_bundle(os.path.join(models_dir, "harvest_bundle.bin"), updated, scaler, feature_names, metadata)
+        print(f"Promoted {version} to {models_dir}/ (restart the service to load it)")
+    else:
+        print(f"Serve it with MODEL_BUNDLE={os.path.join(out_dir, 'harvest_bundle.bin')}")
+
+    return report
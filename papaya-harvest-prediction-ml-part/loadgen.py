@@ -0,0 +1,149 @@
+"""
+Open-loop load generator for the growth service.
+
+    python loadgen.py --rps 20 --duration 60
+    python loadgen.py --url http://127.0.0.1:5000 --route /growth_predict_batch --batch 25 --rps 2
+
+Requests are started on a fixed schedule (target RPS) whether or not
+earlier ones have finished, so a slow service shows up as latency
+rather than as a lower request rate. Latency is measured from the
+scheduled start, which includes any time spent waiting for a free
+worker. Payloads are random farms (seeded) across districts, soils,
+watering setups and planting months.
+
+Reports p50/p95/p99 latency, error rate by status and the achieved
+rate; --json writes the same summary to a file for comparing runs.
+Pair with weather_stub.py to keep upstream latency reproducible.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+DISTRICTS = ["Matara", "Galle", "Hambantota", "matara district", "Hambanthota"]
+SOILS = ["loam", "sandy loam", "laterite", "sandy_loam"]
+METHODS = ["drip", "manual", "sprinkler", "Drip Irrigation"]
+FREQUENCIES = ["daily", "2/week", "3/day", "every 2 days", "weekly"]
+
+def random_farm(rng):
+    return {
+        "district": rng.choice(DISTRICTS),
+        "soil_type": rng.choice(SOILS),
+        "watering_method": rng.choice(METHODS),
+        "watering_frequency": rng.choice(FREQUENCIES),
+        "trees_count": rng.randint(10, 500),
+        "plant_month": rng.randint(1, 12)
+    }
+
+def make_payload(route, rng, batch):
+    if route.endswith("_batch"):
+        return {"farms": [random_farm(rng) for _ in range(batch)]}
+    return random_farm(rng)
+
+_local = threading.local()
+
+def _session():
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+def run(url, route, rps, duration, workers, batch, seed, timeout):
+    rng = random.Random(seed)
+    total = int(rps * duration)
+    payloads = [make_payload(route, rng, batch) for _ in range(total)]
+    results = [None] * total
+
+    def fire(i, scheduled):
+        try:
+            resp = _session().post(url + route, json=payloads[i], timeout=timeout)
+            outcome = str(resp.status_code)
+        except requests.Timeout:
+            outcome = "timeout"
+        except requests.RequestException:
+            outcome = "connection_error"
+        results[i] = (time.perf_counter() - scheduled, outcome)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i in range(total):
+            scheduled = started + i / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, i, scheduled)
+    elapsed = time.perf_counter() - started
+
+    return summarize(results, elapsed, rps, route, batch)
+
+def summarize(results, elapsed, rps, route, batch):
+    done = [r for r in results if r is not None]
+    latencies = np.array([r[0] for r in done]) * 1000
+    outcomes = Counter(r[1] for r in done)
+    ok = outcomes.get("200", 0)
+
+    def pct(q):
+        return round(float(np.percentile(latencies, q)), 2) if len(latencies) else None
+
+    return {
+        "route": route,
+        "batch": batch if route.endswith("_batch") else 1,
+        "target_rps": rps,
+        "achieved_rps": round(len(done) / elapsed, 2) if elapsed else 0.0,
+        "requests": len(done),
+        "ok": ok,
+        "error_rate": round(1 - ok / len(done), 4) if done else None,
+        "outcomes": dict(sorted(outcomes.items())),
+        "latency_ms": {
+            "p50": pct(50),
+            "p95": pct(95),
+            "p99": pct(99),
+            "max": round(float(latencies.max()), 2) if len(latencies) else None,
+            "mean": round(float(latencies.mean()), 2) if len(latencies) else None
+        },
+        "wall_s": round(elapsed, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--route", default="/growth_predict")
+    parser.add_argument("--rps", type=float, default=10.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--workers", type=int, default=64, help="max requests in flight")
+    parser.add_argument("--batch", type=int, default=20, help="farms per request for batch routes")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=5, help="requests sent before measuring")
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    if args.warmup:
+        rng = random.Random(args.seed + 1)
+        for _ in range(args.warmup):
+            try:
+                _session().post(args.url + args.route, json=make_payload(args.route, rng, args.batch),
+                                timeout=args.timeout)
+            except requests.RequestException as e:
+                raise SystemExit(f"Warm-up request failed: {e}")
+
+    summary = run(args.url, args.route, args.rps, args.duration, args.workers,
+                  args.batch, args.seed, args.timeout)
+
+    lat = summary["latency_ms"]
+    print(f"{summary['route']}: {summary['requests']} requests at {summary['achieved_rps']} rps "
+          f"(target {summary['target_rps']}) in {summary['wall_s']}s")
+    print(f"  latency ms  p50 {lat['p50']}  p95 {lat['p95']}  p99 {lat['p99']}  max {lat['max']}")
+    print(f"  error rate  {summary['error_rate']}  {summary['outcomes']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Single-file model bundle for the harvest service.
+
+Layout (all offsets from the start of the file):
+
+    8 bytes   magic  b"PPBUNDLE"
+    4 bytes   format version (little-endian uint32)
+    4 bytes   header length (little-endian uint32)
+    N bytes   JSON header: feature_names, metadata, section table
+    ...       sections, each starting on a 64-byte boundary
+
+Sections are either native XGBoost models (UBJSON, as written by
+Booster.save_raw("ubj")) or raw little-endian NumPy arrays. The loader
+memory-maps the file and only parses the header up front. Arrays (the
+scaler) are zero-copy views into the map; models are parsed on first
+access into each process's own XGBoost memory, so booster memory is
+not shared between workers. What the bundle saves is unpickling time
+and the sklearn/shap imports, not per-worker model memory.
+
+write_bundle records the SHA-256 of the model pickles next to the
+bundle (write the pickles first). ModelBundle.stale_pickles() lists the
+ones that changed since, so a retrain that only replaced the pickles
+is not silently served from an old bundle.
+
+    python model_bundle.py build [models_dir] [out_path]
+        Convert the pickled artifacts in models/ into a bundle.
+    python model_bundle.py info [bundle_path]
+"""
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+from xgboost import XGBRegressor
+
+MAGIC = b"PPBUNDLE"
+FORMAT_VERSION = 1
+ALIGN = 64
+
+DEFAULT_BUNDLE = os.path.join("models", "harvest_bundle.bin")
+
+# Pickles the service can load instead of the bundle
+PICKLE_NAMES = ("yield_model", "harvest_model", "joint_model", "scaler", "feature_names")
+
+def _pad(n):
+    return (-n) % ALIGN
+
+def rss_bytes():
+    """
+    Current resident set size (Linux), or 0 where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+# ======================================================
+# SCALER
+# ======================================================
+class ArrayScaler:
+    """
+    RobustScaler.transform from stored center/scale arrays:
+    (X - center) / scale, in float64 like sklearn.
+    """
+
+    def __init__(self, center, scale):
+        self.center_ = center
+        self.scale_ = scale
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        X -= self.center_
+        X /= self.scale_
+        return X
+
+def pickle_digests(directory):
+    """
+    {name: sha256} of the model pickles present in directory.
+    """
+    digests = {}
+    for name in PICKLE_NAMES:
+        path = os.path.join(directory, f"{name}.pkl")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digests[name] = hashlib.sha256(f.read()).hexdigest()
+    return digests
+
+# ======================================================
+# WRITE
+# ======================================================
+def write_bundle(path, models, scaler, feature_names, metadata=None):
+    """
+    models: {"yield_model": XGBRegressor, "harvest_model": XGBRegressor},
+            or {"joint_model": XGBRegressor} for a two-output model
+    scaler: fitted RobustScaler
+    Write the matching pickles next to path first: their digests are
+    recorded so the loader can tell when they change without the bundle.
+    """
+    metadata = dict(metadata or {})
+    metadata["pickles"] = pickle_digests(os.path.dirname(path) or ".")
+    blobs = []
+
+    for name, model in models.items():
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        blobs.append((name, {"kind": "xgboost-ubj"}, bytes(booster.save_raw("ubj"))))
+
+    for name, arr in (("scaler_center", scaler.center_), ("scaler_scale", scaler.scale_)):
+        arr = np.ascontiguousarray(arr, dtype="<f8")
+        blobs.append((name, {"kind": "ndarray", "dtype": "<f8", "shape": list(arr.shape)}, arr.tobytes()))
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "created": datetime.utcnow().isoformat() + "Z",
+        "feature_names": list(feature_names),
+        "metadata": metadata or {},
+        "sections": {}
+    }
+
+    # Offsets depend on the header size, which depends on the offsets;
+    # lay out with placeholders until the header length stops changing.
+    header_len = 0
+    while True:
+        offset = 16 + header_len
+        offset += _pad(offset)
+        for name, info, data in blobs:
+            header["sections"][name] = dict(info, offset=offset, length=len(data))
+            offset += len(data)
+            offset += _pad(offset)
+        encoded = json.dumps(header).encode("utf-8")
+        if len(encoded) == header_len:
+            break
+        header_len = len(encoded)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<II", FORMAT_VERSION, header_len))
+        f.write(encoded)
+        for name, _, data in blobs:
+            f.write(b"\0" * _pad(f.tell()))
+            assert f.tell() == header["sections"][name]["offset"]
+            f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+# ======================================================
+# READ
+# ======================================================
+class ModelBundle:
+    """
+    bundle = ModelBundle("models/harvest_bundle.bin")
+    bundle.model("yield_model")   # XGBRegressor, built on first call
+    bundle.scaler()               # ArrayScaler over mmapped arrays
+    bundle.feature_names
+    bundle.stats()                # load time / size per artifact
+    """
+
+    def __init__(self, path=DEFAULT_BUNDLE):
+        start = time.perf_counter()
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:8] != MAGIC:
+            raise ValueError(f"{path} is not a model bundle")
+        version, header_len = struct.unpack("<II", self._mm[8:16])
+        if version > FORMAT_VERSION:
+            raise ValueError(f"Bundle format {version} is newer than supported ({FORMAT_VERSION})")
+
+        self.header = json.loads(self._mm[16:16 + header_len].decode("utf-8"))
+        self.format_version = version
+        self.feature_names = self.header["feature_names"]
+        self.metadata = self.header.get("metadata", {})
+        self.sections = self.header["sections"]
+
+        self._cache = {}
+        self._stats = {
+            "header": {
+                "load_ms": round((time.perf_counter() - start) * 1000, 3),
+                "bytes": 16 + header_len,
+                "rss_delta_bytes": 0
+            }
+        }
+
+    def _section(self, name):
+        if name not in self.sections:
+            raise KeyError(f"Bundle has no section {name!r}")
+        return self.sections[name]
+
+    def _timed(self, name, build):
+        if name in self._cache:
+            return self._cache[name]
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        obj = build()
+        self._stats[name] = {
+            "load_ms": round((time.perf_counter() - start) * 1000, 3),
+            "bytes": self._section(name)["length"] if name in self.sections else 0,
+            "rss_delta_bytes": max(0, rss_bytes() - rss_before)
+        }
+        self._cache[name] = obj
+        return obj
+
+    def array(self, name):
+        def build():
+            sec = self._section(name)
+            count = int(np.prod(sec["shape"])) if sec["shape"] else 1
+            # Zero-copy, read-only view into the map
+            return np.frombuffer(
+                self._mm, dtype=np.dtype(sec["dtype"]), count=count, offset=sec["offset"]
+            ).reshape(sec["shape"])
+        return self._timed(name, build)
+
+    def model(self, name):
+        def build():
+            sec = self._section(name)
+            raw = self._mm[sec["offset"]:sec["offset"] + sec["length"]]
+            model = XGBRegressor()
+            model.load_model(bytearray(raw))
+            return model
+        return self._timed(name, build)
+
+    def scaler(self):
+        return ArrayScaler(self.array("scaler_center"), self.array("scaler_scale"))
+
+    def stale_pickles(self, directory=None):
+        """
+        Names of model pickles beside the bundle that were added, changed
+        or removed since it was written; empty when they match or the
+        bundle predates the check.
+        """
+        recorded = self.metadata.get("pickles")
+        if not recorded:
+            return []
+        current = pickle_digests(directory or os.path.dirname(self.path) or ".")
+        return sorted(n for n in set(recorded) | set(current) if recorded.get(n) != current.get(n))
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "format_version": self.format_version,
+            "file_bytes": len(self._mm),
+            "metadata": self.metadata,
+            "artifacts": dict(self._stats)
+        }
+
+# ======================================================
+# CLI
+# ======================================================
+def build_from_pickles(models_dir="models", out_path=None):
+    out_path = out_path or os.path.join(models_dir, "harvest_bundle.bin")
+
+    def load(name):
+        with open(os.path.join(models_dir, f"{name}.pkl"), "rb") as f:
+            return pickle.load(f)
+
+    if os.path.exists(os.path.join(models_dir, "joint_model.pkl")):
+        models = {"joint_model": load("joint_model")}
+    else:
+        models = {"yield_model": load("yield_model"), "harvest_model": load("harvest_model")}
+
+    return write_bundle(
+        out_path,
+        models=models,
+        scaler=load("scaler"),
+        feature_names=load("feature_names"),
+        metadata={"source": "converted from pickles", "models_dir": models_dir}
+    )
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "info"
+    if cmd == "build":
+        path = build_from_pickles(*sys.argv[2:4])
+        print(f"Wrote {path} ({os.path.getsize(path)} bytes)")
+    elif cmd == "info":
+        bundle = ModelBundle(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_BUNDLE)
+        for name, sec in bundle.sections.items():
+            if sec["kind"] == "xgboost-ubj":
+                bundle.model(name)
+        bundle.scaler()
+        print(json.dumps(bundle.stats(), indent=2))
+    else:
+        raise SystemExit(f"Unknown command {cmd!r} (use build or info)")
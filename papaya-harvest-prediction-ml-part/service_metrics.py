@@ -0,0 +1,223 @@
+import bisect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# ======================================================
+# PROMETHEUS-STYLE METRICS (in-process)
+# ======================================================
+# Each worker process keeps its own registry; scrape every worker (or
+# sum in Prometheus) when running under gunicorn with several workers.
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_str(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, _label_str(self.labelnames, key), value
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                yield (f"{self.name}_bucket",
+                       _label_str(self.labelnames, key, ("le", _fmt(bound))),
+                       cumulative)
+            yield f"{self.name}_sum", _label_str(self.labelnames, key), total
+            yield f"{self.name}_count", _label_str(self.labelnames, key), count
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, fn):
+        """
+        fn() is called before every render, e.g. to refresh gauges.
+        """
+        self._collectors.append(fn)
+
+    def render(self):
+        for fn in self._collectors:
+            try:
+                fn()
+            except Exception as e:
+                logging.getLogger(__name__).warning("metrics collector failed: %s", e)
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    "growth_request_seconds", "End-to-end request latency", ["route"])
+REQUESTS_TOTAL = registry.counter(
+    "growth_requests_total", "Requests handled", ["route", "status"])
+STAGE_SECONDS = registry.histogram(
+    "growth_stage_seconds", "Time spent per pipeline stage", ["route", "stage"])
+UPSTREAM_SECONDS = registry.histogram(
+    "weather_upstream_seconds", "Latency of upstream weather/geocode calls", ["call"])
+UPSTREAM_ERRORS = registry.counter(
+    "weather_upstream_errors_total", "Failed upstream weather/geocode calls", ["call"])
+WEATHER_COALESCED = registry.counter(
+    "weather_coalesced_total", "Upstream calls served by an identical in-flight call", ["call"])
+WEATHER_FALLBACKS = registry.counter(
+    "weather_fallback_total", "Requests served with fallback weather", ["reason"])
+
+# ======================================================
+# STAGE TIMING
+# ======================================================
+class StageTimer:
+    """
+    timer = StageTimer("growth_predict")
+    with timer.stage("scale"):
+        ...
+    timer.stages  -> {"scale": 0.00012, ...}
+    """
+
+    def __init__(self, route):
+        self.route = route
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            STAGE_SECONDS.observe(elapsed, route=self.route, stage=name)
+
+    def as_ms(self):
+        return {k: round(v * 1000, 3) for k, v in self.stages.items()}
+
+@contextmanager
+def upstream_call(call):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.inc(call=call)
+        raise
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - start, call=call)
+
+# ======================================================
+# SAMPLED STRUCTURED LOGGING
+# ======================================================
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.01"))
+
+request_log = logging.getLogger("growth.requests")
+if not request_log.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    request_log.addHandler(_handler)
+    request_log.setLevel(logging.INFO)
+    request_log.propagate = False
+
+def log_event(event, force=False, **fields):
+    """
+    One JSON line per event. Only LOG_SAMPLE_RATE of events are
+    written unless force=True (use for errors).
+    """
+    if not force and random.random() >= LOG_SAMPLE_RATE:
+        return
+    record = {"ts": round(time.time(), 3), "event": event}
+    record.update(fields)
+    request_log.info(json.dumps(record, default=str))
@@ -0,0 +1,303 @@
+"""
+Streaming, external-memory training for the harvest models (used by
+train.py --stream).
+
+    python train.py --stream --data all_seasons.csv [--chunk-rows 200000]
+
+The CSV is never loaded whole. It is read in chunks with fixed column
+types (categorical dtypes for the text fields), and each chunk goes
+through the shared feature spec and the scaler on its own:
+
+1. First pass: union the one-hot vocabularies, count rows, and keep a
+   bounded uniform reservoir sample of the training rows' features.
+   The RobustScaler is fitted on that sample. While the training split
+   fits in the reservoir this is exactly the full-data scaler.
+   Beyond that, the median and IQR are estimates, which trees do not
+   mind, since scaling does not change the order of values.
+2. Training: an xgboost.DataIter feeds scaled chunks into an
+   ExtMemQuantileDMatrix. XGBoost keeps its quantized pages in a disk
+   cache instead of RAM.
+3. Evaluation: test rows are streamed through the boosters and the
+   metrics are accumulated per chunk.
+
+Train/test membership is drawn per row from a seeded generator in file
+order, so it does not depend on the chunk size. Peak memory is roughly
+one chunk plus the reservoir plus XGBoost's sketches, whatever the
+dataset size.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.preprocessing import RobustScaler
+
+from incremental import TARGETS
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Fixed dtypes: no per-chunk inference, categories instead of objects.
+# Integer columns are read as float64 so blank cells parse (as NaN);
+# they are cast back once incomplete rows are dropped.
+CSV_DTYPES = {
+    "district": "category",
+    "soil_type": "category",
+    "watering_method": "category",
+    "watering_frequency": "category",
+    "plant_month": "category",
+    "trees_count": "float64",
+    "avg_temp": "float64",
+    "total_rain": "float64",
+    "rainy_days": "float64",
+    "yield_per_tree": "float64",
+    "harvest_days": "float64",
+}
+
+INT_COLUMNS = ("trees_count", "rainy_days")
+
+DEFAULT_CHUNK_ROWS = 200_000
+DEFAULT_RESERVOIR_ROWS = 200_000
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB, or None when it
+    cannot be measured (no resource module and no psutil).
+    """
+    if resource is not None:
+        # ru_maxrss is KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    # peak_wset is the Windows peak working set
+    peak = getattr(psutil.Process().memory_info(), "peak_wset", None)
+    return peak / 2**20 if peak is not None else None
+
+def read_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    for chunk in pd.read_csv(path, usecols=list(CSV_DTYPES), dtype=CSV_DTYPES, chunksize=chunk_rows):
+        # Same rule as the in-memory path: incomplete rows are dropped
+        chunk = chunk.dropna().reset_index(drop=True)
+        yield chunk.astype({name: "int64" for name in INT_COLUMNS})
+
+class SplitStream:
+    """
+    Per-row test membership from one seeded generator, consumed in
+    file order; restart() before every pass over the file.
+    """
+
+    def __init__(self, test_size, seed):
+        self.test_size = test_size
+        self.seed = seed
+        self.restart()
+
+    def restart(self):
+        self.rng = np.random.default_rng(self.seed)
+
+    def test_mask(self, n):
+        return self.rng.random(n) < self.test_size
+
+class Reservoir:
+    """
+    Uniform sample of at most `size` rows from a stream of row blocks
+    (Algorithm R, vectorized per block).
+    """
+
+    def __init__(self, size, n_features, seed):
+        self.size = size
+        self.rows = np.empty((size, n_features), dtype=np.float64)
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def add(self, X):
+        n = len(X)
+        fill = min(n, max(0, self.size - self.seen))
+        if fill:
+            self.rows[self.seen:self.seen + fill] = X[:fill]
+        if fill < n:
+            # Row number i (0-based in the stream) replaces a random
+            # slot with probability size / (i + 1)
+            index = self.seen + np.arange(fill, n)
+            slots = (self.rng.random(n - fill) * (index + 1)).astype(np.int64)
+            keep = slots < self.size
+            # Later rows must win when two pick the same slot
+            self.rows[slots[keep]] = X[fill:][keep]
+        self.seen += n
+
+    def sample(self):
+        return self.rows[:min(self.seen, self.size)]
+
+# ======================================================
+# FIRST PASS: VOCABULARY, COUNTS, SCALER
+# ======================================================
+def first_pass(path, spec, chunk_rows, test_size, seed, reservoir_rows):
+    vocabulary = {encoder.field: set() for encoder in spec.onehot}
+    total = 0
+    for chunk in read_chunks(path, chunk_rows):
+        for field, categories in spec.vocabulary(chunk).items():
+            vocabulary[field] |= categories
+        total += len(chunk)
+    feature_names = spec.names(vocabulary)
+    features = spec.compile(feature_names)
+
+    split = SplitStream(test_size, seed)
+    reservoir = Reservoir(min(reservoir_rows, max(total, 1)), len(feature_names), seed)
+    counts = {"train": 0, "test": 0}
+    for chunk in read_chunks(path, chunk_rows):
+        test = split.test_mask(len(chunk))
+        X = features.frame(chunk)
+        reservoir.add(X[~test])
+        counts["train"] += int((~test).sum())
+        counts["test"] += int(test.sum())
+
+    sample = reservoir.sample()
+    scaler = RobustScaler().fit(sample)
+    return {
+        "feature_names": feature_names,
+        "features": features,
+        "scaler": scaler,
+        "sample": sample,
+        "exact_scaler": reservoir.seen <= reservoir.size,
+        "rows": total,
+        **counts,
+    }
+
+# ======================================================
+# EXTERNAL-MEMORY ITERATOR
+# ======================================================
+class ChunkIter(xgb.DataIter):
+    """
+    Scaled training (or test) chunks of one CSV for XGBoost.
+    label: column index into TARGETS, or None for both (joint model).
+    """
+
+    def __init__(self, path, features, scaler, label, part, chunk_rows,
+                 test_size, seed, cache_prefix):
+        self.path = path
+        self.features = features
+        self.scaler = scaler
+        self.label = label
+        self.part = part
+        self.chunk_rows = chunk_rows
+        self.split = SplitStream(test_size, seed)
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = read_chunks(self.path, self.chunk_rows)
+        for chunk in self._chunks:
+            X, Y = scaled_part(chunk, self.features, self.scaler, self.split, self.part)
+            if len(X) == 0:
+                continue
+            input_data(data=X, label=Y if self.label is None else Y[:, self.label])
+            return True
+        return False
+
+    def reset(self):
+        self._chunks = None
+        self.split.restart()
+
+def scaled_part(chunk, features, scaler, split, part):
+    test = split.test_mask(len(chunk))
+    rows = test if part == "test" else ~test
+    chunk = chunk[rows]
+    X = scaler.transform(features.frame(chunk)) if len(chunk) else np.empty((0, features.n_features))
+    return X, chunk[TARGETS].to_numpy(dtype=np.float64)
+
+# ======================================================
+# STREAMED METRICS
+# ======================================================
+class Moments:
+    """
+    RMSE, MAE and R² accumulated over chunks.
+    """
+
+    def __init__(self):
+        self.n = self.sse = self.sae = self.sy = self.syy = 0.0
+
+    def add(self, y, pred):
+        err = y - pred
+        self.n += len(y)
+        self.sse += float(err @ err)
+        self.sae += float(np.abs(err).sum())
+        self.sy += float(y.sum())
+        self.syy += float(y @ y)
+
+    def result(self):
+        sst = self.syy - self.sy ** 2 / self.n
+        return {
+            "rmse": float(np.sqrt(self.sse / self.n)),
+            "mae": self.sae / self.n,
+            "r2": 1 - self.sse / sst if sst > 0 else float("nan")
+        }
+
+def streamed_metrics(models, path, features, scaler, part, chunk_rows, test_size, seed):
+    """
+    {target: metrics} for {name: Booster} on the train or test rows.
+    """
+    split = SplitStream(test_size, seed)
+    moments = {t: Moments() for t in TARGETS}
+    for chunk in read_chunks(path, chunk_rows):
+        X, Y = scaled_part(chunk, features, scaler, split, part)
+        if len(X) == 0:
+            continue
+        if "joint_model" in models:
+            pred = models["joint_model"].inplace_predict(X)
+        else:
+            pred = np.column_stack([models[n].inplace_predict(X) for n in ("yield_model", "harvest_model")])
+        for t, target in enumerate(TARGETS):
+            moments[target].add(Y[:, t], pred[:, t].astype(np.float64))
+    return {t: m.result() for t, m in moments.items()}
+
+# ======================================================
+# TRAIN
+# ======================================================
+def train(path, spec, params, num_boost_round, chunk_rows=DEFAULT_CHUNK_ROWS,
+          test_size=0.2, seed=42, reservoir_rows=DEFAULT_RESERVOIR_ROWS,
+          joint=False, cache_dir=None, max_bin=256):
+    """
+    params: XGBoost booster params (XGBRegressor.get_xgb_params()).
+    Returns the first-pass summary plus {"models": {name: Booster}},
+    train/test metrics and timings.
+    """
+    # XGBRegressor leaves unset parameters as None
+    params = {k: v for k, v in params.items() if v is not None}
+    started = time.perf_counter()
+    print(f"First pass over {path} ({chunk_rows} rows per chunk)...")
+    summary = first_pass(path, spec, chunk_rows, test_size, seed, reservoir_rows)
+    summary["first_pass_s"] = time.perf_counter() - started
+    scaler_rows = "all" if summary["exact_scaler"] else f"a {len(summary['sample'])}-row sample of the"
+    print(f"  {summary['rows']} rows ({summary['train']} train / {summary['test']} test), "
+          f"{len(summary['feature_names'])} features, scaler from {scaler_rows} training rows")
+
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix="harvest_xgb_cache_")
+    os.makedirs(cache_dir, exist_ok=True)
+    targets = {"joint_model": None} if joint else {"yield_model": 0, "harvest_model": 1}
+    models = {}
+    try:
+        for name, label in targets.items():
+            print(f"Training {name} from external memory ({cache_dir})...")
+            it = ChunkIter(
+                path, summary["features"], summary["scaler"], label, "train",
+                chunk_rows, test_size, seed, os.path.join(cache_dir, name)
+            )
+            dtrain = xgb.ExtMemQuantileDMatrix(it, max_bin=max_bin)
+            models[name] = xgb.train(params, dtrain, num_boost_round=num_boost_round)
+            del dtrain
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    args = (summary["features"], summary["scaler"])
+    summary["models"] = models
+    summary["train_metrics"] = streamed_metrics(models, path, *args, "train", chunk_rows, test_size, seed)
+    summary["test_metrics"] = streamed_metrics(models, path, *args, "test", chunk_rows, test_size, seed)
+    summary["wall_s"] = time.perf_counter() - started
+    summary["peak_rss_mb"] = peak_rss_mb()
+    return summary
@@ -1,9 +1,25 @@
+import argparse
+import json
+import os
+import sys
+import time
 import pandas as pd
 import numpy as np
 import pickle
 import shap
 import warnings
+import xgboost
 
+# Shared feature spec at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from papaya_features import FEATURES
+
+from hparam_search import build_model, search, trial_summary
+from compact import run as run_compact
+from incremental import as_regressor, run as run_incremental, training_params
+from model_bundle import write_bundle
+
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split, KFold, cross_val_score
 from sklearn.preprocessing import RobustScaler
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
@@ -13,107 +29,6 @@ warnings.filterwarnings("ignore")
 
 RANDOM_STATE = 42
 
-# =========================================================
-# LOAD DATA
-# =========================================================
-print("Loading dataset...")
-df = pd.read_csv("papaya_dataset.csv")
-df = df.dropna().reset_index(drop=True)
-
-# =========================================================
-# BASIC CLEANING
-# =========================================================
-watering_map = {
-    "1/day": 7,
-    "2/day": 14,
-    "3/day": 21,
-    "every 2 days": 3.5,
-    "2/week": 2,
-    "3/week": 3,
-    "4/week": 4,
-    "5/week": 5,
-    "daily": 7
-}
-
-month_map = {
-    "January": 1, "February": 2, "March": 3, "April": 4,
-    "May": 5, "June": 6, "July": 7, "August": 8,
-    "September": 9, "October": 10, "November": 11, "December": 12
-}
-
-df["watering_freq_num"] = df["watering_frequency"].map(watering_map)
-df["plant_month_num"] = df["plant_month"].map(month_map)
-
-df["watering_freq_num"].fillna(df["watering_freq_num"].median(), inplace=True)
-df["plant_month_num"].fillna(df["plant_month_num"].median(), inplace=True)
-
-# =========================================================
-# AGRONOMY-AWARE FEATURE ENGINEERING
-# =========================================================
-
-# Rain stress (too much rain hurts yield)
-df["rain_intensity"] = df["total_rain"] / (df["rainy_days"] + 1)
-
-# Temperature comfort zone (Papaya likes ~25–32°C)
-df["temp_stress"] = np.abs(df["avg_temp"] - 28)
-
-# Per-tree resource availability
-df["rain_per_tree"] = df["total_rain"] / (df["trees_count"] + 1)
-
-# Seasonal logic (Sri Lanka)
-df["is_monsoon"] = df["plant_month_num"].isin([5, 6, 7, 8, 9]).astype(int)
-df["is_dry"] = df["plant_month_num"].isin([1, 2, 3, 12]).astype(int)
-
-# Interaction (log-safe)
-df["temp_rain_synergy"] = np.log1p(df["avg_temp"]) * np.log1p(df["total_rain"])
-
-# =========================================================
-# ONE-HOT ENCODING (NO FAKE ORDERING)
-# =========================================================
-df = pd.get_dummies(
-    df,
-    columns=["district", "soil_type", "watering_method"],
-    drop_first=True
-)
-
-# =========================================================
-# FEATURES & TARGETS
-# =========================================================
-target_yield = "yield_per_tree"
-target_harvest = "harvest_days"
-
-drop_cols = [
-    "watering_frequency",
-    "plant_month",
-    "plant_date",
-    target_yield,
-    target_harvest
-]
-
-X = df.drop(columns=drop_cols)
-y_yield = df[target_yield]
-y_harvest = df[target_harvest]
-
-feature_names = X.columns.tolist()
-
-# =========================================================
-# TRAIN / TEST SPLIT
-# =========================================================
-X_train, X_test, y_yield_train, y_yield_test, y_harvest_train, y_harvest_test = (
-    train_test_split(
-        X, y_yield, y_harvest,
-        test_size=0.2,
-        random_state=RANDOM_STATE
-    )
-)
-
-# =========================================================
-# SCALING (ROBUST FOR WEATHER OUTLIERS)
-# =========================================================
-scaler = RobustScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
-
 # =========================================================
 # PRODUCTION-GRADE XGBOOST
 # =========================================================
@@ -133,24 +48,15 @@ def build_xgb():
         tree_method="hist"
     )
 
-yield_model = build_xgb()
-harvest_model = build_xgb()
-
-# =========================================================
-# TRAIN
-# =========================================================
-print("Training yield model...")
-yield_model.fit(X_train_scaled, y_yield_train)
-
-print("Training harvest model...")
-harvest_model.fit(X_train_scaled, y_harvest_train)
-
 # =========================================================
 # EVALUATION
 # =========================================================
-def evaluate(model, Xtr, Xte, ytr, yte, name):
+def evaluate(model, Xtr, Xte, ytr, yte, name, target=None):
     tr_pred = model.predict(Xtr)
     te_pred = model.predict(Xte)
+    if target is not None:
+        # One column of a joint model's (n, 2) output
+        tr_pred, te_pred = tr_pred[:, target], te_pred[:, target]
 
     print(f"\n{name}")
     print(f"Train R² : {r2_score(ytr, tr_pred):.3f}")
@@ -158,46 +64,425 @@ def evaluate(model, Xtr, Xte, ytr, yte, name):
     print(f"RMSE     : {np.sqrt(mean_squared_error(yte, te_pred)):.2f}")
     print(f"MAE      : {mean_absolute_error(yte, te_pred):.2f}")
 
-evaluate(yield_model, X_train_scaled, X_test_scaled, y_yield_train, y_yield_test, "YIELD MODEL")
-evaluate(harvest_model, X_train_scaled, X_test_scaled, y_harvest_train, y_harvest_test, "HARVEST MODEL")
-
 # =========================================================
-# CROSS-VALIDATION (CLEAN)
+# DATA
 # =========================================================
-cv = KFold(n_splits=5, shuffle=True, random_state=RANDOM_STATE)
-cv_yield = cross_val_score(yield_model, X_train_scaled, y_yield_train, cv=cv, scoring="r2")
-
-print(f"\nYield CV R² mean: {cv_yield.mean():.3f}")
+def load_dataset(path="papaya_dataset.csv"):
+    """
+    Cleaned, engineered feature frame and the two target series.
+    """
+    print("Loading dataset...")
+    df = pd.read_csv(path)
+    df = df.dropna().reset_index(drop=True)
+
+    # =========================================================
+    # FEATURES (papaya_features SPEC, SHARED WITH THE SERVICES)
+    # =========================================================
+    # Encoding, agronomy-aware derived columns and one-hot encoding
+    # (drop_first, no fake ordering) all come from the spec, so the
+    # services build exactly the same row for the same farm.
+    feature_names = FEATURES.fit(df)
+    X = pd.DataFrame(FEATURES.compile(feature_names).frame(df), columns=feature_names)
+
+    # =========================================================
+    # TARGETS
+    # =========================================================
+    y_yield = df["yield_per_tree"]
+    y_harvest = df["harvest_days"]
+
+    return X, y_yield, y_harvest
 
 # =========================================================
-# SHAP (PROPER WAY)
+# JOINT MODEL (ONE BOOSTER, BOTH TARGETS)
 # =========================================================
-print("Building SHAP explainers...")
-
-background = shap.sample(X_train_scaled, 200, random_state=RANDOM_STATE)
-
-shap_yield = shap.TreeExplainer(yield_model, background)
-shap_harvest = shap.TreeExplainer(harvest_model, background)
+# one_output_per_tree: a tree per target per round, like the pair but
+# in one booster. multi_output_tree: shared trees with a [yield, days]
+# vector in every leaf, half the trees to walk at serving time.
+JOINT_STRATEGIES = ("one_output_per_tree", "multi_output_tree")
+
+def train_joint(strategy, X_train_scaled, X_test_scaled, Y_train, Y_test, scaler, feature_names):
+    joint_model = build_xgb().set_params(multi_strategy=strategy)
+
+    print(f"Training joint model ({strategy})...")
+    start = time.perf_counter()
+    joint_model.fit(X_train_scaled, Y_train)
+    fit_s = time.perf_counter() - start
+
+    evaluate(joint_model, X_train_scaled, X_test_scaled, Y_train[:, 0], Y_test[:, 0], "JOINT MODEL: YIELD", target=0)
+    evaluate(joint_model, X_train_scaled, X_test_scaled, Y_train[:, 1], Y_test[:, 1], "JOINT MODEL: HARVEST", target=1)
+
+    # No pickled shap explainers here: the service explains joint models
+    # with native contributions (or path attribution for vector leaves)
+    with open("joint_model.pkl", "wb") as f:
+        pickle.dump(joint_model, f)
+
+    with open("scaler.pkl", "wb") as f:
+        pickle.dump(scaler, f)
+
+    with open("feature_names.pkl", "wb") as f:
+        pickle.dump(feature_names, f)
+
+    test_pred = joint_model.predict(X_test_scaled)
+    write_bundle(
+        "harvest_bundle.bin",
+        models={"joint_model": joint_model},
+        scaler=scaler,
+        feature_names=feature_names,
+        metadata={
+            "xgboost_version": xgboost.__version__,
+            "layout": "joint:" + strategy,
+            "targets": ["yield_per_tree", "harvest_days"],
+            "train_rows": len(X_train_scaled),
+            "test_rows": len(X_test_scaled),
+            "test_r2_yield": round(float(r2_score(Y_test[:, 0], test_pred[:, 0])), 4),
+            "test_r2_harvest": round(float(r2_score(Y_test[:, 1], test_pred[:, 1])), 4),
+            "n_estimators": {"joint_model": joint_model.n_estimators},
+            "params": {"joint_model": training_params(joint_model)},
+            "fit_s": round(fit_s, 2)
+        }
+    )
+    print("\nWrote joint_model.pkl; the service loads it in place of "
+          "yield_model.pkl/harvest_model.pkl (remove it to go back to the pair)")
 
 # =========================================================
-# SAVE EVERYTHING
+# STREAMING (DATASETS LARGER THAN RAM)
 # =========================================================
-with open("yield_model.pkl", "wb") as f:
-    pickle.dump(yield_model, f)
+def train_stream(args):
+    # Only needed here; keeps plain training free of its imports
+    import streaming
+
+    chunk_rows = args.chunk_rows or streaming.DEFAULT_CHUNK_ROWS
+    reservoir_rows = args.reservoir_rows or streaming.DEFAULT_RESERVOIR_ROWS
+    template = build_xgb()
+    if args.joint:
+        template.set_params(multi_strategy=args.joint)
+
+    result = streaming.train(
+        args.data, FEATURES, template.get_xgb_params(), template.n_estimators,
+        chunk_rows=chunk_rows,
+        test_size=0.2,
+        seed=RANDOM_STATE,
+        reservoir_rows=reservoir_rows,
+        joint=bool(args.joint)
+    )
+    models = {
+        name: as_regressor(booster, training_params(template))
+        for name, booster in result["models"].items()
+    }
+    scaler, feature_names = result["scaler"], result["feature_names"]
+
+    for part in ("train", "test"):
+        for target, m in result[f"{part}_metrics"].items():
+            print(f"{part:<5} {target:<15} R² {m['r2']:.3f}  RMSE {m['rmse']:.2f}  MAE {m['mae']:.2f}")
+    peak_rss = result["peak_rss_mb"]
+    if peak_rss is not None:
+        print(f"Peak RSS {peak_rss:.0f} MB")
+
+    # =========================================================
+    # SAVE (SHAP BACKGROUND FROM THE RESERVOIR SAMPLE)
+    # =========================================================
+    for name, model in models.items():
+        with open(f"{name}.pkl", "wb") as f:
+            pickle.dump(model, f)
+
+    with open("scaler.pkl", "wb") as f:
+        pickle.dump(scaler, f)
+
+    with open("feature_names.pkl", "wb") as f:
+        pickle.dump(feature_names, f)
+
+    if not args.joint:
+        print("Building SHAP explainers...")
+        background = shap.sample(scaler.transform(result["sample"]), 200, random_state=RANDOM_STATE)
+        for name, target in (("yield_model", "yield"), ("harvest_model", "harvest")):
+            with open(f"shap_{target}.pkl", "wb") as f:
+                pickle.dump(shap.TreeExplainer(models[name], background), f)
+
+    test = result["test_metrics"]
+    write_bundle(
+        "harvest_bundle.bin",
+        models=models,
+        scaler=scaler,
+        feature_names=feature_names,
+        metadata={
+            "xgboost_version": xgboost.__version__,
+            "layout": "joint:" + args.joint if args.joint else "pair",
+            "train_rows": result["train"],
+            "test_rows": result["test"],
+            "test_r2_yield": round(test["yield_per_tree"]["r2"], 4),
+            "test_r2_harvest": round(test["harvest_days"]["r2"], 4),
+            "n_estimators": {name: template.n_estimators for name in models},
+            "params": {name: training_params(template) for name in models},
+            "streaming": {
+                "data": os.path.abspath(args.data),
+                "rows": result["rows"],
+                "chunk_rows": chunk_rows,
+                "exact_scaler": result["exact_scaler"],
+                "first_pass_s": round(result["first_pass_s"], 2),
+                "wall_s": round(result["wall_s"], 2),
+                "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None
+            }
+        }
+    )
 
-with open("harvest_model.pkl", "wb") as f:
-    pickle.dump(harvest_model, f)
+# =========================================================
+# MAIN
+# =========================================================
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--search", action="store_true",
+                        help="choose parameters and tree counts by a parallel early-stopped search")
+    parser.add_argument("--trials", type=int, default=12, help="configurations to try")
+    parser.add_argument("--workers", type=int, default=None, help="search processes (default: CPU count)")
+    parser.add_argument("--max-trees", type=int, default=2000)
+    parser.add_argument("--early-stop", type=int, default=50, help="rounds without validation improvement")
+    parser.add_argument("--val-size", type=float, default=0.15,
+                        help="share of the training split used for validation (--search, --compact)")
+    parser.add_argument("--joint", choices=JOINT_STRATEGIES,
+                        help="train one two-output model for yield and harvest days instead of two models")
+    parser.add_argument("--data", default="papaya_dataset.csv", help="training CSV")
+    parser.add_argument("--stream", action="store_true",
+                        help="train from --data in chunks through XGBoost external memory (bounded RAM)")
+    parser.add_argument("--chunk-rows", type=int,
+                        help="rows per chunk for --stream (default: streaming.DEFAULT_CHUNK_ROWS)")
+    parser.add_argument("--reservoir-rows", type=int,
+                        help="training rows sampled for the --stream scaler and SHAP background "
+                             "(default: streaming.DEFAULT_RESERVOIR_ROWS)")
+    parser.add_argument("--incremental", metavar="CSV",
+                        help="append trees fitted only on these new labelled rows to the models in --models-dir")
+    parser.add_argument("--compact", action="store_true",
+                        help="truncate or distill the models in --models-dir to the smallest within --tolerance")
+    parser.add_argument("--models-dir", default="models", help="current models for --incremental/--compact")
+    parser.add_argument("--rounds", type=int, default=50, help="trees appended per model by --incremental")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="allowed relative holdout RMSE (--incremental) or validation MAE (--compact) increase")
+    parser.add_argument("--promote", action="store_true",
+                        help="also replace the models in --models-dir with the new version or compact models")
+    parser.add_argument("--force", action="store_true", help="write the new version even if the holdout regressed")
+    args = parser.parse_args()
+    if args.joint and args.search:
+        parser.error("--joint and --search cannot be combined")
+    if args.incremental and (args.joint or args.search):
+        parser.error("--incremental updates the existing models; drop --joint/--search")
+    if args.stream and (args.search or args.incremental):
+        parser.error("--stream cannot be combined with --search or --incremental")
+    if args.compact and (args.joint or args.search or args.stream or args.incremental):
+        parser.error("--compact works on the existing models; drop the training options")
+    return args
+
+def main():
+    args = parse_args()
+    started = time.perf_counter()
+
+    if args.stream:
+        train_stream(args)
+        print(f"\nTotal training time: {time.perf_counter() - started:.1f}s")
+        print("\n✅ TRAINING COMPLETE — MODELS READY FOR PRODUCTION")
+        return
+
+    X, y_yield, y_harvest = load_dataset(args.data)
+    feature_names = X.columns.tolist()
+
+    # =========================================================
+    # TRAIN / TEST SPLIT
+    # =========================================================
+    X_train, X_test, y_yield_train, y_yield_test, y_harvest_train, y_harvest_test = (
+        train_test_split(
+            X, y_yield, y_harvest,
+            test_size=0.2,
+            random_state=RANDOM_STATE
+        )
+    )
 
-with open("scaler.pkl", "wb") as f:
-    pickle.dump(scaler, f)
+    # =========================================================
+    # SCALING (ROBUST FOR WEATHER OUTLIERS)
+    # =========================================================
+    scaler = RobustScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    if args.incremental:
+        # =========================================================
+        # INCREMENTAL UPDATE (NEW ROWS ONLY, SAME TEST SPLIT AS HOLDOUT)
+        # =========================================================
+        # The scaler fitted above is not used: the current models keep
+        # the scaler they were trained with.
+        report = run_incremental(
+            args.incremental,
+            holdout=(X_test, np.column_stack([y_yield_test, y_harvest_test])),
+            models_dir=args.models_dir,
+            rounds=args.rounds,
+            tolerance=args.tolerance,
+            default_params=training_params(build_xgb()),
+            promote=args.promote,
+            force=args.force
+        )
+        print(f"\nTotal time: {time.perf_counter() - started:.1f}s")
+        if not report["accepted"]:
+            raise SystemExit(1)
+        return
+
+    if args.compact:
+        # =========================================================
+        # COMPACTION (SELECTED ON A SLICE OF THE TRAINING SPLIT;
+        # THE TEST SPLIT IS ONLY REPORTED)
+        # =========================================================
+        run_compact(
+            (X_train, np.column_stack([y_yield_train, y_harvest_train])),
+            holdout=(X_test, np.column_stack([y_yield_test, y_harvest_test])),
+            models_dir=args.models_dir,
+            tolerance=args.tolerance,
+            promote=args.promote,
+            seed=RANDOM_STATE,
+            val_size=args.val_size
+        )
+        print(f"\nTotal time: {time.perf_counter() - started:.1f}s")
+        return
+
+    if args.joint:
+        train_joint(
+            args.joint, X_train_scaled, X_test_scaled,
+            np.column_stack([y_yield_train, y_harvest_train]),
+            np.column_stack([y_yield_test, y_harvest_test]),
+            scaler, feature_names
+        )
+        print(f"\nTotal training time: {time.perf_counter() - started:.1f}s")
+        print("\n✅ TRAINING COMPLETE — MODELS READY FOR PRODUCTION")
+        return
+
+    # =========================================================
+    # MODELS: FIXED CONFIG OR SEARCH
+    # =========================================================
+    search_report = None
+    if args.search:
+        # =========================================================
+        # HYPERPARAMETER SEARCH (EARLY STOPPING PICKS TREE COUNT)
+        # =========================================================
+        # Validation rows come out of the training split; the test split
+        # stays untouched for the final evaluation below.
+        X_fit, X_val, yy_fit, yy_val, yh_fit, yh_val = train_test_split(
+            X_train_scaled, y_yield_train.values, y_harvest_train.values,
+            test_size=args.val_size,
+            random_state=RANDOM_STATE
+        )
+
+        print(f"Searching {args.trials} configurations x 2 targets...")
+        best, trials, search_wall = search(
+            X_fit, X_val,
+            {"yield": yy_fit, "harvest": yh_fit},
+            {"yield": yy_val, "harvest": yh_val},
+            trials=args.trials,
+            workers=args.workers,
+            max_trees=args.max_trees,
+            early_stop=args.early_stop
+        )
+        search_report = {
+            "summary": trial_summary(trials, search_wall),
+            "best": best,
+            "trials": trials
+        }
+        summary = search_report["summary"]
+        print(f"Search: {summary['trials']} trials in {summary['wall_s']}s "
+              f"(sum of trial times {summary['sum_trial_s']}s, x{summary['speedup']})")
+        for target, result in best.items():
+            print(f"  best {target}: {result['n_estimators']} trees, val RMSE {result['val_rmse']}, {result['params']}")
+
+        yield_model = build_model(best["yield"])
+        harvest_model = build_model(best["harvest"])
+    else:
+        yield_model = build_xgb()
+        harvest_model = build_xgb()
+
+    # =========================================================
+    # TRAIN
+    # =========================================================
+    print("Training yield model...")
+    yield_model.fit(X_train_scaled, y_yield_train)
+
+    print("Training harvest model...")
+    harvest_model.fit(X_train_scaled, y_harvest_train)
+
+    # =========================================================
+    # EVALUATION
+    # =========================================================
+    evaluate(yield_model, X_train_scaled, X_test_scaled, y_yield_train, y_yield_test, "YIELD MODEL")
+    evaluate(harvest_model, X_train_scaled, X_test_scaled, y_harvest_train, y_harvest_test, "HARVEST MODEL")
+
+    # =========================================================
+    # CROSS-VALIDATION (CLEAN)
+    # =========================================================
+    cv = KFold(n_splits=5, shuffle=True, random_state=RANDOM_STATE)
+    # Folds run in parallel, one thread each
+    cv_model = clone(yield_model).set_params(n_jobs=1)
+    cv_yield = cross_val_score(cv_model, X_train_scaled, y_yield_train, cv=cv, scoring="r2", n_jobs=-1)
+
+    print(f"\nYield CV R² mean: {cv_yield.mean():.3f}")
+
+    # =========================================================
+    # SHAP (PROPER WAY)
+    # =========================================================
+    print("Building SHAP explainers...")
+
+    background = shap.sample(X_train_scaled, 200, random_state=RANDOM_STATE)
+
+    shap_yield = shap.TreeExplainer(yield_model, background)
+    shap_harvest = shap.TreeExplainer(harvest_model, background)
+
+    # =========================================================
+    # SAVE EVERYTHING
+    # =========================================================
+    with open("yield_model.pkl", "wb") as f:
+        pickle.dump(yield_model, f)
+
+    with open("harvest_model.pkl", "wb") as f:
+        pickle.dump(harvest_model, f)
+
+    with open("scaler.pkl", "wb") as f:
+        pickle.dump(scaler, f)
+
+    with open("feature_names.pkl", "wb") as f:
+        pickle.dump(feature_names, f)
+
+    with open("shap_yield.pkl", "wb") as f:
+        pickle.dump(shap_yield, f)
+
+    with open("shap_harvest.pkl", "wb") as f:
+        pickle.dump(shap_harvest, f)
+
+    # Single-file bundle (native XGBoost models + scaler arrays), written
+    # after the pickles so it records their digests; copy it to models/
+    # together with them (the service serves pickles over a stale bundle)
+    write_bundle(
+        "harvest_bundle.bin",
+        models={"yield_model": yield_model, "harvest_model": harvest_model},
+        scaler=scaler,
+        feature_names=feature_names,
+        metadata={
+            "xgboost_version": xgboost.__version__,
+            "train_rows": len(X_train),
+            "test_rows": len(X_test),
+            "test_r2_yield": round(float(r2_score(y_yield_test, yield_model.predict(X_test_scaled))), 4),
+            "test_r2_harvest": round(float(r2_score(y_harvest_test, harvest_model.predict(X_test_scaled))), 4),
+            "n_estimators": {
+                "yield_model": yield_model.n_estimators,
+                "harvest_model": harvest_model.n_estimators
+            },
+            "params": {
+                "yield_model": training_params(yield_model),
+                "harvest_model": training_params(harvest_model)
+            },
+            "search": search_report["summary"] if search_report else None
+        }
+    )
 
-with open("feature_names.pkl", "wb") as f:
-    pickle.dump(feature_names, f)
+    if search_report:
+        with open("search_report.json", "w", encoding="utf-8") as f:
+            json.dump(search_report, f, indent=2)
 
-with open("shap_yield.pkl", "wb") as f:
-    pickle.dump(shap_yield, f)
+    print(f"\nTotal training time: {time.perf_counter() - started:.1f}s "
+          f"(trees: yield {yield_model.n_estimators}, harvest {harvest_model.n_estimators})")
 
-with open("shap_harvest.pkl", "wb") as f:
-    pickle.dump(shap_harvest, f)
+    print("\n✅ TRAINING COMPLETE — MODELS READY FOR PRODUCTION")
 
-print("\n✅ TRAINING COMPLETE — MODELS READY FOR PRODUCTION")
+if __name__ == "__main__":
+    main()
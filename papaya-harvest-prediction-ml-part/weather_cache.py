@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Shared papaya_weather package at the repository root
+sys.path.append(os.path.dirname(BASE_DIR))
+from papaya_weather.cache import SQLiteCache, next_refresh
+
+# ======================================================
+# CONFIG
+# ======================================================
+CACHE_PATH = os.environ.get(
+    "WEATHER_CACHE_PATH",
+    os.path.join(BASE_DIR, "cache", "weather_cache.sqlite3")
+)
+
+# ======================================================
+# CACHE
+# ======================================================
+class WeatherCache(SQLiteCache):
+    """
+    On-disk cache shared by every worker on the host (see
+    papaya_weather.cache.SQLiteCache), at this service's cache path.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        super().__init__(path)
+
+# ======================================================
+# HOST LOCKS
+# ======================================================
+def lock_file(f, blocking=True):
+    """
+    Exclusive lock on an open file, released when it is closed. With
+    blocking=False raises OSError if another process holds it.
+    """
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        return
+    # msvcrt locks a byte range from the current position; LK_LOCK
+    # gives up after ~10 s, so keep retrying for a blocking lock
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            if not blocking:
+                raise
+            time.sleep(0.1)
+
+__all__ = ["CACHE_PATH", "WeatherCache", "lock_file", "next_refresh"]
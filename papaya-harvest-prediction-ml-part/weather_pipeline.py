@@ -1,102 +1,174 @@
-import requests
+import os
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 
+from service_metrics import WEATHER_COALESCED, upstream_call
+from weather_cache import WeatherCache
+from weather_store import WeatherStore, combine_totals, frame_totals, window_features
+
+# weather_cache puts the repository root on sys.path
+from papaya_weather import SingleFlight, WeatherClient, daily_frame, gazetteer, normalize_name
+
+weather_cache = WeatherCache()
+
+# Archive days are kept locally and only new days are downloaded
+USE_WEATHER_STORE = os.environ.get("WEATHER_STORE", "1") == "1"
+weather_store = WeatherStore()
+
+# ======================================================
+# HTTP CLIENT
+# ======================================================
+# Pooling, timeouts, retries and circuit breaking live in the shared
+# papaya_weather client; every attempt is timed in /metrics.
+client = WeatherClient(user_agent="PapayaProject/1.0", instrument=upstream_call)
+
+# Budget for a whole get_weather_features call (geocode + both fetches)
+WEATHER_DEADLINE = float(os.environ.get("WEATHER_DEADLINE", "12"))
+
+fetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="weather")
+
+# Identical concurrent geocode/archive/forecast calls share one request
+flight = SingleFlight(on_coalesced=lambda call: WEATHER_COALESCED.inc(call=call))
+
+class WeatherTimeout(Exception):
+    pass
+
+class WeatherCacheMiss(Exception):
+    pass
+
 def geocode_district(district: str):
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {"q": district, "format": "json", "limit": 1}
-    headers = {"User-Agent": "PapayaProject/1.0"}
+    coords = gazetteer.lookup(district)
+    if coords:
+        return coords
 
-    res = requests.get(url, params=params, headers=headers).json()
-    if len(res) == 0:
+    # Unknown name: ask Nominatim once and keep the answer locally
+    return flight.do("geocode", normalize_name(district), _geocode_remote, district)
+
+def _geocode_remote(district):
+    coords = client.geocode(district)
+    if coords is None:
         raise Exception("District not found: " + district)
 
-    return float(res[0]["lat"]), float(res[0]["lon"])
+    gazetteer.remember(district, *coords)
+    return coords
 
 def fetch_past_weather(lat, lon, start_date, end_date):
-    url = "https://archive-api.open-meteo.com/v1/archive"
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "start_date": start_date.strftime("%Y-%m-%d"),
-        "end_date": end_date.strftime("%Y-%m-%d"),
-        "daily": "temperature_2m_mean,precipitation_sum",
-        "timezone": "UTC",
-    }
+    return daily_frame(client.archive_daily(lat, lon, start_date, end_date))
 
-    resp = requests.get(url, params=params).json()
 
-    if "daily" not in resp:
-        return pd.DataFrame()
+def fetch_past_totals(lat, lon, start_date, end_date):
+    """
+    Archive window totals from the daily store, downloading only the
+    days it does not hold yet.
+    """
+    return weather_store.window(lat, lon, start_date, end_date, fetch=fetch_past_weather)
 
-    df = pd.DataFrame({
-        "date": resp["daily"]["time"],
-        "temp": resp["daily"]["temperature_2m_mean"],
-        "precip": resp["daily"]["precipitation_sum"]
-    })
 
-    df["date"] = pd.to_datetime(df["date"])
-    return df
+def fetch_forecast_weather(lat, lon):
+    return daily_frame(client.forecast_daily(lat, lon, forecast_days=250))
+
+def weather_cache_key(district, planted_month):
+    # Spellings of the same district share an entry via the gazetteer
+    coords = gazetteer.lookup(district)
+    if coords:
+        place = f"{coords[0]:.4f},{coords[1]:.4f}"
+    else:
+        place = " ".join(str(district).lower().replace(",", " ").split())
+    return f"{place}|{datetime.utcnow().year}|{int(planted_month)}"
+
+def get_weather_features(district, planted_month, use_cache=True, allow_fetch=True):
+    """
+    Get weather features for prediction.
+    Results are cached per (district, planted_month) until the next
+    daily Open-Meteo refresh. With allow_fetch=False a cache miss
+    raises WeatherCacheMiss instead of going to the network.
+    """
+    if not use_cache:
+        return fetch_weather_features(district, planted_month)
 
+    key = weather_cache_key(district, planted_month)
+    try:
+        cached = weather_cache.get(key)
+    except Exception as cache_error:
+        print(f"Weather cache read failed: {cache_error}")
+        cached = None
+    if cached is not None:
+        return cached
 
-def fetch_forecast_weather(lat, lon):
-    url = "https://api.open-meteo.com/v1/forecast"
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "daily": "temperature_2m_mean,precipitation_sum",
-        "forecast_days": 250,
-        "timezone": "UTC",
-    }
-
-    resp = requests.get(url, params=params).json()
-
-    if "daily" not in resp:
-        return pd.DataFrame()
-
-    df = pd.DataFrame({
-        "date": resp["daily"]["time"],
-        "temp": resp["daily"]["temperature_2m_mean"],
-        "precip": resp["daily"]["precipitation_sum"],
-    })
-
-    df["date"] = pd.to_datetime(df["date"])
-    return df
-
-def get_weather_features(district, planted_month):
+    if not allow_fetch:
+        raise WeatherCacheMiss(f"No cached weather for {district}, month {planted_month}")
+
+    # Concurrent misses for one entry share a single refresh
+    return flight.do("features", key, refresh_weather_features, district, planted_month)
+
+def refresh_weather_features(district, planted_month, expires_at=None):
+    """
+    Fetch live features and store them in the cache, until expires_at
+    (default: the next daily refresh).
+    """
+    features = fetch_weather_features(district, planted_month)
+
+    # Only real features are cached; the default fallback is not a dict
+    if isinstance(features, dict):
+        try:
+            weather_cache.set(weather_cache_key(district, planted_month), features, expires_at)
+        except Exception as cache_error:
+            print(f"Weather cache write failed: {cache_error}")
+
+    return features
+
+def fetch_weather_features(district, planted_month, deadline=None):
     """
-    Get weather features for prediction
+    Fetch weather features from the live APIs (no cache).
+    Archive and forecast are fetched concurrently; WeatherTimeout is
+    raised if they have not both returned within the deadline.
     """
+    deadline = WEATHER_DEADLINE if deadline is None else deadline
+    started = time.monotonic()
+
     lat, lon = geocode_district(district)
 
     planted_date = datetime(datetime.now().year, planted_month, 1)
     end_date = planted_date + timedelta(days=250)  # crop duration example
     today = datetime.utcnow().date()
 
-    df_total = []
-
+    jobs = []
 
     #  Past real weather
     if planted_date.date() < today:
-        past_df = fetch_past_weather(
-            lat, lon,
-            planted_date,
-            min(end_date, datetime.utcnow())
+        past_end = min(end_date, datetime.utcnow())
+        jobs.append(flight.submit(
+            fetch_pool, "archive", (lat, lon, planted_date.date(), past_end.date()),
+            fetch_past_totals if USE_WEATHER_STORE else fetch_past_weather,
+            lat, lon, planted_date, past_end
+        ))
+
+    # Real 250-day forecast (same for every window at this location)
+    if end_date.date() > today:
+        jobs.append(flight.submit(
+            fetch_pool, "forecast", (lat, lon, today), fetch_forecast_weather, lat, lon
+        ))
+
+    remaining = max(0.0, deadline - (time.monotonic() - started))
+    _, pending = wait(jobs, timeout=remaining)
+    # A shared job may also have been cancelled by another caller's deadline
+    if pending or any(job.cancelled() for job in jobs):
+        for job in pending:
+            job.cancel()
+        raise WeatherTimeout(
+            f"Weather fetch for {district} exceeded {deadline:.1f}s deadline"
         )
-        if len(past_df) > 0:
-            df_total.append(past_df)
 
-    
-    # Real 250-day forecast
-    
-    if end_date.date() > today:
-        forecast_df = fetch_forecast_weather(lat, lon)
-        if len(forecast_df) > 0:
-            df_total.append(forecast_df)
+    # Archive and forecast parts as additive totals
+    parts = [job.result() for job in jobs]
+    features = window_features(combine_totals(*[
+        part if isinstance(part, dict) else frame_totals(part) for part in parts
+    ]))
 
-    
     # If no real weather data, return average/default values instead of raising exception
-    if len(df_total) == 0:
+    if features is None:
         print(f"Warning: No real weather data available for {district}, using default values")
         # Return typical Sri Lankan papaya growing region weather values
         default_weather = pd.DataFrame([{
@@ -107,13 +179,7 @@ def get_weather_features(district, planted_month):
         }])
         return default_weather.values[0]
 
-    df = pd.concat(df_total, ignore_index=True)
-
-    return {
-        "avg_temp": round(df["temp"].mean(), 2),
-        "total_rain": round(df["precip"].sum(), 2),
-        "rainy_days": int((df["precip"] > 1).sum())
-    }
+    return features
 
 
 if __name__ == "__main__":
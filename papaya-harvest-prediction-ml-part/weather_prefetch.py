@@ -0,0 +1,163 @@
+"""
+Daily prefetch of weather features for every district x planting month.
+
+Runs as a background thread inside the harvest service
+(WEATHER_PREFETCH=1) or as a companion process:
+
+    python weather_prefetch.py            # refresh now, then daily
+    python weather_prefetch.py --once     # single refresh and exit
+
+Only one process per host refreshes at a time (file lock next to the
+cache database); progress is stored in the cache so every worker can
+report it.
+
+Prefetched entries stay valid for a grace period past the next daily
+refresh (jitter plus the worst-case length of a run), so requests keep
+reading yesterday's features until the new run has replaced them
+instead of falling back to climatology in between.
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+from climatology import SUPPORTED_DISTRICTS
+from weather_cache import lock_file, next_refresh
+from weather_pipeline import WEATHER_DEADLINE, refresh_weather_features, weather_cache
+
+STATUS_KEY = "prefetch_status"
+
+# Seconds after the daily refresh before the next run starts
+START_JITTER = (60, 300)
+
+def _now_iso():
+    return datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+
+class WeatherPrefetcher:
+    def __init__(self, districts, months=range(1, 13), cache=weather_cache, pause=1.0):
+        self.districts = list(districts)
+        self.months = list(months)
+        self.cache = cache
+        # Seconds between combinations, to stay polite to Open-Meteo
+        self.pause = pause
+        self.lock_path = os.path.join(os.path.dirname(cache.path) or ".", "weather_prefetch.lock")
+        self._thread = None
+        self._stop = threading.Event()
+
+    def status(self):
+        status = self.cache.get_meta(STATUS_KEY, {"state": "never_run"})
+        status["thread_alive"] = bool(self._thread and self._thread.is_alive())
+        status["combinations"] = len(self.districts) * len(self.months)
+        return status
+
+    def _save(self, status):
+        try:
+            self.cache.set_meta(STATUS_KEY, status)
+        except Exception as e:
+            print(f"Could not save prefetch status: {e}")
+
+    def grace(self):
+        """
+        Seconds past the next refresh that prefetched entries stay
+        valid: the start jitter plus every combination taking its full
+        deadline and pause.
+        """
+        combos = len(self.districts) * len(self.months)
+        return START_JITTER[1] + combos * (WEATHER_DEADLINE + self.pause)
+
+    def _fresh(self):
+        """
+        True when a full refresh already succeeded in the current
+        cache period (e.g. done by another worker).
+        """
+        status = self.cache.get_meta(STATUS_KEY, {})
+        return status.get("state") == "ok" and status.get("valid_until", 0) > time.time()
+
+    def refresh_all(self, force=False):
+        """
+        Refresh every combination. Returns False when another process
+        holds the lock or the cache is already fresh.
+        """
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        with open(self.lock_path, "w") as lock:
+            try:
+                lock_file(lock, blocking=False)
+            except OSError:
+                return False
+
+            if not force and self._fresh():
+                return False
+
+            started = time.time()
+            expires_at = next_refresh() + self.grace()
+            combos = [(d, m) for d in self.districts for m in self.months]
+            status = {
+                "state": "running",
+                "started_at": _now_iso(),
+                "pid": os.getpid(),
+                "done": 0,
+                "failed": []
+            }
+            self._save(status)
+
+            for district, month in combos:
+                if self._stop.is_set():
+                    break
+                try:
+                    features = refresh_weather_features(district, month, expires_at)
+                    if not isinstance(features, dict):
+                        raise ValueError("no live weather data")
+                except Exception as e:
+                    status["failed"].append({"district": district, "month": month, "error": str(e)})
+                status["done"] += 1
+                self._save(status)
+                time.sleep(self.pause)
+
+            status["state"] = "ok" if not status["failed"] and status["done"] == len(combos) else "partial"
+            status["finished_at"] = _now_iso()
+            status["duration_s"] = round(time.time() - started, 1)
+            status["valid_until"] = next_refresh()
+            self._save(status)
+            print(f"Weather prefetch {status['state']}: {status['done']} refreshed, "
+                  f"{len(status['failed'])} failed in {status['duration_s']}s")
+            return True
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh_all()
+            except Exception as e:
+                print(f"Weather prefetch error: {e}")
+                self._save({"state": "error", "error": str(e), "at": _now_iso()})
+
+            status = self.cache.get_meta(STATUS_KEY, {})
+            if status.get("state") == "ok":
+                # Shortly after the next daily refresh; jitter spreads workers
+                delay = next_refresh() - time.time() + random.uniform(*START_JITTER)
+            else:
+                delay = 600  # retry failed/partial runs sooner
+            self._stop.wait(max(60, delay))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.run_forever, name="weather-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true")
+    parser.add_argument("--districts", nargs="*", default=SUPPORTED_DISTRICTS)
+    args = parser.parse_args()
+
+    prefetcher = WeatherPrefetcher(args.districts)
+    if args.once:
+        prefetcher.refresh_all(force=True)
+        print(prefetcher.status())
+    else:
+        prefetcher.run_forever()
@@ -0,0 +1,373 @@
+"""
+Columnar store of daily archive weather, one directory per location:
+
+    cache/weather_store/<lat>_<lon>/
+        meta.json        {"start": "YYYY-MM-DD", "days": n}
+        temp.f8          daily mean temperature          (n values)
+        precip.f8        daily precipitation sum         (n values)
+        cum_temp.f8      prefix sums of temp, NaN as 0   (n + 1 values)
+        cum_temp_n.i8    prefix count of non-NaN temps   (n + 1 values)
+        cum_precip.f8    prefix sums of precip, NaN as 0 (n + 1 values)
+        cum_rainy.i8     prefix count of precip > 1 mm   (n + 1 values)
+
+Columns are raw little-endian arrays read through np.memmap. New days
+are appended to the end of each file and only become visible once
+meta.json is replaced, so readers never see a half-written day. With
+the prefix arrays the avg_temp / total_rain / rainy_days of any window
+are a few subtractions, whatever its length.
+
+    python weather_store.py info
+"""
+import json
+import os
+import sys
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from weather_cache import lock_file
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STORE_DIR = os.environ.get(
+    "WEATHER_STORE_DIR",
+    os.path.join(BASE_DIR, "cache", "weather_store")
+)
+
+# New locations are backfilled from here so later windows only append
+HISTORY_START = date(date.today().year - 1, 1, 1)
+
+RAINY_DAY_MM = 1.0  # same threshold as weather_pipeline (precip > 1)
+
+COLUMNS = {
+    "temp": "<f8",
+    "precip": "<f8",
+    "cum_temp": "<f8",
+    "cum_temp_n": "<i8",
+    "cum_precip": "<f8",
+    "cum_rainy": "<i8",
+}
+PREFIX_COLUMNS = ("cum_temp", "cum_temp_n", "cum_precip", "cum_rainy")
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+# ======================================================
+# WINDOW TOTALS
+# ======================================================
+# Additive partial aggregates, so archive days from the store and
+# forecast days from the API combine into one set of features.
+
+def empty_totals():
+    return {"days": 0, "temp_sum": 0.0, "temp_days": 0, "rain": 0.0, "rainy_days": 0}
+
+def frame_totals(df):
+    """
+    Totals of a daily DataFrame with temp/precip columns, with the
+    same NaN handling as pandas mean()/sum().
+    """
+    totals = empty_totals()
+    if len(df) == 0:
+        return totals
+    temp = df["temp"].to_numpy(dtype=np.float64)
+    precip = df["precip"].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(temp)
+    totals["days"] = len(df)
+    totals["temp_sum"] = float(temp[valid].sum())
+    totals["temp_days"] = int(valid.sum())
+    totals["rain"] = float(np.nansum(precip))
+    totals["rainy_days"] = int((precip > RAINY_DAY_MM).sum())
+    return totals
+
+def combine_totals(*parts):
+    out = empty_totals()
+    for part in parts:
+        for key in out:
+            out[key] += part[key]
+    return out
+
+def window_features(totals):
+    """
+    {"avg_temp", "total_rain", "rainy_days"} as get_weather_features
+    returns them, or None when the window holds no days.
+    """
+    if totals["days"] == 0:
+        return None
+    avg = totals["temp_sum"] / totals["temp_days"] if totals["temp_days"] else float("nan")
+    return {
+        "avg_temp": round(float(avg), 2),
+        "total_rain": round(float(totals["rain"]), 2),
+        "rainy_days": int(totals["rainy_days"])
+    }
+
+# ======================================================
+# ONE LOCATION
+# ======================================================
+class LocationSeries:
+    def __init__(self, path):
+        self.path = path
+        self._maps = None
+        self._maps_key = None
+        self._lock = threading.Lock()
+
+    def _file(self, column):
+        return os.path.join(self.path, f"{column}.{COLUMNS[column][1:]}")
+
+    def meta(self):
+        try:
+            with open(os.path.join(self.path, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        meta["start"] = date.fromisoformat(meta["start"])
+        return meta
+
+    def _write_meta(self, start, days, checked=None):
+        tmp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"start": start.isoformat(), "days": int(days), "checked": checked}, f)
+        os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+    def _columns(self, meta):
+        """
+        Memory maps of every column at the committed length; remapped
+        only when the series has grown or been rebuilt.
+        """
+        days = meta["days"]
+        with self._lock:
+            if self._maps_key != (meta["start"], days):
+                self._maps = {
+                    column: np.memmap(self._file(column), dtype=dtype, mode="r",
+                                      shape=(days + 1 if column in PREFIX_COLUMNS else days,))
+                    for column, dtype in COLUMNS.items()
+                    if days > 0 or column in PREFIX_COLUMNS
+                }
+                self._maps_key = (meta["start"], days)
+            return self._maps
+
+    # --------------------------------------------------
+    # Read
+    # --------------------------------------------------
+    def totals(self, start, end, meta=None):
+        """
+        Window totals over [start, end] (inclusive), clipped to the days
+        held; O(1) in the window length.
+        """
+        meta = meta or self.meta()
+        if meta is None:
+            return empty_totals()
+        lo = max(0, (_as_date(start) - meta["start"]).days)
+        hi = min(meta["days"], (_as_date(end) - meta["start"]).days + 1)
+        if hi <= lo:
+            return empty_totals()
+
+        cols = self._columns(meta)
+        return {
+            "days": hi - lo,
+            "temp_sum": float(cols["cum_temp"][hi] - cols["cum_temp"][lo]),
+            "temp_days": int(cols["cum_temp_n"][hi] - cols["cum_temp_n"][lo]),
+            "rain": float(cols["cum_precip"][hi] - cols["cum_precip"][lo]),
+            "rainy_days": int(cols["cum_rainy"][hi] - cols["cum_rainy"][lo])
+        }
+
+    def daily(self, start=None, end=None):
+        """
+        DataFrame of stored days in [start, end], like fetch_past_weather.
+        """
+        meta = self.meta()
+        if meta is None or meta["days"] == 0:
+            return pd.DataFrame(columns=["date", "temp", "precip"])
+        lo = 0 if start is None else max(0, (_as_date(start) - meta["start"]).days)
+        hi = meta["days"] if end is None else min(meta["days"], (_as_date(end) - meta["start"]).days + 1)
+        hi = max(lo, hi)
+        cols = self._columns(meta)
+        return pd.DataFrame({
+            "date": pd.date_range(meta["start"] + timedelta(days=lo), periods=hi - lo, freq="D"),
+            "temp": np.array(cols["temp"][lo:hi]),
+            "precip": np.array(cols["precip"][lo:hi])
+        })
+
+    # --------------------------------------------------
+    # Write (caller holds the location lock)
+    # --------------------------------------------------
+    def reset(self, start):
+        os.makedirs(self.path, exist_ok=True)
+        old = self.meta()
+        if old is not None:
+            self._write_meta(old["start"], 0)
+        # New files replace the old ones, so maps other workers still
+        # hold keep pointing at the old (intact) data
+        for column, dtype in COLUMNS.items():
+            tmp_path = self._file(column) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                if column in PREFIX_COLUMNS:
+                    f.write(np.zeros(1, dtype=dtype).tobytes())
+            os.replace(tmp_path, self._file(column))
+        self._write_meta(start, 0)
+
+    def mark_checked(self, end):
+        """
+        Remember that the archive was asked for days up to end today,
+        so days it does not have yet are not re-requested until tomorrow.
+        """
+        meta = self.meta()
+        self._write_meta(meta["start"], meta["days"],
+                         {"through": end.isoformat(), "on": date.today().isoformat()})
+
+    def append(self, df):
+        """
+        Append the days of df (date/temp/precip) that follow the last
+        stored day. Missing days inside the range are kept as NaN;
+        trailing days without data (not in the archive yet) are dropped
+        so a later call can fill them. Returns the number of days added.
+        """
+        meta = self.meta()
+        next_day = meta["start"] + timedelta(days=meta["days"])
+        if len(df) == 0:
+            return 0
+
+        daily = df.assign(date=pd.to_datetime(df["date"]).dt.normalize()).set_index("date")
+        daily = daily[~daily.index.duplicated(keep="last")].sort_index()
+        daily = daily.loc[pd.Timestamp(next_day):]
+        has_data = daily[["temp", "precip"]].notna().any(axis=1)
+        if not has_data.any():
+            return 0
+        daily = daily.loc[:has_data[has_data].index[-1]]
+        daily = daily.reindex(pd.date_range(pd.Timestamp(next_day), daily.index[-1], freq="D"))
+
+        temp = daily["temp"].to_numpy(dtype=np.float64)
+        precip = daily["precip"].to_numpy(dtype=np.float64)
+        n = meta["days"]
+
+        # Continue the prefix sums from the last committed value
+        last = {column: np.fromfile(self._file(column), dtype=COLUMNS[column], count=1,
+                                    offset=n * np.dtype(COLUMNS[column]).itemsize)[0]
+                for column in PREFIX_COLUMNS}
+        new = {
+            "temp": temp,
+            "precip": precip,
+            "cum_temp": last["cum_temp"] + np.cumsum(np.nan_to_num(temp)),
+            "cum_temp_n": last["cum_temp_n"] + np.cumsum(~np.isnan(temp)),
+            "cum_precip": last["cum_precip"] + np.cumsum(np.nan_to_num(precip)),
+            "cum_rainy": last["cum_rainy"] + np.cumsum(precip > RAINY_DAY_MM),
+        }
+
+        for column, dtype in COLUMNS.items():
+            committed = n + 1 if column in PREFIX_COLUMNS else n
+            with open(self._file(column), "r+b") as f:
+                # Drop anything left over from an interrupted append
+                f.truncate(committed * np.dtype(dtype).itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(new[column], dtype=dtype).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        self._write_meta(meta["start"], n + len(daily), meta.get("checked"))
+        return len(daily)
+
+# ======================================================
+# STORE
+# ======================================================
+class WeatherStore:
+    """
+    store = WeatherStore()
+    store.window(lat, lon, start, end, fetch=fetch_past_weather)
+        -> window totals, downloading only days not stored yet
+    store.series(lat, lon).daily()
+    """
+
+    def __init__(self, root=STORE_DIR, history_start=HISTORY_START):
+        self.root = root
+        self.history_start = history_start
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def series(self, lat, lon):
+        name = f"{float(lat):.4f}_{float(lon):.4f}"
+        with self._lock:
+            if name not in self._series:
+                self._series[name] = LocationSeries(os.path.join(self.root, name))
+            return self._series[name]
+
+    @staticmethod
+    def _covers(meta, start, end):
+        if meta is None or start < meta["start"]:
+            return False
+        if meta["start"] + timedelta(days=meta["days"]) > end:
+            return True
+        checked = meta.get("checked") or {}
+        return checked.get("on") == date.today().isoformat() and checked.get("through", "") >= end.isoformat()
+
+    def _locked(self, series):
+        os.makedirs(series.path, exist_ok=True)
+        lock = open(os.path.join(series.path, ".lock"), "w")
+        lock_file(lock)
+        return lock
+
+    def ensure(self, lat, lon, start, end, fetch):
+        """
+        Make the series cover [start, end] as far as the archive has
+        data. fetch(lat, lon, start_dt, end_dt) -> daily DataFrame.
+        """
+        start, end = _as_date(start), _as_date(end)
+        series = self.series(lat, lon)
+        meta = series.meta()
+        if self._covers(meta, start, end):
+            return meta
+
+        with self._locked(series):
+            # Another worker may have filled it while we waited
+            meta = series.meta()
+            if self._covers(meta, start, end):
+                return meta
+            if meta is None or start < meta["start"]:
+                # Days can only be appended; older windows rebuild the
+                # series, refetching what it held before as well
+                if meta is not None and meta["days"]:
+                    end = max(end, meta["start"] + timedelta(days=meta["days"] - 1))
+                series.reset(min(start, self.history_start))
+                meta = series.meta()
+
+            next_day = meta["start"] + timedelta(days=meta["days"])
+            if next_day <= end:
+                df = fetch(lat, lon,
+                           datetime.combine(next_day, datetime.min.time()),
+                           datetime.combine(end, datetime.min.time()))
+                series.append(df)
+                series.mark_checked(end)
+            return series.meta()
+
+    def window(self, lat, lon, start, end, fetch=None):
+        """
+        Totals for [start, end]. With fetch, missing days are
+        downloaded and appended first; without, only stored days count.
+        """
+        if fetch is not None:
+            meta = self.ensure(lat, lon, start, end, fetch)
+        else:
+            meta = None
+        return self.series(lat, lon).totals(start, end, meta)
+
+    def stats(self):
+        out = {"root": self.root, "locations": {}}
+        if not os.path.isdir(self.root):
+            return out
+        for name in sorted(os.listdir(self.root)):
+            meta = LocationSeries(os.path.join(self.root, name)).meta()
+            if meta is None:
+                continue
+            out["locations"][name] = {
+                "start": meta["start"].isoformat(),
+                "end": (meta["start"] + timedelta(days=meta["days"] - 1)).isoformat() if meta["days"] else None,
+                "days": meta["days"]
+            }
+        return out
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "info"
+    if cmd == "info":
+        print(json.dumps(WeatherStore(sys.argv[2] if len(sys.argv) > 2 else STORE_DIR).stats(), indent=2))
+    else:
+        raise SystemExit(f"Unknown command {cmd!r} (use info)")
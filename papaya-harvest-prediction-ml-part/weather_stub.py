@@ -0,0 +1,332 @@
+"""
+Offline stand-in for Nominatim and Open-Meteo, for benchmarking the
+growth service without real upstream traffic.
+
+    python weather_stub.py --port 8085 --latency-ms 80 --jitter-ms 40 --fail-rate 0.02
+
+then start the service against it:
+
+    NOMINATIM_URL=http://127.0.0.1:8085/search \\
+    OPEN_METEO_ARCHIVE_URL=http://127.0.0.1:8085/v1/archive \\
+    OPEN_METEO_FORECAST_URL=http://127.0.0.1:8085/v1/forecast \\
+    WEATHER_CACHE_PATH=/tmp/bench/cache.sqlite3 WEATHER_STORE_DIR=/tmp/bench/store \\
+    python app.py
+
+Responses are replayed from a recordings directory:
+
+    recordings/geocode.json              {"<query>": [{"lat": "...", "lon": "..."}], ...}
+    recordings/daily/<lat>_<lon>.json    {"time": [...], "temperature_2m_mean": [...],
+                                          "precipitation_sum": [...]}
+
+Days or places that were not recorded are synthesised deterministically
+(seasonal temperature, gamma rainfall seeded by place and date), so the
+stub works with an empty directory and archive and forecast always agree.
+With --record, misses are fetched from the real APIs and saved into
+the --recordings directory.
+
+Faults: --latency-ms/--jitter-ms delay every response, --fail-rate
+answers 503, --hang-rate stalls for --hang-s seconds (longer than the
+client's read timeout). They can be changed while running:
+
+    curl -XPOST localhost:8085/_stub/config -d '{"fail_rate": 0.2}'
+    curl localhost:8085/_stub/stats
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import requests
+from flask import Flask, jsonify, request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from papaya_weather import gazetteer
+
+app = Flask(__name__)
+
+REAL_URLS = {
+    "geocode": "https://nominatim.openstreetmap.org/search",
+    "archive": "https://archive-api.open-meteo.com/v1/archive",
+    "forecast": "https://api.open-meteo.com/v1/forecast",
+}
+
+# Same limit as the real forecast API
+MAX_FORECAST_DAYS = 16
+
+config = {
+    "latency_ms": 0.0,
+    "jitter_ms": 0.0,
+    "fail_rate": 0.0,
+    "hang_rate": 0.0,
+    "hang_s": 15.0,
+    "recordings": "recordings",
+    "record": False,
+    "seed": 0
+}
+
+stats = {}
+stats_lock = threading.Lock()
+
+def count(endpoint, outcome):
+    with stats_lock:
+        entry = stats.setdefault(endpoint, {})
+        entry[outcome] = entry.get(outcome, 0) + 1
+
+# ======================================================
+# RECORDINGS
+# ======================================================
+class Recordings:
+    def __init__(self, root):
+        self.root = root
+        self._daily = {}
+        self._lock = threading.Lock()
+        self.geocode = {}
+        path = os.path.join(root, "geocode.json")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.geocode = json.load(f)
+
+    @staticmethod
+    def place(lat, lon):
+        return f"{float(lat):.4f}_{float(lon):.4f}"
+
+    def daily(self, lat, lon):
+        """
+        {date_str: (temp, precip)} recorded for a place, possibly empty.
+        """
+        place = self.place(lat, lon)
+        with self._lock:
+            if place not in self._daily:
+                series = {}
+                path = os.path.join(self.root, "daily", f"{place}.json")
+                if os.path.exists(path):
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    series = {
+                        t: (temp, precip) for t, temp, precip in
+                        zip(data["time"], data["temperature_2m_mean"], data["precipitation_sum"])
+                    }
+                self._daily[place] = series
+            return self._daily[place]
+
+    def save_daily(self, lat, lon, daily, overwrite=True):
+        series = self.daily(lat, lon)
+        with self._lock:
+            for t, temp, precip in zip(daily["time"], daily["temperature_2m_mean"], daily["precipitation_sum"]):
+                if not overwrite and t in series:
+                    continue
+                if temp is not None or precip is not None:
+                    series[t] = (temp, precip)
+            times = sorted(series)
+            os.makedirs(os.path.join(self.root, "daily"), exist_ok=True)
+            with open(os.path.join(self.root, "daily", f"{self.place(lat, lon)}.json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "time": times,
+                    "temperature_2m_mean": [series[t][0] for t in times],
+                    "precipitation_sum": [series[t][1] for t in times]
+                }, f)
+
+    def save_geocode(self, query, result):
+        with self._lock:
+            self.geocode[query] = result
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, "geocode.json"), "w", encoding="utf-8") as f:
+                json.dump(self.geocode, f, indent=2)
+
+recordings = Recordings(config["recordings"])
+
+# ======================================================
+# SYNTHETIC WEATHER
+# ======================================================
+def synthetic_day(lat, lon, day):
+    """
+    Deterministic (temp, precip) for a place and date: a seasonal cycle
+    with two monsoon peaks, plus noise seeded by place and date.
+    """
+    key = f"{config['seed']}|{float(lat):.2f}|{float(lon):.2f}|{day.isoformat()}"
+    rng = np.random.default_rng(int(hashlib.md5(key.encode()).hexdigest()[:12], 16))
+    doy = day.timetuple().tm_yday
+    temp = 27.0 + 1.5 * math.sin(2 * math.pi * (doy - 80) / 365) + rng.normal(0, 0.8)
+    wet = 0.35 + 0.25 * max(math.sin(2 * math.pi * (doy - 100) / 365), math.sin(2 * math.pi * (doy - 260) / 182))
+    precip = float(rng.gamma(0.8, 12.0)) if rng.random() < wet else 0.0
+    return round(temp, 1), round(precip, 1)
+
+def daily_block(lat, lon, start, end):
+    recorded = recordings.daily(lat, lon)
+    times, temps, precs = [], [], []
+    day = start
+    while day <= end:
+        t = day.isoformat()
+        temp, precip = recorded.get(t) or synthetic_day(lat, lon, day)
+        times.append(t)
+        temps.append(temp)
+        precs.append(precip)
+        day += timedelta(days=1)
+    return {"time": times, "temperature_2m_mean": temps, "precipitation_sum": precs}
+
+# ======================================================
+# FAULT INJECTION
+# ======================================================
+def inject(endpoint):
+    """
+    Sleep for the configured latency; returns a (body, status) error
+    response when a failure is injected, else None.
+    """
+    delay = config["latency_ms"] + random.uniform(-1, 1) * config["jitter_ms"]
+    if delay > 0:
+        time.sleep(delay / 1000.0)
+    roll = random.random()
+    if roll < config["hang_rate"]:
+        count(endpoint, "hang")
+        time.sleep(config["hang_s"])
+        return jsonify({"error": True, "reason": "stub: injected hang"}), 504
+    if roll < config["hang_rate"] + config["fail_rate"]:
+        count(endpoint, "fail")
+        return jsonify({"error": True, "reason": "stub: injected failure"}), 503
+    return None
+
+def record_from_upstream(endpoint, params):
+    resp = requests.get(REAL_URLS[endpoint], params=params, timeout=(5, 30),
+                        headers={"User-Agent": "PapayaProject/1.0 (stub recorder)"})
+    return resp.json()
+
+def parse_day(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+# ======================================================
+# ENDPOINTS
+# ======================================================
+@app.route("/search", methods=["GET"])
+def geocode():
+    failed = inject("geocode")
+    if failed:
+        return failed
+
+    query = request.args.get("q", "")
+    if query in recordings.geocode:
+        count("geocode", "replayed")
+        return jsonify(recordings.geocode[query])
+
+    if config["record"]:
+        result = record_from_upstream("geocode", dict(request.args))
+        recordings.save_geocode(query, result)
+        count("geocode", "recorded")
+        return jsonify(result)
+
+    # Fall back to the district gazetteer, like a real lookup would
+    coords = gazetteer.lookup(query.split(",")[0])
+    count("geocode", "synthetic" if coords else "not_found")
+    if not coords:
+        return jsonify([])
+    return jsonify([{"lat": str(coords[0]), "lon": str(coords[1]), "display_name": query}])
+
+@app.route("/v1/archive", methods=["GET"])
+def archive():
+    failed = inject("archive")
+    if failed:
+        return failed
+
+    lat, lon = float(request.args["latitude"]), float(request.args["longitude"])
+    start, end = parse_day(request.args["start_date"]), parse_day(request.args["end_date"])
+    if end < start:
+        return jsonify({"error": True, "reason": "start_date must not be after end_date"}), 400
+
+    if config["record"]:
+        recorded = recordings.daily(lat, lon)
+        if any(d.isoformat() not in recorded for d in (start, end)):
+            data = record_from_upstream("archive", dict(request.args))
+            if "daily" in data:
+                recordings.save_daily(lat, lon, data["daily"])
+            count("archive", "recorded")
+
+    # The archive lags a few days behind; those days come back as null
+    block = daily_block(lat, lon, start, end)
+    lag_from = (date.today() - timedelta(days=5)).isoformat()
+    for i, t in enumerate(block["time"]):
+        if t > lag_from:
+            block["temperature_2m_mean"][i] = None
+            block["precipitation_sum"][i] = None
+    count("archive", "served")
+    return jsonify({"latitude": lat, "longitude": lon, "daily": block})
+
+@app.route("/v1/forecast", methods=["GET"])
+def forecast():
+    failed = inject("forecast")
+    if failed:
+        return failed
+
+    lat, lon = float(request.args["latitude"]), float(request.args["longitude"])
+    if "start_date" in request.args:
+        start, end = parse_day(request.args["start_date"]), parse_day(request.args["end_date"])
+    else:
+        days = int(request.args.get("forecast_days", 7))
+        if days > MAX_FORECAST_DAYS:
+            count("forecast", "rejected")
+            return jsonify({
+                "error": True,
+                "reason": f"Forecast days is invalid. Allowed range 0 to {MAX_FORECAST_DAYS}."
+            }), 400
+        start = date.today()
+        end = start + timedelta(days=days - 1)
+
+    if config["record"]:
+        data = record_from_upstream("forecast", dict(request.args))
+        if "daily" in data and "temperature_2m_mean" in data["daily"]:
+            # Observed archive days win over forecasts for the same date
+            recordings.save_daily(lat, lon, data["daily"], overwrite=False)
+        count("forecast", "recorded")
+
+    block = daily_block(lat, lon, start, end)
+    # Only the requested variables, like the real API
+    wanted = request.args.get("daily", "").split(",")
+    block = {k: v for k, v in block.items() if k == "time" or k in wanted}
+    count("forecast", "served")
+    return jsonify({"latitude": lat, "longitude": lon, "daily": block})
+
+@app.route("/_stub/config", methods=["GET", "POST"])
+def stub_config():
+    if request.method == "POST":
+        for key, value in (request.get_json(force=True) or {}).items():
+            if key in ("latency_ms", "jitter_ms", "fail_rate", "hang_rate", "hang_s"):
+                config[key] = float(value)
+    return jsonify(config)
+
+@app.route("/_stub/stats", methods=["GET", "DELETE"])
+def stub_stats():
+    with stats_lock:
+        if request.method == "DELETE":
+            stats.clear()
+        return jsonify(stats)
+
+# ======================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--recordings", default="recordings")
+    parser.add_argument("--record", action="store_true", help="fetch and save misses from the real APIs")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-s", type=float, default=15.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config.update({k: v for k, v in vars(args).items() if k in config})
+    random.seed(args.seed)
+    recordings = Recordings(args.recordings)
+
+    base = f"http://{args.host}:{args.port}"
+    print("Point the services at the stub with:")
+    print(f"  NOMINATIM_URL={base}/search")
+    print(f"  OPEN_METEO_ARCHIVE_URL={base}/v1/archive")
+    print(f"  OPEN_METEO_FORECAST_URL={base}/v1/forecast")
+    app.run(host=args.host, port=args.port, threaded=True)
@@ -1,68 +1,95 @@
+import glob
+import os
 import torch
 import numpy as np
 from flask import Flask, request, jsonify
 from PIL import Image
-from torchvision import transforms
-from transformers import ViTForImageClassification
-import torch.nn as nn
 import torch.nn.functional as F 
 import warnings
+from stage_cache import StageModelCache
+from vit_models import (
+    DISEASE_CHECKPOINT, LEAF_CHECKPOINT, device, image_tf, load_vit_model,
+    model_bytes, stage_checkpoint
+)
 warnings.filterwarnings("ignore") 
 
 app = Flask(__name__)
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-class ViTWrapper(nn.Module):
-    def __init__(self, model):
-        super().__init__()
-        self.model = model 
-    def forward(self, x):
-        return self.model(x).logits 
+# "cascade" = separate leaf, disease and stage ViTs (up to three passes
+# per image), "multihead" = one shared backbone with a head per
+# decision (models/multihead/multihead.pth, see multihead.py)
+LEAF_SERVING = os.environ.get("LEAF_SERVING", "cascade").lower().strip()
+if LEAF_SERVING not in ("cascade", "multihead"):
+    raise ValueError(f"Unknown LEAF_SERVING: {LEAF_SERVING} (use cascade or multihead)")
 
-def load_vit_model(path):
-    saved = torch.load(path, map_location=device) 
-    classes = saved["classes"] 
-
-    base_model = ViTForImageClassification.from_pretrained(
-        "google/vit-base-patch16-224",
-        num_labels=len(classes),
-        ignore_mismatched_sizes=True
-    ).to(device) 
+def load_stage_model(disease):
+    return load_vit_model(stage_checkpoint(disease))
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+# Stage models stay loaded between requests. A ViT-base stage model is
+# about 330 MB in float32; past the budget the least recently used one
+# is dropped and reloaded on its next request. 0 = no budget.
+STAGE_MODEL_BUDGET_MB = float(os.environ.get("STAGE_MODEL_BUDGET_MB", "1400"))
+# Load every models/stages/*_stage.pth at startup (as many as fit),
+# otherwise each one on its first request
+STAGE_MODEL_PRELOAD = os.environ.get("STAGE_MODEL_PRELOAD", "1") == "1"
+
+if LEAF_SERVING == "multihead":
+    from multihead import MultiHeadScorer, load_multihead
+
+    multihead = load_multihead()
+    stage_models = None
+    print(f"Serving multihead: one backbone, heads {', '.join(multihead.heads)}")
+else:
+    leaf_model, leaf_classes = load_vit_model(LEAF_CHECKPOINT)
+    disease_model, disease_classes = load_vit_model(DISEASE_CHECKPOINT)
+
+    stage_models = StageModelCache(
+        load_stage_model, model_bytes,
+        budget_bytes=int(STAGE_MODEL_BUDGET_MB * 2**20) if STAGE_MODEL_BUDGET_MB > 0 else None
+    )
+
+    if STAGE_MODEL_PRELOAD:
+        stage_files = sorted(glob.glob(stage_checkpoint("*")))
+        diseases = [os.path.basename(p)[:-len("_stage.pth")] for p in stage_files]
+        lazy = stage_models.preload(diseases)
+        if lazy:
+            print(f"Stage model budget full; loading on first request: {', '.join(lazy)}")
+
+def probabilities(model, x):
+    with torch.no_grad():
+        out = model(x)
+        return F.softmax(out, dim=1)[0].cpu().numpy()
 
-    base_model.load_state_dict(saved["state_dict"], strict=False)
-    base_model.eval()
-    return ViTWrapper(base_model), classes
+class CascadeScorer:
+    """
+    The separate leaf, disease and stage models, one pass each.
+    """
 
-leaf_model, leaf_classes = load_vit_model("models/leaf/leaf_detector.pth") 
-disease_model, disease_classes = load_vit_model("models/disease/disease_classifier.pth") 
+    def __init__(self, tensor):
+        self.x = tensor.unsqueeze(0)
 
-def load_stage_model(disease):
-    saved = torch.load(f"models/stages/{disease}_stage.pth", map_location=device)
-    classes = saved["classes"]
+    def leaf(self):
+        return probabilities(leaf_model, self.x), leaf_classes
 
-    base_model = ViTForImageClassification.from_pretrained(
-        "google/vit-base-patch16-224",
-        num_labels=len(classes),
-        ignore_mismatched_sizes=True
-    ).to(device)
+    def disease(self):
+        return probabilities(disease_model, self.x), disease_classes
 
-    base_model.load_state_dict(saved["state_dict"], strict=False)
-    base_model.eval()
-    return ViTWrapper(base_model), classes
-
-image_tf = transforms.Compose([
-    transforms.Resize((224, 224)),
-    transforms.ToTensor(),
-    transforms.Normalize([0.485,0.456,0.406],[0.229,0.224,0.225])
-])
+    def stage(self, disease):
+        stage_model, stage_classes = stage_models.get(disease)
+        return probabilities(stage_model, self.x), stage_classes
 
 def predict_pipeline(img):
     tensor = image_tf(img).to(device)
+    scorer = MultiHeadScorer(multihead, tensor) if LEAF_SERVING == "multihead" else CascadeScorer(tensor)
 
-    with torch.no_grad():
-        out = leaf_model(tensor.unsqueeze(0))
-        probs = F.softmax(out, dim=1)[0].cpu().numpy()
-
+    probs, leaf_classes = scorer.leaf()
     leaf_prob = float(probs[leaf_classes.index("leaf")])
     not_leaf_prob = float(probs[leaf_classes.index("not_leaf")])
 
@@ -78,22 +105,14 @@ def predict_pipeline(img):
         result["message"] = "Not a papaya leaf"
         return result
 
-    with torch.no_grad():
-        out = disease_model(tensor.unsqueeze(0))
-        probs = F.softmax(out, dim=1)[0].cpu().numpy()
-
+    probs, disease_classes = scorer.disease()
     disease_idx = int(np.argmax(probs))
     disease_name = disease_classes[disease_idx]
 
     result["disease"] = disease_name
     result["disease_prob"] = f"{float(probs[disease_idx]) * 100:.2f}%"
 
-    stage_model, stage_classes = load_stage_model(disease_name)
-
-    with torch.no_grad():
-        out = stage_model(tensor.unsqueeze(0))
-        probs = F.softmax(out, dim=1)[0].cpu().numpy()
-
+    probs, stage_classes = scorer.stage(disease_name)
     stage_idx = int(np.argmax(probs))
     stage_name = stage_classes[stage_idx]
 
@@ -108,5 +127,13 @@ def predict():
     img = Image.open(request.files["image"].stream).convert("RGB")
     return jsonify(predict_pipeline(img))
 
+@app.route("/stage_cache_stats", methods=["GET"])
+def stage_cache_stats():
+    # Multi-head serving keeps every stage head resident; nothing to cache
+    stats = stage_models.stats() if stage_models is not None else {}
+    stats["serving"] = LEAF_SERVING
+    stats["rss_bytes"] = rss_bytes()
+    return jsonify(stats)
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5005, debug=True) 
@@ -0,0 +1,417 @@
+"""
+Shared-backbone serving for the leaf cascade (LEAF_SERVING=multihead).
+
+The cascade runs up to three ViT-base forward passes on the same
+224x224 tensor: leaf detector, disease classifier and the stage model
+of the predicted disease. Here the image goes through one ViT backbone
+once, and the leaf, disease and stage decisions are linear heads on its
+pooled [CLS] features. That is one backbone pass plus a few small
+matrix products per image instead of up to three full passes.
+
+    python multihead.py build --images DIR [--backbone disease] [--val 0.2]
+        Distill the heads from the existing checkpoints on unlabelled
+        images and write models/multihead/multihead.pth and
+        parity_report.json.
+    python multihead.py report --images DIR
+        Parity of an existing multihead.pth against the cascade.
+
+Distillation: every image is encoded by the shared backbone (taken from
+one of the existing checkpoints), and each original model's softmax on
+the same image is the target for its head. The head of the checkpoint
+that supplies the backbone is copied as is (identical outputs); the
+others start from their checkpoint's classifier and are fitted with
+soft cross-entropy. Stage heads learn from every image the leaf
+detector accepts, so rare diseases still get enough examples.
+
+Parity is reported on held-out images as agreement with the cascade on
+each decision (leaf / disease / stage and the full result), mean
+absolute probability difference, and per-image latency of both modes.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from PIL import Image
+from transformers import ViTConfig, ViTModel
+
+from vit_models import (
+    BASE_MODEL, DISEASE_CHECKPOINT, LEAF_CHECKPOINT, device, image_tf,
+    load_vit_model, stage_checkpoint
+)
+
+MULTIHEAD_DIR = "models/multihead"
+MULTIHEAD_PATH = os.path.join(MULTIHEAD_DIR, "multihead.pth")
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.JPG", "*.JPEG", "*.PNG")
+
+# ======================================================
+# SERVING MODEL
+# ======================================================
+class MultiHeadLeafModel(nn.Module):
+    """
+    One ViT encoder and a linear head per decision. Heads are named
+    "leaf", "disease" and "stage_<i>"; stage_heads maps disease -> head.
+    """
+
+    def __init__(self, backbone, heads, classes, stage_heads):
+        super().__init__()
+        self.backbone = backbone
+        self.heads = nn.ModuleDict(heads)
+        self.classes = classes
+        self.stage_heads = stage_heads
+
+    def features(self, x):
+        # Pooled representation ViTForImageClassification feeds its
+        # classifier: final-layernormed [CLS] token
+        return self.backbone(x).last_hidden_state[:, 0, :]
+
+    def probabilities(self, head, features):
+        with torch.no_grad():
+            probs = F.softmax(self.heads[head](features), dim=1)[0].cpu().numpy()
+        return probs, self.classes[head]
+
+class MultiHeadScorer:
+    """
+    Cascade decisions for one image from a single backbone pass.
+    """
+
+    def __init__(self, model, tensor):
+        self.model = model
+        with torch.no_grad():
+            self.features = model.features(tensor.unsqueeze(0))
+
+    def leaf(self):
+        return self.model.probabilities("leaf", self.features)
+
+    def disease(self):
+        return self.model.probabilities("disease", self.features)
+
+    def stage(self, disease):
+        return self.model.probabilities(self.model.stage_heads[disease], self.features)
+
+def load_multihead(path=MULTIHEAD_PATH):
+    saved = torch.load(path, map_location=device)
+
+    # Architecture only; every backbone weight comes from the checkpoint
+    config = ViTConfig.from_pretrained(saved["base_model"])
+    backbone = ViTModel(config, add_pooling_layer=False)
+    backbone.load_state_dict(saved["backbone"])
+
+    heads, classes = {}, {}
+    for name, head in saved["heads"].items():
+        layer = nn.Linear(config.hidden_size, len(head["classes"]))
+        layer.load_state_dict(head["state_dict"])
+        heads[name] = layer
+        classes[name] = head["classes"]
+
+    model = MultiHeadLeafModel(backbone, heads, classes, saved["stage_heads"]).to(device)
+    model.eval()
+    return model
+
+# ======================================================
+# TOOLING: FEATURES AND TEACHER OUTPUTS
+# ======================================================
+def find_images(root):
+    paths = []
+    for pattern in IMAGE_PATTERNS:
+        paths += glob.glob(os.path.join(root, "**", pattern), recursive=True)
+    return sorted(set(paths))
+
+def image_batches(paths, batch_size):
+    for start in range(0, len(paths), batch_size):
+        images = [Image.open(p).convert("RGB") for p in paths[start:start + batch_size]]
+        yield torch.stack([image_tf(img) for img in images]).to(device)
+
+def run_over_images(paths, fn, batch_size):
+    """
+    fn(batch tensor) -> (n, k) tensor, concatenated over all images.
+    Images are read again for every model so only one batch is in memory.
+    """
+    outputs = []
+    with torch.no_grad():
+        for batch in image_batches(paths, batch_size):
+            outputs.append(fn(batch).float().cpu())
+    return torch.cat(outputs)
+
+def stage_diseases(disease_classes):
+    return [d for d in disease_classes if os.path.exists(stage_checkpoint(d))]
+
+def teacher_outputs(paths, batch_size):
+    """
+    Softmax of every cascade model on every image, plus the classes and
+    classifier layers of each (loaded one model at a time).
+    """
+    out = {"probs": {}, "classes": {}, "classifier": {}}
+
+    def record(name, model, classes):
+        out["probs"][name] = run_over_images(paths, lambda x: F.softmax(model(x), dim=1), batch_size)
+        out["classes"][name] = classes
+        out["classifier"][name] = model.model.classifier.state_dict()
+
+    for name, path in (("leaf", LEAF_CHECKPOINT), ("disease", DISEASE_CHECKPOINT)):
+        model, classes = load_vit_model(path)
+        record(name, model, classes)
+        del model
+
+    out["stages"] = stage_diseases(out["classes"]["disease"])
+    for disease in out["stages"]:
+        model, classes = load_vit_model(stage_checkpoint(disease))
+        record(f"stage:{disease}", model, classes)
+        del model
+    return out
+
+# ======================================================
+# TOOLING: HEADS
+# ======================================================
+def fit_head(features, targets, init, epochs, lr, weight_decay=1e-4):
+    """
+    Linear head fitted to soft targets (full batch, cached features),
+    starting from the teacher's own classifier.
+    """
+    head = nn.Linear(features.shape[1], targets.shape[1])
+    head.load_state_dict(init)
+    optimizer = torch.optim.Adam(head.parameters(), lr=lr, weight_decay=weight_decay)
+    for _ in range(epochs):
+        optimizer.zero_grad()
+        loss = -(targets * F.log_softmax(head(features), dim=1)).sum(dim=1).mean()
+        loss.backward()
+        optimizer.step()
+    return head
+
+def leaf_mask(leaf_probs, leaf_classes):
+    return leaf_probs[:, leaf_classes.index("leaf")] >= 0.5
+
+# ======================================================
+# TOOLING: PARITY
+# ======================================================
+def decisions(probs, classes, stages):
+    """
+    The cascade's choices per image from {name: (n, k) probs}:
+    is_leaf, disease index (or -1) and stage index (or -1).
+    """
+    is_leaf = leaf_mask(probs["leaf"], classes["leaf"]).numpy()
+    disease = probs["disease"].argmax(dim=1).numpy()
+    stage = np.full(len(is_leaf), -1)
+    for i in np.flatnonzero(is_leaf):
+        name = classes["disease"][disease[i]]
+        if name in stages:
+            stage[i] = int(probs[f"stage:{name}"][i].argmax())
+    disease = np.where(is_leaf, disease, -1)
+    return is_leaf, disease, stage
+
+def parity(teacher, student, classes, stages):
+    t_leaf, t_disease, t_stage = decisions(teacher, classes, stages)
+    s_leaf, s_disease, s_stage = decisions(student, classes, stages)
+
+    both_leaf = t_leaf & s_leaf
+    same_disease = both_leaf & (t_disease == s_disease)
+    report = {
+        "images": int(len(t_leaf)),
+        "leaf_agreement": float((t_leaf == s_leaf).mean()),
+        "disease_agreement": float(same_disease.sum() / max(both_leaf.sum(), 1)),
+        "stage_agreement": float(
+            (same_disease & (t_stage == s_stage)).sum() / max(same_disease.sum(), 1)
+        ),
+        "end_to_end_agreement": float(
+            ((t_leaf == s_leaf) & (t_disease == s_disease) & (t_stage == s_stage)).mean()
+        ),
+        "mean_abs_prob_diff": {
+            name: float((teacher[name] - student[name]).abs().mean())
+            for name in teacher
+        }
+    }
+    return report
+
+def head_probs(heads, features, stage_heads):
+    """
+    Softmax of every head on CPU features, returned on CPU like the
+    teacher outputs. Heads may be on the GPU (a loaded multihead.pth)
+    or on CPU (freshly fitted).
+    """
+    def run(head):
+        weight = next(head.parameters())
+        return F.softmax(head(features.to(weight.device)), dim=1).cpu()
+
+    with torch.no_grad():
+        probs = {"leaf": run(heads["leaf"]), "disease": run(heads["disease"])}
+        for disease, head in stage_heads.items():
+            probs[f"stage:{disease}"] = run(heads[head])
+    return probs
+
+def latency_ms(paths, multihead, repeat=3):
+    """
+    Per-image latency of the cascade (leaf, disease, stage passes) and
+    the multi-head model on a few images.
+    """
+    leaf_model, _ = load_vit_model(LEAF_CHECKPOINT)
+    disease_model, _ = load_vit_model(DISEASE_CHECKPOINT)
+    stage_disease = next(iter(multihead.stage_heads), None)
+    stage_model = load_vit_model(stage_checkpoint(stage_disease))[0] if stage_disease else None
+
+    tensors = [image_tf(Image.open(p).convert("RGB")).to(device).unsqueeze(0) for p in paths]
+
+    def cascade(x):
+        leaf_model(x)
+        disease_model(x)
+        if stage_model is not None:
+            stage_model(x)
+
+    def shared(x):
+        f = multihead.features(x)
+        multihead.heads["leaf"](f)
+        multihead.heads["disease"](f)
+        if stage_disease is not None:
+            multihead.heads[multihead.stage_heads[stage_disease]](f)
+
+    result = {}
+    with torch.no_grad():
+        for name, fn in (("cascade", cascade), ("multihead", shared)):
+            fn(tensors[0])  # warm up
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for x in tensors:
+                    fn(x)
+            result[name] = round((time.perf_counter() - start) / (repeat * len(tensors)) * 1000, 2)
+    return result
+
+# ======================================================
+# COMMANDS
+# ======================================================
+def build(args):
+    paths = find_images(args.images)
+    if len(paths) < 10:
+        raise SystemExit(f"Need at least 10 images under {args.images}, found {len(paths)}")
+    print(f"Distilling heads from {len(paths)} images...")
+
+    teacher = teacher_outputs(paths, args.batch_size)
+    classes, stages = teacher["classes"], teacher["stages"]
+
+    source = LEAF_CHECKPOINT if args.backbone == "leaf" else DISEASE_CHECKPOINT
+    source_model, _ = load_vit_model(source)
+    backbone = source_model.model.vit
+    features = run_over_images(paths, lambda x: backbone(x).last_hidden_state[:, 0, :], args.batch_size)
+
+    order = torch.as_tensor(np.random.default_rng(args.seed).permutation(len(paths)))
+    n_val = max(1, int(len(paths) * args.val))
+    val, train = order[:n_val], order[n_val:]
+
+    is_leaf = leaf_mask(teacher["probs"]["leaf"], classes["leaf"])
+    leaf_train = train[is_leaf[train]]
+    if len(leaf_train) < 10:
+        print(f"Only {len(leaf_train)} training images look like leaves; "
+              f"fitting disease and stage heads on all training images")
+        leaf_train = train
+
+    heads, stage_heads = {}, {}
+    names = ["leaf", "disease"] + [f"stage:{d}" for d in stages]
+    for i, name in enumerate(names):
+        head_name = name if not name.startswith("stage:") else f"stage_{i - 2}"
+        if name.startswith("stage:"):
+            stage_heads[name[len("stage:"):]] = head_name
+        rows = train if name == "leaf" else leaf_train
+        if name == args.backbone:
+            # Same backbone the classifier was trained on
+            head = nn.Linear(features.shape[1], len(classes[name]))
+            head.load_state_dict(teacher["classifier"][name])
+            print(f"  {head_name:<10} copied from the {name} checkpoint")
+        else:
+            head = fit_head(features[rows], teacher["probs"][name][rows],
+                            teacher["classifier"][name], args.epochs, args.lr)
+            print(f"  {head_name:<10} fitted on {len(rows)} images ({name})")
+        heads[head_name] = head.eval()
+
+    student = head_probs(heads, features, stage_heads)
+    report = {
+        "backbone": args.backbone,
+        "images": len(paths),
+        "train": parity({k: v[train] for k, v in teacher["probs"].items()},
+                        {k: v[train] for k, v in student.items()}, classes, stages),
+        "val": parity({k: v[val] for k, v in teacher["probs"].items()},
+                      {k: v[val] for k, v in student.items()}, classes, stages),
+    }
+
+    os.makedirs(MULTIHEAD_DIR, exist_ok=True)
+    head_classes = {"leaf": classes["leaf"], "disease": classes["disease"]}
+    head_classes.update({head: classes[f"stage:{d}"] for d, head in stage_heads.items()})
+    torch.save({
+        "base_model": BASE_MODEL,
+        "backbone_from": source,
+        "backbone": backbone.state_dict(),
+        "heads": {
+            name: {"classes": head_classes[name], "state_dict": head.state_dict()}
+            for name, head in heads.items()
+        },
+        "stage_heads": stage_heads,
+        "parity": report["val"]
+    }, MULTIHEAD_PATH)
+
+    del source_model
+    report["latency_ms_per_image"] = latency_ms(
+        [paths[int(i)] for i in val[:args.latency_images]], load_multihead()
+    )
+    write_report(report)
+
+def report(args):
+    paths = find_images(args.images)
+    print(f"Comparing {MULTIHEAD_PATH} with the cascade on {len(paths)} images...")
+    model = load_multihead()
+    teacher = teacher_outputs(paths, args.batch_size)
+    features = run_over_images(paths, model.features, args.batch_size)
+    student = head_probs(model.heads, features, model.stage_heads)
+    write_report({
+        "images": len(paths),
+        "all": parity(teacher["probs"], student, teacher["classes"], teacher["stages"]),
+        "latency_ms_per_image": latency_ms(paths[:args.latency_images], model)
+    })
+
+def write_report(report):
+    path = os.path.join(MULTIHEAD_DIR, "parity_report.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for split in ("train", "val", "all"):
+        if split not in report:
+            continue
+        r = report[split]
+        print(f"\n{split} ({r['images']} images) agreement with the cascade")
+        for key in ("leaf", "disease", "stage", "end_to_end"):
+            print(f"  {key:<11}: {r[key + '_agreement']:.2%}")
+    latency = report["latency_ms_per_image"]
+    print(f"\nLatency per image: cascade {latency['cascade']:.1f} ms, "
+          f"multihead {latency['multihead']:.1f} ms")
+    print(f"Wrote {path}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="distill heads and write multihead.pth")
+    p.add_argument("--images", required=True, help="directory of leaf (and non-leaf) images, searched recursively")
+    p.add_argument("--backbone", choices=("disease", "leaf"), default="disease",
+                   help="checkpoint whose encoder is shared")
+    p.add_argument("--val", type=float, default=0.2, help="share of images held out for the parity report")
+    p.add_argument("--epochs", type=int, default=300, help="full-batch steps per head")
+    p.add_argument("--lr", type=float, default=1e-3)
+    p.add_argument("--seed", type=int, default=42)
+
+    r = sub.add_parser("report", help="parity of an existing multihead.pth")
+    r.add_argument("--images", required=True)
+
+    for s in (p, r):
+        s.add_argument("--batch-size", type=int, default=16)
+        s.add_argument("--latency-images", type=int, default=8)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build(args)
+    else:
+        report(args)
+
+if __name__ == "__main__":
+    main()
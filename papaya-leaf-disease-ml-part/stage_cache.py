@@ -0,0 +1,130 @@
+"""
+LRU cache of the per-disease stage models for the leaf service.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+class StageModelCache:
+    """
+    Loaded stage models by disease name, within a memory budget.
+
+        cache = StageModelCache(load_stage_model, model_bytes, budget_bytes)
+        model, classes = cache.get("ring_spot")
+
+    load(name) -> (model, classes) runs once per name until the entry is
+    evicted; size(model) -> bytes it keeps resident. Requests that
+    waited for another request's load count as coalesced, not as
+    misses, so misses equal loads and hit_rate counts both. When the total
+    passes budget_bytes the least recently used models are dropped. A
+    model larger than the whole budget is still kept (alone): the
+    request that needed it has to be served. budget_bytes=None keeps
+    everything.
+    """
+
+    def __init__(self, load, size, budget_bytes=None):
+        self.load = load
+        self.size = size
+        self.budget_bytes = budget_bytes
+        self._models = OrderedDict()  # name -> (model, classes, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading = {}  # name -> Lock, so concurrent misses load once
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._loads = {}  # name -> {"count", "seconds", "last_s"}
+
+    def get(self, name, count=True):
+        """
+        (model, classes); count=False leaves the hit/miss counters alone.
+        """
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is not None:
+                self._models.move_to_end(name)
+                self._hits += count
+                return entry[0], entry[1]
+            loading = self._loading.setdefault(name, threading.Lock())
+
+        with loading:
+            # Another request may have loaded it while we waited
+            with self._lock:
+                entry = self._models.get(name)
+                if entry is not None:
+                    self._models.move_to_end(name)
+                    self._coalesced += count
+                    return entry[0], entry[1]
+                self._misses += count
+
+            start = time.perf_counter()
+            model, classes = self.load(name)
+            seconds = time.perf_counter() - start
+            nbytes = self.size(model)
+
+            with self._lock:
+                self._models[name] = (model, classes, nbytes)
+                self._bytes += nbytes
+                self._evict()
+                stats = self._loads.setdefault(name, {"count": 0, "seconds": 0.0, "last_s": 0.0})
+                stats["count"] += 1
+                stats["seconds"] += seconds
+                stats["last_s"] = seconds
+                # Later misses (after an eviction) start with a fresh lock
+                if self._loading.get(name) is loading:
+                    del self._loading[name]
+
+        print(f"Loaded stage model {name} in {seconds:.2f}s ({nbytes / 2**20:.0f} MB)")
+        return model, classes
+
+    def _evict(self):
+        # Caller holds self._lock; the newest entry is never evicted
+        if self.budget_bytes is None:
+            return
+        while self._bytes > self.budget_bytes and len(self._models) > 1:
+            name, (_, _, nbytes) = self._models.popitem(last=False)
+            self._bytes -= nbytes
+            self._evictions += 1
+            print(f"Evicted stage model {name} ({nbytes / 2**20:.0f} MB) to stay within the budget")
+
+    def preload(self, names):
+        """
+        Load models in order until the budget is full; returns the names
+        that were left to load lazily.
+        """
+        skipped = []
+        largest = 0
+        for name in names:
+            # Stop before a load that would evict an earlier preload
+            if self.budget_bytes is not None and self._bytes + largest > self.budget_bytes:
+                skipped.append(name)
+                continue
+            self.get(name, count=False)
+            with self._lock:
+                if name in self._models:
+                    largest = max(largest, self._models[name][2])
+        return skipped
+
+    def stats(self):
+        with self._lock:
+            hits, misses, coalesced = self._hits, self._misses, self._coalesced
+            resident = [
+                {"disease": name, "bytes": nbytes, "classes": len(classes)}
+                for name, (_, classes, nbytes) in self._models.items()
+            ]
+            stats = {
+                "hits": hits,
+                "misses": misses,
+                "coalesced": coalesced,
+                "evictions": self._evictions,
+                "loads": {name: dict(s, seconds=round(s["seconds"], 3), last_s=round(s["last_s"], 3))
+                          for name, s in self._loads.items()},
+                # Least recently used first
+                "resident": resident,
+                "resident_bytes": self._bytes,
+                "budget_bytes": self.budget_bytes,
+            }
+        total = hits + coalesced + misses
+        stats["hit_rate"] = round((hits + coalesced) / total, 4) if total else 0.0
+        return stats
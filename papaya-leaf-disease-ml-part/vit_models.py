@@ -0,0 +1,49 @@
+"""
+ViT checkpoints and image preprocessing shared by the leaf service and
+the multi-head tooling (multihead.py).
+"""
+import torch
+import torch.nn as nn
+from torchvision import transforms
+from transformers import ViTForImageClassification
+
+BASE_MODEL = "google/vit-base-patch16-224"
+
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+LEAF_CHECKPOINT = "models/leaf/leaf_detector.pth"
+DISEASE_CHECKPOINT = "models/disease/disease_classifier.pth"
+
+def stage_checkpoint(disease):
+    return f"models/stages/{disease}_stage.pth"
+
+image_tf = transforms.Compose([
+    transforms.Resize((224, 224)),
+    transforms.ToTensor(),
+    transforms.Normalize([0.485,0.456,0.406],[0.229,0.224,0.225])
+])
+
+class ViTWrapper(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+    def forward(self, x):
+        return self.model(x).logits
+
+def load_vit_model(path):
+    saved = torch.load(path, map_location=device)
+    classes = saved["classes"]
+
+    base_model = ViTForImageClassification.from_pretrained(
+        BASE_MODEL,
+        num_labels=len(classes),
+        ignore_mismatched_sizes=True
+    ).to(device)
+
+    base_model.load_state_dict(saved["state_dict"], strict=False)
+    base_model.eval()
+    return ViTWrapper(base_model), classes
+
+def model_bytes(model):
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
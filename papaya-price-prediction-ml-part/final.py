@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from datetime import datetime
 import numpy as np
@@ -15,7 +15,7 @@ try:
 except ImportError:
     SHAP_AVAILABLE = False
 
-from utils_weather import get_last7_days_rainfall, geocode_district, get_current_month
+from utils_weather import client as weather_client, flight, get_last7_days_rainfall, geocode_district, get_current_month, rainfall_cache
 
 # =====================================================
 # APP
@@ -292,6 +292,49 @@ def factory_outlet_price_predict():
     except Exception:
         return jsonify({"success": False, "error": traceback.format_exc()}), 500
 
+# =====================================================
+# METRICS
+# =====================================================
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    lines = [
+        "# HELP weather_coalesced_total Upstream calls served by an identical in-flight call",
+        "# TYPE weather_coalesced_total counter"
+    ]
+    stats = flight.stats()
+    for call in sorted(stats):
+        lines.append(f'weather_coalesced_total{{call="{call}"}} {stats[call]["coalesced"]}')
+    lines += [
+        "# HELP weather_upstream_calls_total Upstream calls actually made",
+        "# TYPE weather_upstream_calls_total counter"
+    ]
+    for call in sorted(stats):
+        lines.append(f'weather_upstream_calls_total{{call="{call}"}} {stats[call]["leaders"]}')
+
+    client_stats = weather_client.stats()
+    lines += [
+        "# HELP weather_client_retries Upstream retries since start",
+        "# TYPE weather_client_retries gauge"
+    ]
+    for call in sorted(client_stats):
+        lines.append(f'weather_client_retries{{call="{call}"}} {client_stats[call].get("retries", 0)}')
+    lines += [
+        "# HELP weather_breaker_open 1 while the upstream circuit breaker is open or half-open",
+        "# TYPE weather_breaker_open gauge"
+    ]
+    for call in sorted(client_stats):
+        is_open = int(client_stats[call]["breaker"]["state"] != "closed")
+        lines.append(f'weather_breaker_open{{call="{call}"}} {is_open}')
+
+    cache_stats = rainfall_cache.stats()
+    lines += [
+        "# HELP rainfall_cache_lookups Rainfall cache lookups since start",
+        "# TYPE rainfall_cache_lookups gauge",
+        f'rainfall_cache_lookups{{result="hit"}} {cache_stats["hits"]}',
+        f'rainfall_cache_lookups{{result="miss"}} {cache_stats["misses"]}'
+    ]
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
 # =====================================================
 # RUN
 # =====================================================
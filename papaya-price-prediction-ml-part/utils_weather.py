@@ -1,39 +1,57 @@
+import os
+import sys
+import time
 from datetime import datetime, timedelta
-import requests
+
+# Shared papaya_weather package at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from papaya_weather import MemoryCache, SingleFlight, WeatherClient, gazetteer, next_refresh, normalize_name
+
+# Pooling, timeouts, retries and circuit breaking come from the shared client
+client = WeatherClient(user_agent="PapayaPriceApp/1.0 (+https://example.org)")
+
+# Farmers in one district tend to arrive together; identical in-flight
+# geocode/rainfall calls are made once and shared
+flight = SingleFlight()
+
+# Today's rainfall keeps updating, so totals are only reused for an hour
+RAINFALL_TTL = int(os.environ.get("RAINFALL_CACHE_TTL", "3600"))
+rainfall_cache = MemoryCache(max_entries=256)
 
 def geocode_district(district: str, country_hint: str = "Sri Lanka"):
-    q = f"{district}, {country_hint}"
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {"q": q, "format": "json", "limit": 1}
-    headers = {"User-Agent": "PapayaPriceApp/1.0 (+https://example.org)"}
-    r = requests.get(url, params=params, headers=headers, timeout=10)
-    r.raise_for_status()
-    data = r.json()
-    if not data:
+    coords = gazetteer.lookup(district)
+    if coords:
+        return coords
+
+    # Unknown name: ask Nominatim once and keep the answer locally
+    return flight.do("geocode", (normalize_name(district), country_hint),
+                     _geocode_remote, district, country_hint)
+
+def _geocode_remote(district, country_hint):
+    coords = client.geocode(f"{district}, {country_hint}")
+    if coords is None:
         raise ValueError("Could not geocode district: " + district)
-    lat = float(data[0]["lat"])
-    lon = float(data[0]["lon"])
-    return lat, lon
+    gazetteer.remember(district, *coords)
+    return coords
 
 def get_last7_days_rainfall(lat: float, lon: float):
-    print(f"Fetching rainfall for lat={lat}, lon={lon}")
     end = datetime.utcnow().date()
     start = end - timedelta(days=6)
-    url = "https://api.open-meteo.com/v1/forecast"
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "start_date": start.isoformat(),
-        "end_date": end.isoformat(),
-        "daily": "precipitation_sum",
-        "timezone": "UTC"
-    }
-    r = requests.get(url, params=params, timeout=10)
-    r.raise_for_status()
-    data = r.json()
-    if "daily" not in data or "precipitation_sum" not in data["daily"]:
+    key = f"{lat:.4f},{lon:.4f}|{end.isoformat()}"
+
+    total = rainfall_cache.get(key)
+    if total is None:
+        total = flight.do("rainfall", key, _fetch_rainfall, lat, lon, start, end)
+        rainfall_cache.set(key, total, min(next_refresh(), time.time() + RAINFALL_TTL))
+    return total
+
+def _fetch_rainfall(lat, lon, start, end):
+    print(f"Fetching rainfall for lat={lat}, lon={lon}")
+    daily = client.forecast_daily(lat, lon, variables=("precipitation_sum",),
+                                  start_date=start, end_date=end)
+    if not daily or "precipitation_sum" not in daily:
         raise ValueError("Unexpected weather response format.")
-    rains = data["daily"]["precipitation_sum"]
+    rains = daily["precipitation_sum"]
     total = sum(rains)
     print(f"Total rainfall over last 7 days: {total} mm")
     return float(total)
@@ -0,0 +1,26 @@
+"""
+Feature spec shared by harvest training (train.py) and both harvest
+services (papaya-harvest-prediction-ml-part/app.py and
+backend/ml_service/app.py). Services add the repository root to
+sys.path and import from here, so a feature is defined once and the
+training and serving transforms cannot drift apart.
+"""
+from .spec import (
+    DISTRICT_MAP, FEATURES, MONTH_MAP, SOIL_MAP, WATERING_FREQ_MAP,
+    WATERING_METHOD_MAP, CompiledFeatures, FeatureSpec,
+    encode_watering_frequency, known_watering_frequency, parse_month
+)
+
+__all__ = [
+    "CompiledFeatures",
+    "DISTRICT_MAP",
+    "FEATURES",
+    "FeatureSpec",
+    "MONTH_MAP",
+    "SOIL_MAP",
+    "WATERING_FREQ_MAP",
+    "WATERING_METHOD_MAP",
+    "encode_watering_frequency",
+    "known_watering_frequency",
+    "parse_month",
+]
@@ -0,0 +1,372 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# INPUT VOCABULARY
+# ======================================================
+# Every spelling the services accept, mapped to the value the training
+# data uses. One-hot columns are named after the training value
+# ("soil_type_sandy loam"), so aliases must point at those exactly.
+
+WATERING_FREQ_MAP = {
+    "1/day": 7, "2/day": 14, "3/day": 21,
+    "every 2 days": 3.5,
+    "2/week": 2, "3/week": 3,
+    "4/week": 4, "5/week": 5,
+    "daily": 7
+}
+
+# Waterings per week for unknown spellings
+DEFAULT_WATERING_FREQ = 7
+
+MONTH_MAP = {
+    "january": 1, "february": 2, "march": 3, "april": 4,
+    "may": 5, "june": 6, "july": 7, "august": 8,
+    "september": 9, "october": 10, "november": 11, "december": 12
+}
+
+SOIL_MAP = {
+    "loam": "loam",
+    "sandy loam": "sandy loam",
+    "sandy_loam": "sandy loam",
+    "laterite": "laterite soils",
+    "laterite soil": "laterite soils",
+    "laterite soils": "laterite soils",
+    "laterite_soil": "laterite soils",
+    "laterite_soils": "laterite soils"
+}
+
+DISTRICT_MAP = {
+    "matara": "Matara",
+    "hambantota": "Hambantota",
+    "galle": "Galle"
+}
+
+WATERING_METHOD_MAP = {
+    "drip": "Drip",
+    "manual": "Manual",
+    "sprinkler": "Sprinkler"
+}
+
+MONSOON_MONTHS = (5, 6, 7, 8, 9)
+DRY_MONTHS = (1, 2, 3, 12)
+
+# ======================================================
+# ENCODERS
+# ======================================================
+def parse_month(value):
+    if isinstance(value, str):
+        key = value.strip().lower()
+        if key in MONTH_MAP:
+            return MONTH_MAP[key]
+        raise ValueError("Invalid plant_month string")
+    value = int(value)
+    if not 1 <= value <= 12:
+        raise ValueError("plant_month must be 1–12")
+    return value
+
+def known_watering_frequency(value):
+    return _is_number(value) or str(value).lower().strip() in WATERING_FREQ_MAP
+
+def encode_watering_frequency(value):
+    # Numbers are already waterings per week (the mobile app sends them)
+    if _is_number(value):
+        return float(value)
+    return float(WATERING_FREQ_MAP.get(str(value).lower().strip(), DEFAULT_WATERING_FREQ))
+
+def _is_number(value):
+    # NaN/inf (a missing cell in a frame) count as unknown, like None
+    return (isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+            and np.isfinite(value))
+
+def month_in(plant_month, months):
+    """
+    1.0/0.0 flag; works on scalars and arrays.
+    """
+    if np.ndim(plant_month) == 0:
+        return float(plant_month in months)
+    return np.isin(plant_month, months).astype(np.float64)
+
+# ======================================================
+# COLUMN KINDS
+# ======================================================
+class Input:
+    """
+    A number copied from the farm payload or the weather summary.
+    cast=int truncates like int() before the value becomes float64.
+    """
+
+    def __init__(self, name, source="farm", cast=float):
+        self.name = name
+        self.source = source
+        self.cast = cast
+
+    def scalar(self, data, weather, values):
+        record = weather if self.source == "weather" else data
+        return float(self.cast(record[self.name]))
+
+    def column(self, df, values):
+        col = df[self.name].to_numpy()
+        if self.cast is int:
+            col = col.astype(np.int64)
+        return col.astype(np.float64)
+
+class Encoded:
+    """
+    A raw field turned into a number by a scalar encoder.
+    """
+
+    def __init__(self, name, field, encode):
+        self.name = name
+        self.field = field
+        self.encode = encode
+
+    def scalar(self, data, weather, values):
+        return float(self.encode(data[self.field]))
+
+    def column(self, df, values):
+        # Every value goes through encode, as in scalar(): Series.map
+        # would turn None/NaN into NaN instead of the encoder's default.
+        # Results are reused per (type, value), so 2 and "2" stay apart.
+        raw = df[self.field].to_numpy(dtype=object)
+        seen = {}
+
+        def encode(value):
+            try:
+                key = (type(value), value)
+                return seen[key]
+            except KeyError:
+                seen[key] = float(self.encode(value))
+                return seen[key]
+            except TypeError:  # unhashable
+                return float(self.encode(value))
+
+        return np.fromiter((encode(v) for v in raw), np.float64, len(raw))
+
+class Derived:
+    """
+    An expression over earlier columns; fn gets {name: value} with
+    scalars (serving rows) or float64 arrays (batches) and must handle both.
+    """
+
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+
+    def scalar(self, data, weather, values):
+        return float(self.fn(values))
+
+    def column(self, df, values):
+        return np.asarray(self.fn(values), dtype=np.float64)
+
+class OneHot:
+    """
+    Indicator columns "<field>_<category>" for a categorical field.
+    Inputs are lowercased, stripped and looked up in aliases; with
+    drop_first the alphabetically first training category gets no
+    column (pandas get_dummies(drop_first=True)).
+    """
+
+    def __init__(self, field, aliases, drop_first=True):
+        self.field = field
+        self.aliases = aliases
+        self.drop_first = drop_first
+
+    def category(self, value):
+        return self.aliases.get(str(value).lower().strip())
+
+    def categories(self, series):
+        """
+        Set of training categories in a column; unknown spellings raise.
+        """
+        values = pd.unique(series)
+        unknown = sorted({str(v) for v in values if self.category(v) is None})
+        if unknown:
+            raise ValueError(f"{self.field}: no alias for {unknown}; add them to the feature spec")
+        return {self.category(v) for v in values}
+
+    def columns(self, categories):
+        categories = sorted(categories)
+        if self.drop_first:
+            categories = categories[1:]
+        return [f"{self.field}_{c}" for c in categories]
+
+# ======================================================
+# SPEC
+# ======================================================
+class FeatureSpec:
+    """
+    The list of columns a harvest model sees, in training order.
+
+        feature_names = FEATURES.fit(train_df)      # training vocabulary
+        features = FEATURES.compile(feature_names)  # check + index once
+        X = features.frame(df)                      # training, vectorized
+        x = features.row(data, weather)             # serving, one row
+        X = features.batch(rows, weathers)          # serving, many rows
+    """
+
+    def __init__(self, columns, onehot):
+        self.columns = columns
+        self.onehot = onehot
+
+    def fit(self, df):
+        """
+        Feature names for a training frame: every column, then the
+        one-hot columns of each categorical field.
+        """
+        return self.names(self.vocabulary(df))
+
+    def vocabulary(self, df):
+        """
+        {field: set of categories} in df; union these across chunks to
+        fit a dataset that does not fit in memory.
+        """
+        return {encoder.field: encoder.categories(df[encoder.field]) for encoder in self.onehot}
+
+    def names(self, vocabulary):
+        names = [c.name for c in self.columns]
+        for encoder in self.onehot:
+            names += encoder.columns(vocabulary[encoder.field])
+        return names
+
+    def compile(self, feature_names):
+        return CompiledFeatures(self, feature_names)
+
+class CompiledFeatures:
+    """
+    A spec bound to a model's feature_names. Raises at load time if the
+    model expects a column the spec cannot produce.
+
+    Rows are float64 on purpose: training hands float64 to the scaler,
+    and filling float32 here would round values like avg_temp before
+    scaling and break parity.
+    """
+
+    def __init__(self, spec, feature_names):
+        self.spec = spec
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        index = {name: i for i, name in enumerate(self.feature_names)}
+
+        # Column index (or None when the model does not use it)
+        self.column_index = [index.get(c.name) for c in spec.columns]
+
+        # Normalized input value -> one-hot column index; values whose
+        # column was dropped (drop_first) or never trained map to None
+        self.onehot = []
+        produced = {c.name for c in spec.columns}
+        for encoder in spec.onehot:
+            table = {}
+            for key, category in encoder.aliases.items():
+                name = f"{encoder.field}_{category}"
+                table[key] = index.get(name)
+                produced.add(name)
+            self.onehot.append((encoder, table))
+
+        # Raw fields read from a payload + weather record
+        self.fields = sorted(
+            {c.name for c in spec.columns if isinstance(c, Input)}
+            | {c.field for c in spec.columns if isinstance(c, Encoded)}
+            | {e.field for e in spec.onehot}
+        )
+
+        missing = [name for name in self.feature_names if name not in produced]
+        if missing:
+            raise ValueError(f"Feature spec cannot produce model features {missing}")
+
+        self._local = threading.local()
+
+    def _buffer(self):
+        # Preallocated per thread; callers get a copy via the scaler
+        buf = getattr(self._local, "row", None)
+        if buf is None:
+            buf = self._local.row = np.zeros(self.n_features, dtype=np.float64)
+        return buf
+
+    def _onehot_columns(self, data):
+        for encoder, table in self.onehot:
+            col = table.get(str(data[encoder.field]).lower().strip())
+            if col is not None:
+                yield col
+
+    def row(self, data, weather, out=None):
+        """
+        Fill one feature row. Pass out= to write into your own buffer,
+        otherwise a per-thread buffer is reused (copy it if you keep it).
+        """
+        out = self._buffer() if out is None else out
+        out.fill(0.0)
+
+        values = {}
+        for column, col in zip(self.spec.columns, self.column_index):
+            values[column.name] = column.scalar(data, weather, values)
+            if col is not None:
+                out[col] = values[column.name]
+
+        for col in self._onehot_columns(data):
+            out[col] = 1.0
+
+        return out
+
+    def batch(self, rows, weathers):
+        """
+        Fill an (n_rows, n_features) matrix for parallel lists of
+        farm payloads and weather dicts.
+        """
+        records = [dict(data, **weather) for data, weather in zip(rows, weathers)]
+        return self.frame(pd.DataFrame.from_records(records, columns=self.fields))
+
+    def frame(self, df):
+        """
+        (n_rows, n_features) matrix for a DataFrame of raw records (the
+        training CSV columns), one vectorized pass per column.
+        """
+        X = np.zeros((len(df), self.n_features), dtype=np.float64)
+
+        values = {}
+        for column, col in zip(self.spec.columns, self.column_index):
+            values[column.name] = column.column(df, values)
+            if col is not None:
+                X[:, col] = values[column.name]
+
+        rows = np.arange(len(df))
+        for encoder, table in self.onehot:
+            keys = df[encoder.field].astype(str).str.lower().str.strip()
+            cols = keys.map(table).to_numpy()
+            hit = pd.notna(cols)
+            X[rows[hit], cols[hit].astype(np.int64)] = 1.0
+
+        return X
+
+# ======================================================
+# HARVEST MODEL FEATURES
+# ======================================================
+FEATURES = FeatureSpec(
+    columns=[
+        Input("trees_count", cast=int),
+        Input("avg_temp", source="weather"),
+        Input("total_rain", source="weather"),
+        Input("rainy_days", source="weather", cast=int),
+        Encoded("watering_freq_num", "watering_frequency", encode_watering_frequency),
+        Encoded("plant_month_num", "plant_month", parse_month),
+
+        # Rain stress (too much rain hurts yield)
+        Derived("rain_intensity", lambda v: v["total_rain"] / (v["rainy_days"] + 1)),
+        # Temperature comfort zone (Papaya likes ~25–32°C)
+        Derived("temp_stress", lambda v: np.abs(v["avg_temp"] - 28)),
+        # Per-tree resource availability
+        Derived("rain_per_tree", lambda v: v["total_rain"] / (v["trees_count"] + 1)),
+        # Seasonal logic (Sri Lanka)
+        Derived("is_monsoon", lambda v: month_in(v["plant_month_num"], MONSOON_MONTHS)),
+        Derived("is_dry", lambda v: month_in(v["plant_month_num"], DRY_MONTHS)),
+        # Interaction (log-safe)
+        Derived("temp_rain_synergy", lambda v: np.log1p(v["avg_temp"]) * np.log1p(v["total_rain"])),
+    ],
+    onehot=[
+        OneHot("district", DISTRICT_MAP),
+        OneHot("soil_type", SOIL_MAP),
+        OneHot("watering_method", WATERING_METHOD_MAP),
+    ]
+)
@@ -0,0 +1,27 @@
+"""
+Weather/geocode client shared by the harvest, backend ml_service and
+price services. Services add the repository root to sys.path and
+import from here, so timeouts, retries and breaker settings are tuned
+in one place (see client.py for the environment variables).
+"""
+from .breaker import CircuitBreaker, CircuitOpen
+from .cache import MemoryCache, SQLiteCache, WeatherCacheBase, next_refresh
+from .client import UpstreamError, WeatherClient, daily_frame
+from .gazetteer import DistrictGazetteer, gazetteer, normalize_name
+from .single_flight import SingleFlight
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpen",
+    "DistrictGazetteer",
+    "MemoryCache",
+    "SQLiteCache",
+    "SingleFlight",
+    "UpstreamError",
+    "WeatherCacheBase",
+    "WeatherClient",
+    "daily_frame",
+    "gazetteer",
+    "next_refresh",
+    "normalize_name",
+]
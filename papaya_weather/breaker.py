@@ -0,0 +1,73 @@
+import threading
+import time
+
+# ======================================================
+# CIRCUIT BREAKER
+# ======================================================
+# After `threshold` consecutive failures the breaker opens and calls
+# fail fast for `reset_after` seconds; then one trial call is let
+# through (half-open) and its outcome closes or re-opens the breaker.
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpen(Exception):
+    pass
+
+class CircuitBreaker:
+    def __init__(self, name, threshold=5, reset_after=30.0):
+        self.name = name
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._state = CLOSED
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_after:
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """
+        Raises CircuitOpen when the call should not be attempted.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN and time.monotonic() - self.opened_at < self.reset_after:
+                raise CircuitOpen(f"{self.name} circuit open after {self.failures} failures")
+            # Half-open: a single trial call at a time
+            if self._trial_running:
+                raise CircuitOpen(f"{self.name} circuit half-open, trial call in progress")
+            self._state = HALF_OPEN
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._state = CLOSED
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self._state == HALF_OPEN or self.failures >= self.threshold:
+                if self._state != OPEN:
+                    self.times_opened += 1
+                self._state = OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened
+        }
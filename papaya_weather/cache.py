@@ -0,0 +1,262 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# ======================================================
+# CONFIG
+# ======================================================
+# Open-Meteo rebuilds its daily series once a day (UTC), so entries
+# expire at the next refresh instead of after a fixed number of seconds.
+REFRESH_HOUR_UTC = int(os.environ.get("WEATHER_REFRESH_HOUR_UTC", "0"))
+
+# Seconds between writes of the per-process hit/miss counters to the
+# shared SQLite cache (they are also written on stats() and at exit)
+STATS_FLUSH_SECONDS = float(os.environ.get("WEATHER_CACHE_STATS_FLUSH", "10"))
+
+
+def next_refresh(now=None):
+    """
+    Unix timestamp of the next daily data refresh.
+    """
+    now = now or datetime.utcnow()
+    refresh = now.replace(hour=REFRESH_HOUR_UTC, minute=0, second=0, microsecond=0)
+    if refresh <= now:
+        refresh += timedelta(days=1)
+    return (refresh - datetime(1970, 1, 1)).total_seconds()
+
+
+# ======================================================
+# CACHE INTERFACE
+# ======================================================
+class WeatherCacheBase:
+    """
+    What the services expect of a weather cache:
+
+        get(key)                          -> value, or None when missing/expired
+        set(key, value, expires_at=None)  expires at the next refresh by default
+        stats()                           -> dict with at least hits/misses/entries
+
+    Values are JSON-serialisable.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, expires_at=None):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+    def get_or_set(self, key, fn):
+        """
+        Cached value for key, or fn() stored when it is not None.
+        """
+        value = self.get(key)
+        if value is None:
+            value = fn()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+
+class MemoryCache(WeatherCacheBase):
+    """
+    Per-process cache for services without a shared cache directory.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] <= time.time():
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            return json.loads(entry[0])
+
+    def set(self, key, value, expires_at=None):
+        expires_at = expires_at or next_refresh()
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.max_entries:
+                # Drop the entry closest to expiry
+                del self._data[min(self._data, key=lambda k: self._data[k][1])]
+            self._data[key] = (json.dumps(value), expires_at)
+
+    def stats(self):
+        with self._lock:
+            now = time.time()
+            entries = sum(1 for _, expires_at in self._data.values() if expires_at > now)
+            hits, misses = self._hits, self._misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "entries": entries,
+            "next_refresh": datetime.utcfromtimestamp(next_refresh()).isoformat() + "Z"
+        }
+
+
+# ======================================================
+# SQLITE CACHE
+# ======================================================
+class SQLiteCache(WeatherCacheBase):
+    """
+    On-disk key/value cache shared by every worker on the host.
+    Values are stored as JSON; hit/miss counters live in the same
+    database so they add up across processes and survive restarts.
+    Lookups only read: each process counts in memory and adds its
+    counts to the database every STATS_FLUSH_SECONDS, so the write lock
+    stays off the hot path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._pending = {"hits": 0, "misses": 0}
+        self._pending_pid = os.getpid()
+        self._last_flush = time.monotonic()
+        self._stats_lock = threading.Lock()
+        atexit.register(self.flush_stats)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS weather_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_stats ("
+                " name TEXT PRIMARY KEY,"
+                " value INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_meta ("
+                " name TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO cache_stats (name, value) "
+                "VALUES ('hits', 0), ('misses', 0)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across
+        # threads and forked gunicorn workers.
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, name):
+        with self._stats_lock:
+            if os.getpid() != self._pending_pid:
+                # Forked worker: the parent's unflushed counts are not ours
+                self._pending = {"hits": 0, "misses": 0}
+                self._pending_pid = os.getpid()
+            self._pending[name] += 1
+            due = time.monotonic() - self._last_flush >= STATS_FLUSH_SECONDS
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """
+        Add this process's counts since the last flush to the shared counters.
+        """
+        with self._stats_lock:
+            if os.getpid() != self._pending_pid:
+                self._pending = {"hits": 0, "misses": 0}
+                self._pending_pid = os.getpid()
+            pending = self._pending
+            self._pending = {"hits": 0, "misses": 0}
+            self._last_flush = time.monotonic()
+        if not any(pending.values()):
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "UPDATE cache_stats SET value = value + ? WHERE name = ?",
+                    [(n, name) for name, n in pending.items() if n]
+                )
+        except sqlite3.Error:
+            # Keep the counts for the next flush rather than losing them
+            with self._stats_lock:
+                for name, n in pending.items():
+                    self._pending[name] += n
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM weather_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        self._count("hits" if row else "misses")
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, expires_at=None):
+        expires_at = expires_at or next_refresh()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO weather_cache (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+
+    def get_meta(self, name, default=None):
+        """
+        Small JSON values that never expire (e.g. prefetch status).
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM cache_meta WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, name, value):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_meta (name, value) VALUES (?, ?)",
+                (name, json.dumps(value))
+            )
+
+    def purge_expired(self):
+        with self._connect() as conn:
+            cur = conn.execute("DELETE FROM weather_cache WHERE expires_at <= ?", (time.time(),))
+            return cur.rowcount
+
+    def stats(self):
+        self.flush_stats()
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM cache_stats").fetchall())
+            entries = conn.execute(
+                "SELECT COUNT(*) FROM weather_cache WHERE expires_at > ?",
+                (time.time(),)
+            ).fetchone()[0]
+
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "entries": entries,
+            "next_refresh": datetime.utcfromtimestamp(next_refresh()).isoformat() + "Z",
+            "path": self.path
+        }
@@ -0,0 +1,190 @@
+import os
+import random
+import threading
+import time
+from contextlib import nullcontext
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .breaker import CircuitBreaker, CircuitOpen
+
+# ======================================================
+# CONFIG
+# ======================================================
+# One place to tune upstream behaviour for every service.
+CONNECT_TIMEOUT = float(os.environ.get("WEATHER_CONNECT_TIMEOUT", "3"))
+READ_TIMEOUT = float(os.environ.get("WEATHER_READ_TIMEOUT", "8"))
+RETRIES = int(os.environ.get("WEATHER_RETRIES", "2"))
+BACKOFF = float(os.environ.get("WEATHER_BACKOFF", "0.25"))
+MAX_BACKOFF = float(os.environ.get("WEATHER_MAX_BACKOFF", "2"))
+BREAKER_THRESHOLD = int(os.environ.get("WEATHER_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET = float(os.environ.get("WEATHER_BREAKER_RESET", "30"))
+
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+ARCHIVE_URL = os.environ.get("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+FORECAST_URL = os.environ.get("OPEN_METEO_FORECAST_URL", "https://api.open-meteo.com/v1/forecast")
+
+DAILY_VARIABLES = ("temperature_2m_mean", "precipitation_sum")
+
+# Worth retrying: rate limiting and server-side errors
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+class UpstreamError(Exception):
+    pass
+
+# ======================================================
+# CLIENT
+# ======================================================
+class WeatherClient:
+    """
+    Pooled HTTP client for Nominatim and Open-Meteo.
+
+    Every call goes through the same session (keep-alive connection
+    pool), has (connect, read) timeouts, is retried a bounded number of
+    times with full-jitter backoff on connection errors, timeouts, 429
+    and 5xx, and is guarded by one circuit breaker per call type
+    (geocode / archive / forecast) so an upstream outage fails fast.
+
+    instrument(call) may return a context manager wrapped around every
+    HTTP attempt (e.g. for latency/error metrics).
+    """
+
+    def __init__(self, user_agent="PapayaProject/1.0", timeout=None, retries=RETRIES,
+                 backoff=BACKOFF, max_backoff=MAX_BACKOFF, breaker_threshold=BREAKER_THRESHOLD,
+                 breaker_reset=BREAKER_RESET, pool_connections=4, pool_maxsize=16, instrument=None):
+        self.user_agent = user_agent
+        self.timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.instrument = instrument
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+
+        self._breakers = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, call):
+        with self._lock:
+            if call not in self._breakers:
+                self._breakers[call] = CircuitBreaker(call, self.breaker_threshold, self.breaker_reset)
+            return self._breakers[call]
+
+    def _count(self, call, field):
+        with self._lock:
+            entry = self._counts.setdefault(call, {"requests": 0, "retries": 0, "failures": 0, "rejected": 0})
+            entry[field] += 1
+
+    def _sleep_before_retry(self, attempt):
+        # Full jitter: spreads retries from many workers
+        time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt))))
+
+    def get_json(self, call, url, params=None, headers=None):
+        breaker = self.breaker(call)
+        try:
+            breaker.before_call()
+        except CircuitOpen:
+            self._count(call, "rejected")
+            raise
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count(call, "retries")
+                self._sleep_before_retry(attempt - 1)
+            self._count(call, "requests")
+            try:
+                with (self.instrument(call) if self.instrument else nullcontext()):
+                    resp = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                    if resp.status_code in RETRY_STATUS:
+                        raise UpstreamError(f"{call}: HTTP {resp.status_code}")
+                    # Other 4xx are returned as-is: Open-Meteo explains
+                    # bad requests in the JSON body ({"error": true, ...})
+                    data = resp.json()
+            except (requests.ConnectionError, requests.Timeout, UpstreamError) as e:
+                error = e
+                continue
+            except Exception:
+                # A malformed body will not get better on retry
+                self._count(call, "failures")
+                breaker.record_failure()
+                raise
+            breaker.record_success()
+            return data
+
+        self._count(call, "failures")
+        breaker.record_failure()
+        raise error
+
+    # --------------------------------------------------
+    # Endpoints
+    # --------------------------------------------------
+    def geocode(self, query):
+        """
+        (lat, lon) of the first Nominatim match, or None.
+        """
+        res = self.get_json("geocode", NOMINATIM_URL, {"q": query, "format": "json", "limit": 1})
+        if not res:
+            return None
+        return float(res[0]["lat"]), float(res[0]["lon"])
+
+    def archive_daily(self, lat, lon, start_date, end_date, variables=DAILY_VARIABLES):
+        """
+        Open-Meteo archive "daily" block ({"time": [...], <variable>: [...]}),
+        or None when the response has none.
+        """
+        return self.get_json("archive", ARCHIVE_URL, {
+            "latitude": lat,
+            "longitude": lon,
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": end_date.strftime("%Y-%m-%d"),
+            "daily": ",".join(variables),
+            "timezone": "UTC",
+        }).get("daily")
+
+    def forecast_daily(self, lat, lon, variables=DAILY_VARIABLES, forecast_days=None,
+                       start_date=None, end_date=None):
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "daily": ",".join(variables),
+            "timezone": "UTC",
+        }
+        if forecast_days is not None:
+            params["forecast_days"] = forecast_days
+        if start_date is not None:
+            params["start_date"] = start_date.strftime("%Y-%m-%d")
+            params["end_date"] = end_date.strftime("%Y-%m-%d")
+        return self.get_json("forecast", FORECAST_URL, params).get("daily")
+
+    def stats(self):
+        with self._lock:
+            calls = {call: dict(counts) for call, counts in self._counts.items()}
+            breakers = dict(self._breakers)
+        for call, breaker in breakers.items():
+            calls.setdefault(call, {})["breaker"] = breaker.stats()
+        return calls
+
+def daily_frame(daily):
+    """
+    DataFrame(date, temp, precip) from an Open-Meteo daily block with
+    the default variables; empty when daily is None.
+    """
+    import pandas as pd
+
+    if not daily:
+        return pd.DataFrame()
+    df = pd.DataFrame({
+        "date": daily["time"],
+        "temp": daily["temperature_2m_mean"],
+        "precip": daily["precipitation_sum"]
+    })
+    df["date"] = pd.to_datetime(df["date"])
+    return df
@@ -0,0 +1,134 @@
+"""
+Local index of Sri Lankan district coordinates (district_gazetteer.json
+next to this file), shared by the harvest and price services.
+"""
+import difflib
+import json
+import os
+import re
+import threading
+
+# ======================================================
+# CONFIG
+# ======================================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+GAZETTEER_PATH = os.path.join(BASE_DIR, "district_gazetteer.json")
+
+# Names resolved over the network are written here so the next lookup
+# stays local. Kept apart from the bundled file so it can be wiped; one
+# file for every service on the host, so a name is looked up once.
+LEARNED_PATH = os.environ.get(
+    "GAZETTEER_LEARNED_PATH",
+    os.path.join(BASE_DIR, "cache", "gazetteer_learned.json")
+)
+
+FUZZY_CUTOFF = 0.85
+
+NOISE_WORDS = {"sri", "lanka", "district", "province", "dist"}
+
+
+def normalize_name(name):
+    """
+    "Hambanthota, Sri Lanka" -> "hambanthota"
+    "Nuwara-Eliya District"  -> "nuwara eliya"
+    """
+    words = re.sub(r"[^a-z ]", " ", str(name).lower()).split()
+    return " ".join(w for w in words if w not in NOISE_WORDS)
+
+
+# ======================================================
+# GAZETTEER
+# ======================================================
+class DistrictGazetteer:
+    """
+    Local index of Sri Lankan district coordinates with normalized
+    and fuzzy name matching.
+    """
+
+    def __init__(self, path=GAZETTEER_PATH, learned_path=LEARNED_PATH):
+        self.learned_path = learned_path
+        self._lock = threading.Lock()
+        self._index = {}
+        self._learned = {}
+
+        with open(path, "r", encoding="utf-8") as f:
+            bundled = json.load(f)
+
+        for name, entry in bundled["districts"].items():
+            coords = (float(entry["lat"]), float(entry["lon"]))
+            self._index[normalize_name(name)] = coords
+            for alias in entry.get("aliases", []):
+                self._index[normalize_name(alias)] = coords
+
+        if os.path.exists(self.learned_path):
+            try:
+                with open(self.learned_path, "r", encoding="utf-8") as f:
+                    self._learned = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable gazetteer cache: {e}")
+                self._learned = {}
+
+        for key, entry in self._learned.items():
+            self._index.setdefault(key, (float(entry["lat"]), float(entry["lon"])))
+
+    def add_aliases(self, mapping):
+        """
+        Register extra spellings, e.g. {"matara": "Matara"}.
+        Aliases pointing at unknown districts are ignored.
+        """
+        for alias, canonical in mapping.items():
+            coords = self._index.get(normalize_name(canonical))
+            if coords:
+                self._index.setdefault(normalize_name(alias), coords)
+
+    def lookup(self, name):
+        """
+        Return (lat, lon) or None when the name is unknown.
+        """
+        key = normalize_name(name)
+        if not key:
+            return None
+
+        if key in self._index:
+            return self._index[key]
+
+        match = difflib.get_close_matches(key, self._index.keys(), n=1, cutoff=FUZZY_CUTOFF)
+        if match:
+            return self._index[match[0]]
+
+        return None
+
+    def remember(self, name, lat, lon):
+        """
+        Add a network-resolved name to the index and persist it.
+        """
+        key = normalize_name(name)
+        if not key:
+            return
+
+        with self._lock:
+            self._index[key] = (float(lat), float(lon))
+            self._learned[key] = {"lat": float(lat), "lon": float(lon), "query": str(name)}
+
+            try:
+                # Merge with what other workers may have written meanwhile
+                if os.path.exists(self.learned_path):
+                    with open(self.learned_path, "r", encoding="utf-8") as f:
+                        on_disk = json.load(f)
+                    on_disk.update(self._learned)
+                    self._learned = on_disk
+
+                os.makedirs(os.path.dirname(self.learned_path) or ".", exist_ok=True)
+                tmp_path = f"{self.learned_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._learned, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.learned_path)
+            except (OSError, ValueError) as e:
+                print(f"Could not persist gazetteer entry for {name}: {e}")
+
+    def __len__(self):
+        return len(self._index)
+
+
+gazetteer = DistrictGazetteer()
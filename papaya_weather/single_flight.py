@@ -0,0 +1,105 @@
+import threading
+
+# ======================================================
+# SINGLE-FLIGHT
+# ======================================================
+# Concurrent callers asking for the same upstream result share one
+# call: the first caller (leader) runs it, the others wait for its
+# result or exception. Nothing is kept once the call finishes; caching
+# is the weather cache's job.
+#
+# submit() is the same for calls run on an executor: followers get the
+# leader's Future and wait on it in their own thread, so they never
+# occupy a pool worker.
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    flight = SingleFlight(on_coalesced=lambda call: ...)
+    flight.do("forecast", (lat, lon), fetch_forecast_weather, lat, lon)
+    future = flight.submit(pool, "forecast", (lat, lon), fetch_forecast_weather, lat, lon)
+    """
+
+    def __init__(self, on_coalesced=None):
+        self.on_coalesced = on_coalesced
+        self._calls = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _count(self, call, field):
+        entry = self._stats.setdefault(call, {"leaders": 0, "coalesced": 0})
+        entry[field] += 1
+
+    def do(self, call, key, fn, *args, **kwargs):
+        full_key = (call, key)
+        with self._lock:
+            pending = self._calls.get(full_key)
+            if pending is None:
+                pending = self._calls[full_key] = _Call()
+                leader = True
+                self._count(call, "leaders")
+            else:
+                leader = False
+                pending.waiters += 1
+                self._count(call, "coalesced")
+
+        if not leader:
+            if self.on_coalesced:
+                self.on_coalesced(call)
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.result
+
+        try:
+            pending.result = fn(*args, **kwargs)
+            return pending.result
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[full_key]
+            pending.done.set()
+
+    def submit(self, executor, call, key, fn, *args, **kwargs):
+        """
+        Future for fn(*args, **kwargs) on executor, shared with any
+        identical call still pending or running.
+        """
+        full_key = (call, key)
+        with self._lock:
+            future = self._futures.get(full_key)
+            leader = future is None
+            if leader:
+                future = self._futures[full_key] = executor.submit(fn, *args, **kwargs)
+                self._count(call, "leaders")
+            else:
+                self._count(call, "coalesced")
+
+        if not leader:
+            if self.on_coalesced:
+                self.on_coalesced(call)
+            return future
+
+        def forget(done):
+            with self._lock:
+                if self._futures.get(full_key) is done:
+                    del self._futures[full_key]
+        future.add_done_callback(forget)
+        return future
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls) + len(self._futures)
+
+    def stats(self):
+        with self._lock:
+            return {call: dict(entry) for call, entry in self._stats.items()}